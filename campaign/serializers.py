@@ -1,5 +1,7 @@
 from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
 
+from common.models import DamageMixin
 from .models import Campaign
 
 
@@ -11,3 +13,77 @@ class CampaignNameSerializer(serializers.ModelSerializer):
     class Meta:
         model = Campaign
         fields = ['id', 'name']
+
+
+class BulkAdjustHealthSerializer(serializers.Serializer):
+    """
+    Validate a bulk HP adjustment of characters and monsters, e.g. for an area of effect.
+
+    The adjustments match CharacterAdjustHealthSerializer's, applied to every listed creature.
+    """
+
+    characters = serializers.ListField(child=serializers.UUIDField(), default=list)
+    monsters = serializers.ListField(child=serializers.UUIDField(), default=list)
+    max_hp = serializers.IntegerField(default=0)
+    add_constitution_to_max_hp = serializers.BooleanField(default=False)
+    current_hp = serializers.IntegerField(default=0)
+    temporary_hp = serializers.IntegerField(default=0)
+
+    def validate(self, attrs):
+        if not attrs["characters"] and not attrs["monsters"]:
+            raise ValidationError("No characters or monsters to adjust.")
+        return attrs
+
+
+class CreatureHealthSerializer(serializers.Serializer):
+    id = serializers.UUIDField()
+    current_hp = serializers.IntegerField()
+    max_hp = serializers.IntegerField()
+    temporary_hp = serializers.IntegerField()
+
+
+class BulkHealthSerializer(serializers.Serializer):
+    characters = CreatureHealthSerializer(many=True)
+    monsters = CreatureHealthSerializer(many=True)
+
+
+class DamageTargetSerializer(serializers.Serializer):
+    id = serializers.UUIDField()
+    resistances = serializers.ListField(
+        child=serializers.ChoiceField(choices=DamageMixin.DAMAGE_TYPE_CHOICES), default=list
+    )
+    vulnerabilities = serializers.ListField(
+        child=serializers.ChoiceField(choices=DamageMixin.DAMAGE_TYPE_CHOICES), default=list
+    )
+    immunities = serializers.ListField(
+        child=serializers.ChoiceField(choices=DamageMixin.DAMAGE_TYPE_CHOICES), default=list
+    )
+
+
+class BulkDamageSerializer(serializers.Serializer):
+    """
+    Validate damage dealt to characters and monsters, e.g. by an area of effect.
+
+    Each target may list the damage types it's resistant, vulnerable, or immune to.
+    """
+
+    characters = DamageTargetSerializer(many=True, default=list)
+    monsters = DamageTargetSerializer(many=True, default=list)
+    damage = serializers.IntegerField(min_value=0)
+    damage_type = serializers.ChoiceField(
+        choices=DamageMixin.DAMAGE_TYPE_CHOICES, allow_null=True, default=None
+    )
+
+    def validate(self, attrs):
+        if not attrs["characters"] and not attrs["monsters"]:
+            raise ValidationError("No characters or monsters to damage.")
+        return attrs
+
+
+class CreatureDamageSerializer(CreatureHealthSerializer):
+    damage_taken = serializers.IntegerField()
+
+
+class BulkDamageResultSerializer(serializers.Serializer):
+    characters = CreatureDamageSerializer(many=True)
+    monsters = CreatureDamageSerializer(many=True)
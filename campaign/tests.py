@@ -1,3 +1,260 @@
+import json
+
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.status import HTTP_200_OK, HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND
+
+from campaign.models import Campaign
+from character.models import Character
+from character.reference import character_classes, character_races
+from equipment.reference import armor
+from monster.models import Monster, MonsterType
+from monster.reference import monster_types
+
+
+class TestBulkHealthView(TestCase):
+    fixtures = [
+        "campaign/fixtures/campaign.json",
+        "character/fixtures/character.json",
+        "equipment/fixtures/equipment.json",
+        "monster/fixtures/monster.json",
+    ]
+    url = "/api/campaign/hit-points/"
+
+    def adjust(self, data, status=HTTP_200_OK):
+        response = self.client.post(self.url, data=data, content_type="application/json")
+        self.assertEqual(response.status_code, status)
+        return response
+
+    def expected_health(self, model, pks, current_hp=0, max_hp=0, add_constitution=False,
+                        temporary_hp=0):
+        """Apply the adjustment with the AbilityScoreHealthMixin methods, like the view used to."""
+
+        expected = {}
+        for creature in model.objects.filter(pk__in=pks):
+            if current_hp:
+                creature.heal(current_hp)
+            if max_hp or add_constitution:
+                creature.increase_max_hp(max_hp, add_constitution=add_constitution)
+            if temporary_hp:
+                creature.adjust_temporary_hp(temporary_hp)
+            expected[str(creature.pk)] = (
+                creature.current_hp, creature.max_hp, creature.temporary_hp
+            )
+        return expected
+
+    @staticmethod
+    def health(results):
+        return {r["id"]: (r["current_hp"], r["max_hp"], r["temporary_hp"]) for r in results}
+
+    def test_bulk_damage(self):
+        characters = [
+            "8edc2380-fb63-4773-b059-1d7be818e6bd",  # Glod
+            "de1ec576-8aa9-4892-bfe5-e6193166a222",  # Gerold
+        ]
+        monsters = [
+            "1955d244-a38d-4a1c-8891-a891eb8ee582",  # Ally
+            "916e5e55-0842-45f1-b8e0-ed056139332d",  # Todd
+        ]
+        expected_characters = self.expected_health(Character, characters, current_hp=-10)
+        expected_monsters = self.expected_health(Monster, monsters, current_hp=-10)
+
+        # an UPDATE and a SELECT per table, in a savepoint
+        with self.assertNumQueries(6):
+            response = self.adjust(
+                {"characters": characters, "monsters": monsters, "current_hp": -10}
+            )
+        self.assertEqual(self.health(response.data["characters"]), expected_characters)
+        self.assertEqual(self.health(response.data["monsters"]), expected_monsters)
+        self.assertEqual(expected_characters[characters[1]], (0, 8, 0))
+        self.assertEqual(
+            Character.objects.get(pk=characters[0]).current_hp,
+            expected_characters[characters[0]][0],
+        )
+
+    def test_bulk_max_hp_and_temporary_hp(self):
+        characters = ["baf70d99-4743-4d85-96f7-4c9c9614331b"]  # Stevey
+        monsters = ["34dcb71f-3988-4993-875b-7f8c9ebab1ff"]  # Pholus
+        adjustment = {"current_hp": 3, "max_hp": 4, "temporary_hp": 5}
+        expected_characters = self.expected_health(
+            Character, characters, add_constitution=True, **adjustment
+        )
+        expected_monsters = self.expected_health(
+            Monster, monsters, add_constitution=True, **adjustment
+        )
+        response = self.adjust(
+            {
+                "characters": characters,
+                "monsters": monsters,
+                "add_constitution_to_max_hp": True,
+                **adjustment,
+            }
+        )
+        self.assertEqual(self.health(response.data["characters"]), expected_characters)
+        self.assertEqual(self.health(response.data["monsters"]), expected_monsters)
+        self.assertEqual(expected_characters[characters[0]], (26, 40, 5))
+
+        response = self.adjust({"monsters": monsters, "temporary_hp": -10})
+        self.assertEqual(response.data["characters"], [])
+        self.assertEqual(response.data["monsters"][0]["temporary_hp"], 0)
+
+    def test_bulk_health_not_found(self):
+        gerold = "de1ec576-8aa9-4892-bfe5-e6193166a222"
+        missing = "65083c70-8adb-42d2-9024-3890cdf03841"
+        self.adjust(
+            {"characters": [gerold], "monsters": [missing], "current_hp": -5},
+            status=HTTP_404_NOT_FOUND,
+        )
+        self.assertEqual(Character.objects.get(pk=gerold).current_hp, 6)
+
+        self.adjust({"current_hp": -5}, status=HTTP_400_BAD_REQUEST)
+
+
+class TestBulkDamageView(TestCase):
+    fixtures = [
+        "campaign/fixtures/campaign.json",
+        "character/fixtures/character.json",
+        "equipment/fixtures/equipment.json",
+        "monster/fixtures/monster.json",
+    ]
+    url = "/api/campaign/damage/"
+
+    @staticmethod
+    def health(results):
+        return {
+            r["id"]: (r["damage_taken"], r["current_hp"], r["max_hp"], r["temporary_hp"])
+            for r in results
+        }
+
+    def test_bulk_damage(self):
+        glod = "8edc2380-fb63-4773-b059-1d7be818e6bd"
+        gerold = "de1ec576-8aa9-4892-bfe5-e6193166a222"
+        ally = "1955d244-a38d-4a1c-8891-a891eb8ee582"
+        pholus = "34dcb71f-3988-4993-875b-7f8c9ebab1ff"
+        todd = "916e5e55-0842-45f1-b8e0-ed056139332d"
+        Monster.objects.filter(pk=pholus).update(temporary_hp=5)
+
+        data = {
+            "damage": 12,
+            "damage_type": "FIRE",
+            "characters": [
+                {"id": glod, "resistances": ["FIRE"], "vulnerabilities": ["FIRE"]},
+                {"id": gerold, "immunities": ["FIRE"]},
+            ],
+            "monsters": [
+                {"id": ally, "resistances": ["FIRE", "COLD"]},
+                {"id": pholus, "resistances": ["COLD"]},
+                {"id": todd, "vulnerabilities": ["FIRE"]},
+            ],
+        }
+        # an UPDATE and a SELECT per table, in a savepoint
+        with self.assertNumQueries(6):
+            response = self.client.post(self.url, data=data, content_type="application/json")
+            self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(
+            self.health(response.data["characters"]),
+            {glod: (12, 3, 15, 0), gerold: (0, 6, 8, 0)},
+        )
+        self.assertEqual(
+            self.health(response.data["monsters"]),
+            # Pholus' temporary HP absorbs 5 of the damage
+            {ally: (6, 44, 50, 0), pholus: (12, 25, 39, 0), todd: (24, 0, 12, 0)},
+        )
+        pholus_health = Monster.objects.values("current_hp", "temporary_hp").get(pk=pholus)
+        self.assertEqual(pholus_health, {"current_hp": 25, "temporary_hp": 0})
+
+    def test_bulk_damage_temporary_hp(self):
+        stevey = "baf70d99-4743-4d85-96f7-4c9c9614331b"
+        character = Character.objects.get(pk=stevey)
+        character.adjust_health(temporary_hp=10)
+
+        data = {"damage": 4, "characters": [{"id": stevey}]}
+        response = self.client.post(self.url, data=data, content_type="application/json")
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(self.health(response.data["characters"]), {stevey: (4, 19, 34, 6)})
+        self.assertEqual(response.data["monsters"], [])
+
+        self.assertEqual(
+            character.apply_damage(9, "ACID"),
+            {"current_hp": 16, "max_hp": 34, "temporary_hp": 0},
+        )
+        self.assertEqual(character.current_hp, 16)
+
+    def test_bulk_damage_invalid(self):
+        gerold = "de1ec576-8aa9-4892-bfe5-e6193166a222"
+        missing = "65083c70-8adb-42d2-9024-3890cdf03841"
+        data = {"damage": 5, "characters": [{"id": gerold}], "monsters": [{"id": missing}]}
+        response = self.client.post(self.url, data=data, content_type="application/json")
+        self.assertEqual(response.status_code, HTTP_404_NOT_FOUND)
+        self.assertEqual(Character.objects.get(pk=gerold).current_hp, 6)
+
+        for data in (
+            {"damage": 5},
+            {"damage": -5, "characters": [{"id": gerold}]},
+            {"damage": 5, "damage_type": "SPICY", "characters": [{"id": gerold}]},
+        ):
+            response = self.client.post(self.url, data=data, content_type="application/json")
+            self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+
+
+class TestCampaignStatsView(TestCase):
+    fixtures = [
+        "campaign/fixtures/campaign.json",
+        "character/fixtures/character.json",
+        "equipment/fixtures/equipment.json",
+        "monster/fixtures/monster.json",
+    ]
+    url = "/api/campaign/5c0257f1-e8a2-4121-8d7d-0e6ad5654d66/stats/"  # My first campaign
+
+    def setUp(self):
+        cache.clear()
+        for table in (character_classes, character_races, armor, monster_types):
+            table.all()
+
+    def stats(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return json.loads(b"".join(response.streaming_content))
+
+    def test_campaign_stats(self):
+        # the campaign, its characters, and its monsters
+        with self.assertNumQueries(3):
+            stats = self.stats()
+        self.assertEqual([c["name"] for c in stats["characters"]], ["Gerold", "Glod"])
+        glod = stats["characters"][1]
+        self.assertEqual(glod["abilities"]["strength"]["score"], 14)
+        self.assertEqual(glod["armor_class"], 13)
+        self.assertEqual(glod["current_hp"], 15)
+        self.assertEqual(len(stats["monsters"]), 3)
+        monster = stats["monsters"][0]
+        self.assertEqual(
+            set(monster),
+            {
+                "id",
+                "name",
+                "monster_type",
+                "abilities",
+                "armor_class",
+                "initiative",
+                "passive_perception",
+                "current_hp",
+                "max_hp",
+                "temporary_hp",
+            },
+        )
+        self.assertEqual(
+            monster["initiative"], (monster["abilities"]["dexterity"]["score"] - 10) // 2
+        )
+
+        # the number of queries doesn't grow with the roster
+        campaign = Campaign.objects.get(pk="5c0257f1-e8a2-4121-8d7d-0e6ad5654d66")
+        MonsterType.objects.get(name="Giant Toad").spawn(600, campaign=campaign)
+        with self.assertNumQueries(3):
+            stats = self.stats()
+        self.assertEqual(len(stats["monsters"]), 603)
 
-# Create your tests here.
+    def test_campaign_stats_404(self):
+        for pk in ("65083c70-8adb-42d2-9024-3890cdf03841", "not-a-uuid"):
+            response = self.client.get(f"/api/campaign/{pk}/stats/")
+            self.assertEqual(response.status_code, HTTP_404_NOT_FOUND)
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from .views import BulkDamageView, BulkHealthView, CampaignStatsView
+
+
+urlpatterns = [
+    path('damage/', BulkDamageView.as_view(), name="bulk_damage"),
+    path('hit-points/', BulkHealthView.as_view(), name="bulk_hit_points"),
+    path('<str:pk>/stats/', CampaignStatsView.as_view(), name="campaign_stats"),
+]
@@ -1,3 +1,172 @@
-from django.shortcuts import render
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from drf_spectacular.utils import extend_schema, inline_serializer
+from rest_framework.exceptions import NotFound
+from rest_framework.generics import GenericAPIView, get_object_or_404
+from rest_framework.request import Request
+from rest_framework.response import Response
 
-# Create your views here.
+from character.models import Character
+from character.serializers import CharacterStatBlockSerializer
+from character.stats import stat_sheets
+from common.models import HEALTH_FIELDS, damage_taken
+from common.streaming import json_object_stream
+from monster.models import Monster
+from monster.serializers import MonsterStatBlockSerializer
+from monster.stats import stat_blocks
+from .models import Campaign
+from .serializers import (
+    BulkAdjustHealthSerializer,
+    BulkDamageResultSerializer,
+    BulkDamageSerializer,
+    BulkHealthSerializer,
+)
+
+CREATURES = (("characters", Character), ("monsters", Monster))
+
+
+def _creature_health(key, model, pks):
+    """Get the HP of the creatures, raising NotFound if any of them don't exist."""
+
+    health = []
+    if pks:
+        health = list(
+            model.objects.filter(pk__in=pks).order_by("pk").values("id", *HEALTH_FIELDS)
+        )
+    missing = set(pks).difference(row["id"] for row in health)
+    if missing:
+        raise NotFound(f"{key.capitalize()} not found: {', '.join(map(str, missing))}")
+    return health
+
+
+class BulkHealthView(GenericAPIView):
+    """
+    Adjust the current, maximum, and temporary HP of many characters and monsters at once.
+    """
+
+    serializer_class = BulkHealthSerializer
+
+    @extend_schema(request=BulkAdjustHealthSerializer)
+    def post(self, request: Request):
+        """
+        Adjust the listed characters' and monsters' HP by the requested values.
+
+        Each table is adjusted with a single UPDATE, in one transaction. Nothing is adjusted if
+        any of the characters or monsters don't exist.
+        """
+
+        serializer = BulkAdjustHealthSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        request_data = serializer.validated_data
+        adjustment = {
+            "current_hp": request_data["current_hp"],
+            "max_hp": request_data["max_hp"],
+            "temporary_hp": request_data["temporary_hp"],
+            "add_constitution": request_data["add_constitution_to_max_hp"],
+        }
+
+        response_data = {}
+        with transaction.atomic():
+            for key, model in CREATURES:
+                pks = set(request_data[key])
+                if pks:
+                    model.objects.filter(pk__in=pks).adjust_health(**adjustment)
+                response_data[key] = _creature_health(key, model, pks)
+
+        serializer = self.get_serializer(response_data)
+        return Response(serializer.data)
+
+
+class BulkDamageView(GenericAPIView):
+    """
+    Deal damage to many characters and monsters at once.
+    """
+
+    serializer_class = BulkDamageResultSerializer
+
+    @extend_schema(request=BulkDamageSerializer)
+    def post(self, request: Request):
+        """
+        Deal the requested damage to the listed characters and monsters.
+
+        Temporary HP is consumed before current HP. The damage each creature takes depends on its
+        resistances, vulnerabilities, and immunities to the damage type. Each table is damaged
+        with a single UPDATE, in one transaction. Nothing is damaged if any of the characters or
+        monsters don't exist.
+        """
+
+        serializer = BulkDamageSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        request_data = serializer.validated_data
+        damage, damage_type = request_data["damage"], request_data["damage_type"]
+
+        response_data = {}
+        with transaction.atomic():
+            for key, model in CREATURES:
+                damages = {
+                    target["id"]: damage_taken(
+                        damage,
+                        damage_type,
+                        target["resistances"],
+                        target["vulnerabilities"],
+                        target["immunities"],
+                    )
+                    for target in request_data[key]
+                }
+                if damages:
+                    model.objects.filter(pk__in=damages).apply_damage(damages)
+                health = _creature_health(key, model, damages)
+                for row in health:
+                    row["damage_taken"] = damages[row["id"]]
+                response_data[key] = health
+
+        serializer = self.get_serializer(response_data)
+        return Response(serializer.data)
+
+
+def _character_stat_blocks(characters):
+    fields = ("title", "first_name", "last_name", *HEALTH_FIELDS)
+    for sheet in stat_sheets(characters, fields=fields):
+        names = (sheet.pop("title"), sheet.pop("first_name"), sheet.pop("last_name"))
+        sheet["name"] = " ".join(name for name in names if name)
+        yield sheet
+
+
+class CampaignStatsView(GenericAPIView):
+    """
+    Get the derived stat blocks of every character and monster in a campaign.
+    """
+
+    queryset = Campaign.objects.all()
+
+    @extend_schema(
+        responses=inline_serializer(
+            "CampaignStats",
+            {
+                "characters": CharacterStatBlockSerializer(many=True),
+                "monsters": MonsterStatBlockSerializer(many=True),
+            },
+        )
+    )
+    def get(self, request: Request, pk):
+        """
+        Get the stat blocks of the campaign's characters and monsters, e.g. for a DM screen.
+
+        Each roster is read in a single query with a server-side cursor, and the response is
+        streamed, so the number of queries and the memory used don't grow with the campaign.
+        """
+
+        campaign = get_object_or_404(self.get_queryset(), pk=pk)
+        characters = Character.objects.filter(campaign=campaign).order_by(
+            "first_name", "last_name", "id"
+        )
+        monsters = Monster.objects.filter(campaign=campaign).order_by(
+            "first_name", "last_name", "id"
+        )
+        content = json_object_stream(
+            [
+                ("characters", _character_stat_blocks(characters)),
+                ("monsters", stat_blocks(monsters)),
+            ]
+        )
+        return StreamingHttpResponse(content, content_type="application/json")
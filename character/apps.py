@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class CharacterConfig(AppConfig):
     name = 'character'
+
+    def ready(self):
+        from . import reference, stats  # noqa: F401, registers the cached tables and receivers
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+
+from character.models import Character
+
+
+class Command(BaseCommand):
+    help = (
+        "Verify the carried and equipped weight maintained on each character against their "
+        "equipment, and optionally repair any drift."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repair", action="store_true", help="Update characters whose weights drifted."
+        )
+
+    def handle(self, *args, **options):
+        drifted = (
+            Character.objects.with_computed_weight()
+            .filter(
+                ~Q(carried_weight=F("computed_carried_weight"))
+                | ~Q(equipped_weight=F("computed_equipped_weight"))
+            )
+            .order_by("pk")
+        )
+        characters = list(drifted)
+        for character in characters:
+            self.stdout.write(
+                f"{character.pk} {character}: carried {character.carried_weight}, expected "
+                f"{character.computed_carried_weight}; equipped {character.equipped_weight}, "
+                f"expected {character.computed_equipped_weight}"
+            )
+        if not characters:
+            self.stdout.write(self.style.SUCCESS("All carried weights are correct."))
+        elif options["repair"]:
+            # recomputed in SQL, so equipment changed since the check is accounted for too
+            Character.objects.filter(
+                pk__in=[character.pk for character in characters]
+            ).update_carried_weight()
+            self.stdout.write(self.style.SUCCESS(f"Repaired {len(characters)} characters."))
+        else:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{len(characters)} characters drifted, run with --repair to fix them."
+                )
+            )
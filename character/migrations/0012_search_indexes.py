@@ -0,0 +1,26 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# Django's icontains lookup compiles to UPPER("column"::text) LIKE UPPER('%search%'), so the trigram
+# indexes are built on the same expression for Postgres to use them.
+SEARCH_FIELDS = ("first_name", "last_name", "title")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('character', '0011_auto_20210530_1246'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+    ] + [
+        migrations.RunSQL(
+            sql=(
+                f'CREATE INDEX "character_{field}_trgm" ON "character" '
+                f'USING gin (UPPER("{field}"::text) gin_trgm_ops);'
+            ),
+            reverse_sql=f'DROP INDEX "character_{field}_trgm";',
+        )
+        for field in SEARCH_FIELDS
+    ]
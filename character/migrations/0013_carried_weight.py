@@ -0,0 +1,56 @@
+# Generated by Django 3.2 on 2026-10-17 14:50
+
+from django.db import migrations, models
+
+# the same weights as character.models.carried_weight_expression() and equipped_weight_expression(),
+# rounding each piece of adventuring gear like CharacterAdventuringGear.objects.with_weight()
+BACKFILL_WEIGHT = """
+UPDATE "character" SET
+    carried_weight = COALESCE((
+        SELECT SUM(CAST(COALESCE(
+            CASE WHEN g.length > 0 THEN g.weight * cg.length / g.length
+            ELSE g.weight * cg.quantity / NULLIF(g.quantity, 0) END, 0
+        ) AS numeric(8, 2)))
+        FROM character_adventuring_gear cg
+        JOIN adventuring_gear g ON g.id = cg.adventuring_gear_id
+        WHERE cg.character_id = "character".id
+    ), 0) + COALESCE((
+        SELECT SUM(a.weight) FROM character_armor ca JOIN armor a ON a.id = ca.armor_id
+        WHERE ca.character_id = "character".id
+    ), 0) + COALESCE((
+        SELECT SUM(w.weight) FROM character_weapon cw JOIN weapon w ON w.id = cw.weapon_id
+        WHERE cw.character_id = "character".id
+    ), 0) + COALESCE((
+        SELECT SUM(t.weight) FROM character_tools ct JOIN tool t ON t.id = ct.tool_id
+        WHERE ct.character_id = "character".id
+    ), 0),
+    equipped_weight = COALESCE((
+        SELECT SUM(a.weight) FROM character_armor ca JOIN armor a ON a.id = ca.armor_id
+        WHERE ca.character_id = "character".id AND ca.equipped
+    ), 0) + COALESCE((
+        SELECT SUM(w.weight) FROM character_weapon cw JOIN weapon w ON w.id = cw.weapon_id
+        WHERE cw.character_id = "character".id AND cw.equipped
+    ), 0);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('character', '0012_search_indexes'),
+        ('equipment', '0017_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='character',
+            name='carried_weight',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='character',
+            name='equipped_weight',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.RunSQL(BACKFILL_WEIGHT, migrations.RunSQL.noop),
+    ]
@@ -1,13 +1,30 @@
 import uuid
+from collections import defaultdict
+from decimal import Decimal
 
 from django.contrib.postgres.fields import ArrayField
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, OuterRef, Prefetch, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 
 from common import abilities
-from common.helpers import roll
-from common.models import AbilityScoreHealthMixin, CampaignManagementMixin, MoneyMixin
-from equipment.models import Armor, Weapon
+from common.helpers import roll, roll_totals
+from common.models import (
+    AbilityScoreHealthMixin,
+    CampaignManagementMixin,
+    HealthQuerySet,
+    MoneyMixin,
+)
+from equipment.models import (
+    Armor,
+    CharacterAdventuringGear,
+    CharacterArmor,
+    CharacterWeapon,
+    Tool,
+    Weapon,
+)
+from features.models import CharacterFeat
 
 
 class CharacterRace(models.Model):
@@ -72,8 +89,171 @@ class CharacterClass(models.Model):
     def __str__(self):
         return self.name
 
+    def level_features(self, level=None):
+        """
+        Get the class features a member of the class has at a level, or at any level, from the
+        class feature index.
+        """
+
+        from features.reference import class_features
+        return class_features.features(self.pk, level)
+
+
+WEIGHT_FIELD = models.DecimalField(max_digits=10, decimal_places=2)
+MAX_LEVEL = 100
+
+
+def _total_weight(queryset, weight):
+    total = (
+        queryset.filter(character=OuterRef("pk"))
+        .order_by()
+        .values("character")
+        .annotate(total=Sum(weight))
+        .values("total")
+    )
+    return Coalesce(
+        Subquery(total, output_field=WEIGHT_FIELD), Value(Decimal(0)), output_field=WEIGHT_FIELD
+    )
+
+
+def carried_weight_expression():
+    """SQL expression for the total weight of a character's equipment."""
+
+    return (
+        _total_weight(CharacterAdventuringGear.objects.with_weight(), "item_weight")
+        + _total_weight(CharacterArmor.objects.all(), "armor__weight")
+        + _total_weight(CharacterWeapon.objects.all(), "weapon__weight")
+        + _total_weight(Tool.objects.all(), "weight")
+    )
+
+
+def equipped_weight_expression():
+    """SQL expression for the weight of a character's equipped armor and weapons."""
+
+    return (
+        _total_weight(CharacterArmor.objects.filter(equipped=True), "armor__weight")
+        + _total_weight(CharacterWeapon.objects.filter(equipped=True), "weapon__weight")
+    )
+
+
+class CharacterQuerySet(HealthQuerySet):
+    def prefetch_equipment(self):
+        """Prefetch the character's adventuring gear, armor, tools, and weapons."""
+
+        return self.prefetch_related(
+            Prefetch(
+                "characteradventuringgear_set",
+                queryset=CharacterAdventuringGear.objects.select_related(
+                    "adventuring_gear"
+                ).with_weight(),
+            ),
+            Prefetch("characterarmor_set", queryset=CharacterArmor.objects.select_related("armor")),
+            Prefetch(
+                "characterweapon_set", queryset=CharacterWeapon.objects.select_related("weapon")
+            ),
+            "tools",
+        )
+
+    def with_computed_weight(self):
+        """
+        Annotate the weight of the character's equipment as computed_carried_weight and of the
+        equipped armor and weapons as computed_equipped_weight, summed in SQL.
+        """
+
+        return self.annotate(
+            computed_carried_weight=carried_weight_expression(),
+            computed_equipped_weight=equipped_weight_expression(),
+        )
+
+    def update_carried_weight(self):
+        """Recompute the characters' carried_weight and equipped_weight from their equipment."""
+
+        return self.update(
+            carried_weight=carried_weight_expression(),
+            equipped_weight=equipped_weight_expression(),
+        )
+
+    def adjust_carried_weight(self, carried, equipped=0):
+        """Add the weight of picked up (or subtract the weight of dropped) equipment."""
+
+        return self.update(
+            carried_weight=F("carried_weight") + carried,
+            equipped_weight=F("equipped_weight") + equipped,
+        )
+
+    def level_up(self, average_hit_points=False, rng=None):
+        """
+        Level up every character by one level, in one transaction with a fixed number of queries.
+
+        Each character's max HP increases by a roll of their class' hit die, or its fixed average,
+        plus their constitution modifier, at least 1, with current HP kept proportionate like
+        Character.level_up(). The class features up to the new level that the characters don't
+        have yet are granted with a single INSERT. Returns the granted CharacterFeat rows by
+        character id. Raises ValueError, levelling up nobody, if any of the characters are at
+        MAX_LEVEL.
+        """
+
+        from features.reference import class_features
+        from .reference import character_classes
+        from .stats import bump_character_versions
+
+        with transaction.atomic():
+            characters = list(
+                # locked in a consistent order, so concurrent level ups can't deadlock
+                self.select_for_update(of=("self",))
+                .order_by("pk")
+                .values_list("pk", "character_class_id", "level")
+            )
+            if not characters:
+                return {}
+            capped = [str(pk) for pk, _, level in characters if level >= MAX_LEVEL]
+            if capped:
+                raise ValueError(f"Already at the maximum level: {', '.join(capped)}")
+            hit_dice = defaultdict(list)
+            for pk, character_class_id, _ in characters:
+                hit_dice[character_classes.get(character_class_id).hit_die].append(pk)
+            increases = {}
+            for hit_die, pks in hit_dice.items():
+                if average_hit_points:
+                    rolls = [hit_die // 2 + 1] * len(pks)
+                else:
+                    rolls = roll_totals(hit_die, 1, len(pks), rng=rng)
+                increases.update(zip(pks, rolls))
+            updates = self._health_updates(
+                max_hp=increases, add_constitution=True, min_max_hp_increase=1
+            )
+            updates["level"] = F("level") + 1
+            self.model.objects.filter(pk__in=increases)._update_health(updates)
+            bump_character_versions(*increases)
+
+            features = {
+                pk: class_features.features(character_class_id, level + 1)
+                for pk, character_class_id, level in characters
+            }
+            feat_ids = {feature.feat_id for feats in features.values() for feature in feats}
+            owned = set()
+            if feat_ids:
+                owned_feats = CharacterFeat.objects.filter(
+                    character__in=increases, feat__in=feat_ids
+                )
+                owned = set(owned_feats.values_list("character_id", "feat_id"))
+            granted = defaultdict(list)
+            for pk, feats in features.items():
+                for feature in feats:
+                    if (pk, feature.feat_id) not in owned:
+                        owned.add((pk, feature.feat_id))
+                        granted[pk].append(CharacterFeat(character_id=pk, feat_id=feature.feat_id))
+            CharacterFeat.objects.bulk_create(
+                [feat for feats in granted.values() for feat in feats]
+            )
+        return dict(granted)
+
 
 class Character(AbilityScoreHealthMixin, CampaignManagementMixin, MoneyMixin):
+    UNENCUMBERED = "UNENCUMBERED"
+    ENCUMBERED = "ENCUMBERED"
+    HEAVILY_ENCUMBERED = "HEAVILY_ENCUMBERED"
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4)
     title = models.CharField(max_length=30, blank=True)
     first_name = models.CharField(max_length=30)
@@ -82,7 +262,7 @@ class Character(AbilityScoreHealthMixin, CampaignManagementMixin, MoneyMixin):
     race = models.ForeignKey("CharacterRace", on_delete=models.PROTECT)
     character_class = models.ForeignKey("CharacterClass", on_delete=models.PROTECT)
     level = models.PositiveSmallIntegerField(
-        default=1, validators=[MinValueValidator(1), MaxValueValidator(100)]
+        default=1, validators=[MinValueValidator(1), MaxValueValidator(MAX_LEVEL)]
     )
     experience_points = models.PositiveIntegerField(default=0)
     languages = ArrayField(base_field=models.CharField(max_length=20), null=True)
@@ -100,6 +280,11 @@ class Character(AbilityScoreHealthMixin, CampaignManagementMixin, MoneyMixin):
         related_name="character",
     )
     tools = models.ManyToManyField("equipment.Tool", blank=True)
+    # maintained by equipment.signals, see the carried_weight management command to repair drift
+    carried_weight = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    equipped_weight = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+
+    objects = CharacterQuerySet.as_manager()
 
     class Meta:
         db_table = "character"
@@ -115,3 +300,25 @@ class Character(AbilityScoreHealthMixin, CampaignManagementMixin, MoneyMixin):
     def level_up(self, max_hp_increase):
         self.level = self.level + 1
         self.increase_max_hp(max_hp_increase, add_constitution=True)
+
+    def class_features(self):
+        """Get the features of the character's class they have at their level."""
+
+        from features.reference import class_features
+        return class_features.features(self.character_class_id, self.level)
+
+    def carrying_capacity(self):
+        return self.strength * 15
+
+    def encumbrance(self):
+        """
+        Get how encumbered the character is by the weight they carry, using the variant
+        encumbrance rules: encumbered above 5 times and heavily encumbered above 10 times their
+        strength score.
+        """
+
+        if self.carried_weight > self.strength * 10:
+            return self.HEAVILY_ENCUMBERED
+        if self.carried_weight > self.strength * 5:
+            return self.ENCUMBERED
+        return self.UNENCUMBERED
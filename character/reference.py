@@ -0,0 +1,14 @@
+from common.reference import ReferenceTable
+from equipment.models import Armor, Tool, Weapon
+from features.models import CharacterClassFeature, Feat
+from .models import CharacterClass, CharacterRace
+
+# class features are served from features.reference.class_features, the dependency versions the
+# class detail view's ETag
+character_classes = ReferenceTable(
+    CharacterClass.objects.prefetch_related(
+        "armor_proficiencies", "tool_proficiencies", "weapon_proficiencies"
+    ),
+    depends_on=(Armor, Tool, Weapon, CharacterClassFeature, Feat),
+)
+character_races = ReferenceTable(CharacterRace.objects.all())
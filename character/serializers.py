@@ -2,6 +2,7 @@ from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
 from campaign.serializers import CampaignNameSerializer
+from common.serializers import ReferenceNameSerializer
 from .models import CharacterClass, CharacterRace, Character
 from equipment.serializers import (
     ArmorNameSerializer,
@@ -12,7 +13,7 @@ from equipment.serializers import (
     ToolNameSerializer,
     WeaponNameSerializer,
 )
-from features.serializers import ClassFeatureNameSerializer
+from features.serializers import CharacterFeatSerializer, ClassFeatureNameSerializer
 
 
 class CharacterClassListEntrySerializer(serializers.ModelSerializer):
@@ -51,9 +52,7 @@ class CharacterClassSerializer(CharacterClassListEntrySerializer):
     armor_proficiencies = ArmorNameSerializer(many=True, required=False)
     weapon_proficiencies = WeaponNameSerializer(many=True, required=False)
     tool_proficiencies = ToolNameSerializer(many=True, required=False)
-    features = ClassFeatureNameSerializer(
-        source="characterclassfeature_set", many=True, required=False
-    )
+    features = ClassFeatureNameSerializer(source="level_features", many=True, read_only=True)
 
     class Meta:
         model = CharacterClass
@@ -71,7 +70,7 @@ class CharacterClassSerializer(CharacterClassListEntrySerializer):
         ]
 
 
-class CharacterClassNameSerializer(serializers.ModelSerializer):
+class CharacterClassNameSerializer(ReferenceNameSerializer):
     """
     Serialize character class id and name.
     """
@@ -91,7 +90,7 @@ class CharacterRaceSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
-class CharacterRaceNameSerializer(serializers.ModelSerializer):
+class CharacterRaceNameSerializer(ReferenceNameSerializer):
     """
     Serialize character race id and name.
     """
@@ -112,7 +111,15 @@ class CharacterListEntrySerializer(serializers.ModelSerializer):
     class Meta:
         model = Character
         fields = (
-            "id", "title", "first_name", "last_name", "age", "level", "race", "character_class",
+            "id",
+            "title",
+            "first_name",
+            "last_name",
+            "age",
+            "level",
+            "race",
+            "character_class",
+            "carried_weight",
         )
 
 
@@ -137,6 +144,64 @@ class CharacterDetailSerializer(serializers.ModelSerializer):
         exclude = ["adventuring_gear", "armor", "tools", "weapons"]
 
 
+class CharacterFeaturesSerializer(serializers.ModelSerializer):
+    """
+    Serialize the features of a character's class at their level, and their feats.
+    """
+
+    character_class = CharacterClassNameSerializer()
+    class_features = ClassFeatureNameSerializer(many=True, read_only=True)
+    feats = CharacterFeatSerializer(many=True, source="characterfeat_set", read_only=True)
+
+    class Meta:
+        model = Character
+        fields = ["character_class", "level", "class_features", "feats"]
+
+
+class AbilityStatsSerializer(serializers.Serializer):
+    score = serializers.IntegerField()
+    racial_increase = serializers.IntegerField()
+    modifier = serializers.IntegerField()
+    saving_throw = serializers.IntegerField()
+    saving_throw_proficiency = serializers.BooleanField()
+
+
+class AbilitiesStatsSerializer(serializers.Serializer):
+    strength = AbilityStatsSerializer()
+    dexterity = AbilityStatsSerializer()
+    constitution = AbilityStatsSerializer()
+    intelligence = AbilityStatsSerializer()
+    wisdom = AbilityStatsSerializer()
+    charisma = AbilityStatsSerializer()
+
+
+class CharacterStatsSerializer(serializers.Serializer):
+    """
+    Serialize a character's derived stat sheet, see character.stats.
+    """
+
+    id = serializers.UUIDField()
+    level = serializers.IntegerField()
+    proficiency_bonus = serializers.IntegerField()
+    abilities = AbilitiesStatsSerializer()
+    armor_class = serializers.IntegerField()
+    initiative = serializers.IntegerField()
+    speed = serializers.IntegerField()
+    passive_perception = serializers.IntegerField()
+    stealth_disadvantage = serializers.BooleanField()
+
+
+class CharacterStatBlockSerializer(CharacterStatsSerializer):
+    """
+    Serialize a character's stat sheet with their name and HP, e.g. for a campaign's roster.
+    """
+
+    name = serializers.CharField()
+    current_hp = serializers.IntegerField()
+    max_hp = serializers.IntegerField()
+    temporary_hp = serializers.IntegerField()
+
+
 class CharacterEquipmentSerializer(serializers.ModelSerializer):
     """
     Serialize character equipment details.
@@ -147,10 +212,22 @@ class CharacterEquipmentSerializer(serializers.ModelSerializer):
     armor = CharacterArmorSerializer(many=True, source="characterarmor_set")
     tools = CharacterToolSerializer(many=True)
     weapons = CharacterWeaponSerializer(many=True, source="characterweapon_set")
+    total_weight = serializers.DecimalField(
+        source="carried_weight", max_digits=10, decimal_places=2, read_only=True
+    )
+    encumbrance = serializers.CharField(read_only=True)
 
     class Meta:
         model = Character
-        fields = ["adventuring_gear", "armor", "tools", "weapons"]
+        fields = [
+            "adventuring_gear",
+            "armor",
+            "tools",
+            "weapons",
+            "total_weight",
+            "equipped_weight",
+            "encumbrance",
+        ]
 
 
 class CharacterAdjustHealthSerializer(serializers.ModelSerializer):
@@ -179,3 +256,25 @@ class CharacterHealthSerializer(serializers.ModelSerializer):
                     f"The current HP ({current_hp}) may not exceed the maximum HP ({max_hp})."
                 )
         return attrs
+
+
+class CharacterLevelUpSerializer(serializers.Serializer):
+    """
+    Validate a level up of one character or a whole party.
+    """
+
+    characters = serializers.ListField(child=serializers.UUIDField(), min_length=1)
+    average_hit_points = serializers.BooleanField(default=False)
+
+
+class CharacterLevelUpResultSerializer(serializers.Serializer):
+    """
+    Serialize a levelled up character's new level and HP, and the class features granted.
+    """
+
+    id = serializers.UUIDField()
+    level = serializers.IntegerField()
+    current_hp = serializers.IntegerField()
+    max_hp = serializers.IntegerField()
+    temporary_hp = serializers.IntegerField()
+    features = CharacterFeatSerializer(many=True)
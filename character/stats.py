@@ -0,0 +1,219 @@
+"""
+Derived character stats: ability scores with racial increases, modifiers, saving throws, and armor
+class from equipped armor.
+
+A stat sheet is computed in one pass from a single fetch of the character with their equipped
+armor, with the race, class, and armor looked up in the reference cache. Sheets are memoized in
+the cache per character version. A character's version changes when the character or their armor
+is saved or deleted, or they level up. Sheets are also keyed on the versions of the race, class,
+and armor tables, so changing those invalidates every sheet.
+"""
+
+import uuid
+
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.contrib.postgres.fields import ArrayField
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import OuterRef, Subquery, UUIDField
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from common import abilities
+from common.helpers import ability_modifier, proficiency_bonus
+from common.reference import bump_versions, table_version
+from common.streaming import STREAM_CHUNK_SIZE
+from equipment.models import Armor, CharacterArmor
+from equipment.reference import armor as armor_table
+from .models import Character, CharacterClass, CharacterRace
+from .reference import character_classes, character_races
+
+ABILITIES = (
+    ("strength", abilities.STRENGTH),
+    ("dexterity", abilities.DEXTERITY),
+    ("constitution", abilities.CONSTITUTION),
+    ("intelligence", abilities.INTELLIGENCE),
+    ("wisdom", abilities.WISDOM),
+    ("charisma", abilities.CHARISMA),
+)
+UNARMORED_ARMOR_CLASS = 10
+# speed lost wearing heavy armor without its required strength
+HEAVY_ARMOR_SPEED_PENALTY = 10
+
+
+def _version_key(pk):
+    return f"character-version:{pk}"
+
+
+def character_version(pk):
+    """Get the change version of a character, a random token kept in the cache."""
+
+    key = _version_key(pk)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def bump_character_versions(*pks):
+    """
+    Mark characters as changed, invalidating their stat sheets. The versions are bumped again
+    once the current transaction commits, see common.reference.bump_versions().
+
+    Saves and deletes of characters and their armor bump the versions through signals. Changes
+    to a character's level, race, class, or ability scores that skip the signals, like
+    QuerySet.update(), should bump them themselves.
+    """
+
+    bump_versions(*(_version_key(pk) for pk in pks if pk is not None))
+
+
+def armor_class(dexterity_modifier, equipped_armor):
+    """
+    Get the armor class of a character wearing the armor.
+
+    Body armor sets the base AC, adding the dexterity modifier up to the armor's maximum, or none
+    for heavy armor. Without body armor the base AC is 10 plus the dexterity modifier. Shields
+    add their increase.
+    """
+
+    base = UNARMORED_ARMOR_CLASS + dexterity_modifier
+    for armor in equipped_armor:
+        if armor.armor_class:
+            dexterity = 0
+            if armor.armor_type != Armor.HEAVY:
+                dexterity = min(dexterity_modifier, armor.dex_modifier_max)
+            base = max(base, armor.armor_class + dexterity)
+    return base + sum(armor.armor_class_increase for armor in equipped_armor)
+
+
+def compute_stat_sheet(character, race, character_class, equipped_armor):
+    """
+    Compute a character's stat sheet from their values, race, class, and equipped armor.
+
+    `character` is a dictionary of the character's id, level, and ability scores.
+    """
+
+    proficiency = proficiency_bonus(character["level"])
+    saving_throw_proficiencies = set(character_class.saving_throw_proficiencies)
+    scores = {}
+    for field, ability in ABILITIES:
+        increase = getattr(race, f"{field}_increase")
+        score = character[field] + increase
+        modifier = ability_modifier(score)
+        proficient = ability in saving_throw_proficiencies
+        scores[field] = {
+            "score": score,
+            "racial_increase": increase,
+            "modifier": modifier,
+            "saving_throw": modifier + (proficiency if proficient else 0),
+            "saving_throw_proficiency": proficient,
+        }
+
+    speed = race.speed
+    strength = scores["strength"]["score"]
+    if any(armor.strength_requirement > strength for armor in equipped_armor):
+        speed = max(speed - HEAVY_ARMOR_SPEED_PENALTY, 0)
+    dexterity_modifier = scores["dexterity"]["modifier"]
+    return {
+        "id": character["id"],
+        "level": character["level"],
+        "proficiency_bonus": proficiency,
+        "abilities": scores,
+        "armor_class": armor_class(dexterity_modifier, equipped_armor),
+        "initiative": dexterity_modifier,
+        "speed": speed,
+        "passive_perception": 10 + scores["wisdom"]["modifier"],
+        "stealth_disadvantage": any(armor.stealth_disadvantage for armor in equipped_armor),
+    }
+
+
+def _with_equipped_armor(queryset, fields=()):
+    """
+    Get the values a stat sheet is computed from, and of `fields`, with the ids of the equipped
+    armor aggregated.
+    """
+
+    equipped_armor = (
+        CharacterArmor.objects.filter(character=OuterRef("pk"), equipped=True)
+        .order_by()
+        .values("character")
+        .annotate(ids=ArrayAgg("armor_id"))
+        .values("ids")
+    )
+    return queryset.annotate(
+        equipped_armor=Subquery(equipped_armor, output_field=ArrayField(UUIDField()))
+    ).values(
+        "id",
+        "level",
+        "race_id",
+        "character_class_id",
+        "equipped_armor",
+        *(field for field, _ in ABILITIES),
+        *fields,
+    )
+
+
+def _stat_sheet(character):
+    return compute_stat_sheet(
+        character,
+        character_races.get(character["race_id"]),
+        character_classes.get(character["character_class_id"]),
+        [armor_table.get(armor_id) for armor_id in character["equipped_armor"] or ()],
+    )
+
+
+def stat_sheet(pk):
+    """Get a character's stat sheet, computing it if it isn't memoized, or None."""
+
+    try:
+        pk = Character._meta.pk.to_python(pk)
+    except ValidationError:
+        return None
+    # versions are read before the character, and bumped again when a change commits, so a
+    # concurrent change can't be memoized as current
+    key = "stat-sheet:{}:{}:{}".format(
+        pk, character_version(pk), table_version(CharacterRace, CharacterClass, Armor)
+    )
+    sheet = cache.get(key)
+    if sheet is not None:
+        return sheet
+    character = _with_equipped_armor(Character.objects.filter(pk=pk).order_by()).first()
+    if character is None:
+        return None
+    sheet = _stat_sheet(character)
+    cache.set(key, sheet)
+    return sheet
+
+
+def stat_sheets(queryset, fields=(), chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Compute the stat sheets of every character in the queryset, from a single query iterated
+    with a server-side cursor, e.g. to stream a campaign's characters.
+
+    The sheets aren't memoized. Each includes the character's values of `fields` too.
+    """
+
+    rows = _with_equipped_armor(queryset, fields)
+    for character in rows.iterator(chunk_size=chunk_size):
+        yield {**_stat_sheet(character), **{field: character[field] for field in fields}}
+
+
+@receiver(post_save, sender=Character)
+@receiver(post_delete, sender=Character)
+def character_changed(sender, instance, **kwargs):
+    bump_character_versions(instance.pk)
+
+
+@receiver(post_init, sender=CharacterArmor)
+def remember_armor_owner(sender, instance, **kwargs):
+    instance._stats_character_id = instance.character_id
+
+
+@receiver(post_save, sender=CharacterArmor)
+@receiver(post_delete, sender=CharacterArmor)
+def armor_changed(sender, instance, **kwargs):
+    # armor given to another character changes both of their sheets
+    bump_character_versions(*{instance._stats_character_id, instance.character_id})
+    instance._stats_character_id = instance.character_id
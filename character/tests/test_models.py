@@ -1,10 +1,15 @@
+from decimal import Decimal
+from io import StringIO
 from unittest.mock import Mock, patch
 
+from django.core.cache import cache
+from django.core.management import call_command
 from django.db import IntegrityError
 from django.test import TestCase
 
 from character.models import CharacterClass, CharacterRace, Character
 from common.abilities import WISDOM, STRENGTH
+from equipment.models import AdventuringGear, CharacterAdventuringGear, CharacterArmor, Tool
 
 
 class TestCharacterClass(TestCase):
@@ -256,3 +261,113 @@ class TestCharacter(TestCase):
         self.assertEqual(character.temporary_hp, 15)
         character.adjust_temporary_hp(-40)
         self.assertEqual(character.temporary_hp, 0)
+
+
+class TestCarriedWeight(TestCase):
+    fixtures = [
+        "campaign/fixtures/campaign.json",
+        "character/fixtures/character.json",
+        "equipment/fixtures/equipment.json",
+    ]
+
+    def setUp(self):
+        cache.clear()
+        self.character = Character.objects.get(pk="de1ec576-8aa9-4892-bfe5-e6193166a222")
+
+    def assertWeights(self, carried, equipped):
+        self.character.refresh_from_db()
+        self.assertEqual(self.character.carried_weight, Decimal(carried))
+        self.assertEqual(self.character.equipped_weight, Decimal(equipped))
+
+    def test_fixture_weights(self):
+        """Test that weights are maintained while fixtures are loaded."""
+
+        self.assertWeights("45.50", "2.00")
+        output = StringIO()
+        call_command("carried_weight", stdout=output)
+        self.assertIn("All carried weights are correct.", output.getvalue())
+
+    def test_armor_weight(self):
+        shield = "16070d4b-f8d1-4f58-adcc-9feb1644abd0"  # 5.00
+        character_armor = CharacterArmor.objects.create(
+            character=self.character, armor_id=shield, equipped=True
+        )
+        self.assertWeights("50.50", "7.00")
+
+        character_armor = CharacterArmor.objects.get(pk=character_armor.pk)
+        character_armor.equipped = False
+        with self.assertNumQueries(2):
+            # the armor's weight comes from the reference cache, leaving the two updates
+            character_armor.save()
+        self.assertWeights("50.50", "2.00")
+
+        character_armor.delete()
+        self.assertWeights("45.50", "2.00")
+
+    def test_adventuring_gear_weight(self):
+        rope = CharacterAdventuringGear.objects.get(
+            character=self.character, adventuring_gear__name="Rope - Hempen"
+        )
+        rope.length = 25  # half of a 10.00 coil of 50
+        rope.save()
+        self.assertWeights("38.50", "2.00")
+
+        rope.character_id = "8edc2380-fb63-4773-b059-1d7be818e6bd"  # Glod
+        rope.save()
+        self.assertWeights("33.50", "2.00")
+        glod = Character.objects.get(pk=rope.character_id)
+        self.assertEqual(glod.carried_weight, Decimal("42.50"))
+
+    def test_adventuring_gear_weight_rounding(self):
+        """Test that gear weighing half a hundredth is rounded up like the recomputed weight."""
+
+        gear = AdventuringGear.objects.create(
+            name="Caltrops (sack)", weight=Decimal("0.05"), description="Test", quantity=2
+        )
+        CharacterAdventuringGear.objects.create(
+            character=self.character, adventuring_gear=gear, quantity=1
+        )
+        self.assertWeights("45.53", "2.00")
+        output = StringIO()
+        call_command("carried_weight", stdout=output)
+        self.assertIn("All carried weights are correct.", output.getvalue())
+
+    def test_tool_weight(self):
+        bagpipes = Tool.objects.get(name="Bagpipes")  # 6.00
+        self.character.tools.add(bagpipes)
+        self.assertWeights("51.50", "2.00")
+
+        self.character.tools.remove(bagpipes, Tool.objects.get(name="Alchemist's Supplies"))
+        self.assertWeights("45.50", "2.00")
+
+        self.character.tools.clear()
+        self.assertWeights("35.50", "2.00")
+
+        bagpipes.character_set.add(self.character)
+        self.assertWeights("41.50", "2.00")
+
+    def test_item_weight_change(self):
+        tool = Tool.objects.get(name="Thieves' Tools")
+        tool.weight = Decimal("3.00")
+        tool.save()
+        self.assertWeights("47.50", "2.00")
+
+    def test_repair_drift(self):
+        Character.objects.filter(pk=self.character.pk).update(carried_weight=0)
+        output = StringIO()
+        call_command("carried_weight", stdout=output)
+        self.assertIn("1 characters drifted", output.getvalue())
+        self.assertWeights("0.00", "2.00")
+
+        call_command("carried_weight", "--repair", stdout=output)
+        self.assertIn("Repaired 1 characters.", output.getvalue())
+        self.assertWeights("45.50", "2.00")
+
+    def test_encumbrance(self):
+        character = Character(strength=5, carried_weight=25)
+        self.assertEqual(character.carrying_capacity(), 75)
+        self.assertEqual(character.encumbrance(), Character.UNENCUMBERED)
+        character.carried_weight = Decimal("25.01")
+        self.assertEqual(character.encumbrance(), Character.ENCUMBERED)
+        character.carried_weight = 51
+        self.assertEqual(character.encumbrance(), Character.HEAVILY_ENCUMBERED)
@@ -0,0 +1,124 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from rest_framework.status import HTTP_200_OK, HTTP_404_NOT_FOUND
+
+from equipment.models import Armor, CharacterArmor
+from ..models import Character, CharacterClass, CharacterRace
+from common.reference import table_version
+from ..stats import armor_class, character_version, compute_stat_sheet
+
+LEATHER = Armor(armor_type=Armor.LIGHT, armor_class=11, dex_modifier_max=10)
+HIDE = Armor(armor_type=Armor.MEDIUM, armor_class=12, dex_modifier_max=2)
+CHAIN_MAIL = Armor(
+    armor_type=Armor.HEAVY, armor_class=16, strength_requirement=13, stealth_disadvantage=True
+)
+SHIELD = Armor(armor_type=Armor.SHIELD, armor_class=0, armor_class_increase=2)
+
+
+class TestStatSheet(SimpleTestCase):
+    def test_armor_class(self):
+        self.assertEqual(armor_class(3, []), 13)
+        self.assertEqual(armor_class(3, [LEATHER]), 14)
+        # medium armor caps the dexterity modifier, heavy armor ignores it
+        self.assertEqual(armor_class(3, [HIDE]), 14)
+        self.assertEqual(armor_class(-1, [HIDE]), 11)
+        self.assertEqual(armor_class(-1, [CHAIN_MAIL]), 16)
+        self.assertEqual(armor_class(3, [SHIELD]), 15)
+        self.assertEqual(armor_class(1, [LEATHER, CHAIN_MAIL, SHIELD]), 18)
+
+    def test_compute_stat_sheet(self):
+        dwarf = CharacterRace(speed=25, strength_increase=2, constitution_increase=1)
+        fighter = CharacterClass(saving_throw_proficiencies=["CONSTITUTION", "STRENGTH"])
+        character = {
+            "id": 1,
+            "level": 5,
+            "strength": 10,
+            "dexterity": 13,
+            "constitution": 13,
+            "intelligence": 8,
+            "wisdom": 12,
+            "charisma": 9,
+        }
+        sheet = compute_stat_sheet(character, dwarf, fighter, [CHAIN_MAIL, SHIELD])
+        self.assertEqual(sheet["proficiency_bonus"], 3)
+        self.assertEqual(
+            sheet["abilities"]["strength"],
+            {
+                "score": 12,
+                "racial_increase": 2,
+                "modifier": 1,
+                "saving_throw": 4,
+                "saving_throw_proficiency": True,
+            },
+        )
+        self.assertEqual(sheet["abilities"]["constitution"]["saving_throw"], 5)
+        self.assertEqual(sheet["abilities"]["dexterity"]["saving_throw"], 1)
+        self.assertEqual(sheet["abilities"]["intelligence"]["modifier"], -1)
+        self.assertEqual(sheet["armor_class"], 18)
+        self.assertEqual(sheet["initiative"], 1)
+        # 12 strength doesn't meet the chain mail's requirement
+        self.assertEqual(sheet["speed"], 15)
+        self.assertEqual(sheet["passive_perception"], 11)
+        self.assertTrue(sheet["stealth_disadvantage"])
+
+
+class TestStatSheetView(TestCase):
+    fixtures = [
+        "campaign/fixtures/campaign.json",
+        "character/fixtures/character.json",
+        "equipment/fixtures/equipment.json",
+    ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_character_stats_get(self):
+        """
+        Test that a character's stat sheet is memoized until the character or their armor
+        changes, and computed from a single query.
+        """
+
+        pk = "8edc2380-fb63-4773-b059-1d7be818e6bd"  # Glod, a dwarven bard in leather armor
+        url = f"/api/character/{pk}/stats/"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(response.data["abilities"]["strength"]["score"], 14)
+        self.assertEqual(response.data["abilities"]["dexterity"]["saving_throw"], 4)
+        self.assertEqual(response.data["armor_class"], 13)
+        self.assertEqual(response.data["speed"], 25)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+        CharacterArmor.objects.create(
+            character_id=pk, armor=Armor.objects.get(name="Shield"), equipped=True
+        )
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.data["armor_class"], 15)
+
+        character = Character.objects.get(pk=pk)
+        character.level = 5
+        character.save()
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.data["proficiency_bonus"], 3)
+        self.assertEqual(response.data["abilities"]["charisma"]["saving_throw"], 5)
+
+    def test_versions_bumped_on_commit(self):
+        """
+        Test that changes bump the versions again once committed, so stat sheets memoized from the
+        old rows before the commit aren't current.
+        """
+
+        pk = "8edc2380-fb63-4773-b059-1d7be818e6bd"
+        with self.captureOnCommitCallbacks(execute=True):
+            Character.objects.get(pk=pk).save()
+            CharacterRace.objects.first().save()
+            versions = (character_version(pk), table_version(CharacterRace))
+        self.assertNotEqual(character_version(pk), versions[0])
+        self.assertNotEqual(table_version(CharacterRace), versions[1])
+
+    def test_character_stats_get_404(self):
+        for pk in ("65083c70-8adb-42d2-9024-3890cdf03841", "not-a-uuid"):
+            response = self.client.get(f"/api/character/{pk}/stats/")
+            self.assertEqual(response.status_code, HTTP_404_NOT_FOUND)
@@ -1,19 +1,26 @@
-from unittest.mock import patch
+import json
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlencode
 
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, TransactionTestCase
 from rest_framework.status import (
     HTTP_200_OK,
     HTTP_201_CREATED,
     HTTP_204_NO_CONTENT,
+    HTTP_304_NOT_MODIFIED,
     HTTP_400_BAD_REQUEST,
     HTTP_404_NOT_FOUND,
 )
 
 from campaign.models import Campaign
-from character.models import CharacterClass, CharacterRace, Character
+from character.models import CharacterClass, CharacterRace, Character, MAX_LEVEL
+from character.reference import character_classes
 from character.views import CharacterClassListView, CharacterRaceListView, CharacterListView
 from common.helpers import result_values_for_field
+from features.models import CharacterFeat, Feat
+from features.reference import class_features
 
 
 class TestCharacterViews(TestCase):
@@ -55,6 +62,9 @@ class TestCharacterViews(TestCase):
             "languages": ["Common", "Elvish"],
         }
 
+    def setUp(self):
+        cache.clear()
+
     def create_character(self, data: dict = None):
         data = data or {}
         character_data = {
@@ -186,6 +196,10 @@ class TestCharacterViews(TestCase):
     def test_character_class_get(self):
         """
         Test that retrieving a character class works.
+
+        Character classes are served from the reference cache. Loading the cache takes a query
+        for the classes and one for each of the prefetched proficiencies, and the class feature
+        index takes one more.
         """
 
         pk = "ea023174-5774-4bba-ad10-8d4bcd8483b9"  # Bard
@@ -201,8 +215,7 @@ class TestCharacterViews(TestCase):
 
         pk = "a65632b2-17d0-43d1-9ba9-61ee9b68e744"  # Barbarian
         url = f"/api/character/class/{pk}/"
-        with self.assertNumQueries(7):
-            # Prefetch on feature is not working yet, so there's a extra query per feature.
+        with self.assertNumQueries(0):
             response = self.client.get(url)
             self.assertEqual(response.data["name"], "Barbarian")
             self.assertEqual(response.data["hit_die"], 12)
@@ -211,6 +224,13 @@ class TestCharacterViews(TestCase):
             self.assertEqual(len(response.data["weapon_proficiencies"]), 5)
             self.assertEqual(len(response.data["features"]), 2)
 
+    def test_character_class_get_404(self):
+        """Test that 404 is returned if the character class does not exist."""
+
+        for pk in ("65083c70-8adb-42d2-9024-3890cdf03841", "not-a-uuid"):
+            response = self.client.get(f"/api/character/class/{pk}/")
+            self.assertEqual(response.status_code, HTTP_404_NOT_FOUND)
+
     def test_character_race_list_pagination(self):
         url = "/api/character/race/list/"
         page_size = 2
@@ -263,7 +283,7 @@ class TestCharacterViews(TestCase):
 
         pk = "3d1b90d2-4a2f-4556-98b0-8a3c851944a6"  # Elf
         url = f"/api/character/race/{pk}/"
-        with self.assertNumQueries(1):
+        with self.assertNumQueries(0):
             response = self.client.get(url)
             self.assertEqual(response.data["name"], "Elf")
             self.assertEqual(response.data["description"], "Tall-ish folk with pointy ears.")
@@ -273,6 +293,32 @@ class TestCharacterViews(TestCase):
             self.assertEqual(response.data["constitution_increase"], 0)
             self.assertEqual(response.data["languages"], ["English", "Elvish"])
 
+        # Changing a race reloads the cached races.
+        self.elf.speed = 35
+        self.elf.save()
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+            self.assertEqual(response.data["speed"], 35)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+            self.assertEqual(response.data["speed"], 35)
+
+    def test_character_race_get_not_modified(self):
+        """Test that a race request matching the ETag gets a 304 response."""
+
+        pk = "50d6fd1c-052e-4ed6-8473-ec55a4920770"  # Dwarf
+        url = f"/api/character/race/{pk}/"
+        response = self.client.get(url)
+        etag = response["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, HTTP_304_NOT_MODIFIED)
+
+        self.elf.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
     def test_character_list_pagination(self):
         url = "/api/character/list/"
         page_size = 2
@@ -332,6 +378,29 @@ class TestCharacterViews(TestCase):
         default_ordering_field = CharacterListView.ordering[0]
         self.ordering_tester(url, ordering_fields, default_ordering_field)
 
+    def test_character_list_export(self):
+        """
+        Test that the character list can be streamed, unpaginated, with search and ordering.
+        """
+
+        url = "/api/character/list/"
+        response = self.client.get(url, {"export": "json", "search": "ter", "page_size": 1})
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/json")
+        results = json.loads(b"".join(response.streaming_content))
+        self.assertEqual([r["first_name"] for r in results], ["Gerold", "Stevey"])
+        self.assertEqual(results[1]["character_class"]["name"], "Fighter")
+
+        response = self.client.get(url, {"export": "ndjson", "ordering": "-level"})
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            [json.loads(line)["first_name"] for line in lines], ["Stevey", "Glod", "Gerold"]
+        )
+
+        response = self.client.get(url, {"export": "xml"})
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+
     def test_character_get(self):
         """
         Test that retrieving a character works.
@@ -339,6 +408,7 @@ class TestCharacterViews(TestCase):
 
         pk = "de1ec576-8aa9-4892-bfe5-e6193166a222"  # mister Gerold
         url = f"{self.base_url}{pk}/"
+        self.client.get(url)  # load the race and class names into the reference cache
         with self.assertNumQueries(2):
             response = self.client.get(url)
             self.assertEqual(response.data["title"], "mister")
@@ -412,6 +482,165 @@ class TestCharacterViews(TestCase):
             response = self.client.delete(url)
             self.assertEqual(response.status_code, HTTP_404_NOT_FOUND)
 
+    def test_character_equipment_get(self):
+        """
+        Test that a character's equipment and weights are loaded in a constant number of queries.
+
+        Expect the character, with its maintained total weight, and a query for each of the
+        adventuring gear, armor, weapons, and tools.
+        """
+
+        pk = "de1ec576-8aa9-4892-bfe5-e6193166a222"  # mister Gerold
+        url = f"{self.base_url}{pk}/equipment/"
+        with self.assertNumQueries(5):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, HTTP_200_OK)
+        gear_weights = {item["name"]: item["weight"] for item in response.data["adventuring_gear"]}
+        self.assertEqual(
+            gear_weights,
+            {"Ink Pen": "0.00", "Backpack": "5.50", "Rope - Hempen": "12.00", "Bedroll": "7.00"},
+        )
+        self.assertEqual([item["weight"] for item in response.data["armor"]], ["9.00"])
+        self.assertEqual(response.data["weapons"][0]["name"], "Longbow")
+        self.assertEqual(response.data["weapons"][0]["weight"], "2.00")
+        self.assertEqual(
+            sorted(item["weight"] for item in response.data["tools"]), ["1.00", "9.00"]
+        )
+        self.assertEqual(response.data["total_weight"], "45.50")
+        self.assertEqual(response.data["equipped_weight"], "2.00")
+        self.assertEqual(response.data["encumbrance"], "ENCUMBERED")  # strength 9
+
+    def test_character_equipment_get_no_equipment(self):
+        character, character_data = self.create_character()
+        url = f"{self.base_url}{character.id}/equipment/"
+        with self.assertNumQueries(5):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(response.data["adventuring_gear"], [])
+        self.assertEqual(response.data["total_weight"], "0.00")
+        character.delete()
+
+    def test_character_features_get(self):
+        """
+        Test that a character's class features at their level, and their feats, are loaded
+        without a query per feature.
+
+        Once the reference caches are loaded, expect the character and their feats.
+        """
+
+        pk = "de1ec576-8aa9-4892-bfe5-e6193166a222"  # mister Gerold, level 1
+        barbarian = CharacterClass.objects.get(name="Barbarian")
+        Character.objects.filter(pk=pk).update(character_class=barbarian)
+        CharacterFeat.objects.create(character_id=pk, feat=Feat.objects.get(name="Durable"))
+        url = f"{self.base_url}{pk}/features/"
+        self.client.get(url)
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(response.data["character_class"]["name"], "Barbarian")
+        self.assertEqual(
+            [feature["name"] for feature in response.data["class_features"]],
+            ["Unarmored Defense"],
+        )
+        self.assertEqual([feat["feat"]["name"] for feat in response.data["feats"]], ["Durable"])
+
+        Character.objects.filter(pk=pk).update(level=5)
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(
+            [(feature["name"], feature["level"]) for feature in response.data["class_features"]],
+            [("Unarmored Defense", 1), ("Reckless Attack", 2)],
+        )
+
+    def test_character_level_up(self):
+        """
+        Test that a party levels up in a fixed number of queries, gaining their class' hit die
+        average plus their constitution modifier in max HP, and the missing class features.
+
+        Once the reference caches are loaded, expect the locked characters, a single UPDATE, the
+        owned feats, a single INSERT, and the levelled up characters, in two savepoints.
+        """
+
+        glod = "8edc2380-fb63-4773-b059-1d7be818e6bd"  # bard, constitution 11
+        stevey = "baf70d99-4743-4d85-96f7-4c9c9614331b"  # fighter, constitution 14
+        gerold = "de1ec576-8aa9-4892-bfe5-e6193166a222"  # level 1, constitution 10
+        barbarian = CharacterClass.objects.get(name="Barbarian")
+        Character.objects.filter(pk=gerold).update(character_class=barbarian)
+        CharacterFeat.objects.create(
+            character_id=gerold, feat=Feat.objects.get(name="Unarmored Defense")
+        )
+        character_classes.all()
+        class_features.classes()
+
+        url = f"{self.base_url}level-up/"
+        data = {"characters": [glod, stevey, gerold], "average_hit_points": True}
+        with self.assertNumQueries(9):
+            response = self.client.post(url, data=data, content_type="application/json")
+            self.assertEqual(response.status_code, HTTP_200_OK)
+        characters = {character.pop("id"): character for character in response.data}
+        self.assertEqual(
+            characters[glod],
+            {"level": 3, "current_hp": 20, "max_hp": 20, "temporary_hp": 0, "features": []},
+        )
+        # current HP stays proportionate to max HP
+        self.assertEqual(
+            characters[stevey],
+            {"level": 4, "current_hp": 24, "max_hp": 42, "temporary_hp": 0, "features": []},
+        )
+        self.assertEqual(characters[gerold]["level"], 2)
+        self.assertEqual(characters[gerold]["max_hp"], 15)
+        self.assertEqual(characters[gerold]["current_hp"], 12)
+        self.assertEqual(
+            [feat["feat"]["name"] for feat in characters[gerold]["features"]],
+            ["Reckless Attack"],
+        )
+        feats = Feat.objects.filter(characterfeat__character=gerold)
+        self.assertEqual(
+            set(feats.values_list("name", flat=True)), {"Unarmored Defense", "Reckless Attack"}
+        )
+
+        # rolled hit points, nothing new to grant
+        data = {"characters": [gerold]}
+        response = self.client.post(url, data=data, content_type="application/json")
+        self.assertEqual(response.data[0]["level"], 3)
+        self.assertIn(response.data[0]["max_hp"], range(16, 28))
+        self.assertEqual(response.data[0]["features"], [])
+        self.assertEqual(CharacterFeat.objects.filter(character=gerold).count(), 2)
+
+    def test_character_level_up_not_found(self):
+        """Test that nobody levels up if any of the characters don't exist."""
+
+        glod = "8edc2380-fb63-4773-b059-1d7be818e6bd"
+        data = {"characters": [glod, "65083c70-8adb-42d2-9024-3890cdf03841"]}
+        response = self.client.post(
+            f"{self.base_url}level-up/", data=data, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, HTTP_404_NOT_FOUND)
+        self.assertEqual(Character.objects.get(pk=glod).level, 2)
+
+    def test_character_level_up_limits(self):
+        """
+        Test that levelling up gains at least 1 max HP, and that nobody levels up if any of the
+        characters are at the maximum level.
+        """
+
+        glod = "8edc2380-fb63-4773-b059-1d7be818e6bd"  # bard, level 2, 15 max HP
+        gerold = "de1ec576-8aa9-4892-bfe5-e6193166a222"  # ranger, 8 max HP
+        url = f"{self.base_url}level-up/"
+        # a -5 constitution modifier outweighs the hit die average
+        Character.objects.filter(pk=glod).update(constitution=1)
+        data = {"characters": [glod], "average_hit_points": True}
+        response = self.client.post(url, data=data, content_type="application/json")
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(response.data[0]["max_hp"], 16)
+
+        Character.objects.filter(pk=gerold).update(level=MAX_LEVEL)
+        data = {"characters": [glod, gerold]}
+        response = self.client.post(url, data=data, content_type="application/json")
+        self.assertEqual(response.status_code, HTTP_400_BAD_REQUEST)
+        self.assertEqual(Character.objects.get(pk=glod).level, 3)
+        self.assertEqual(Character.objects.get(pk=gerold).level, MAX_LEVEL)
+
     def test_character_health_get(self):
         pk = "de1ec576-8aa9-4892-bfe5-e6193166a222"  # mister Gerold
         url = f"{self.base_url}{pk}/hit-points/"
@@ -526,53 +755,66 @@ class TestCharacterViews(TestCase):
             )
         character.delete()
 
-    @patch("character.models.Character.adjust_temporary_hp")
-    @patch("character.models.Character.heal")
-    @patch("character.models.Character.increase_max_hp")
-    def test_character_health_adjust(self, mock_max_hp, mock_heal, mock_temporary_hp):
+    def test_character_health_adjust(self):
         character, character_data = self.create_character()
         url = f"{self.base_url}{character.id}/hit-points/"
 
-        data = {"current_hp": 2}
-        with self.assertNumQueries(2):
-            response = self.client.post(url, data=data, content_type="application/json")
-            self.assertEqual(response.status_code, HTTP_200_OK)
-        mock_heal.assert_called_with(2)
-        mock_temporary_hp.assert_not_called()
-        mock_max_hp.assert_not_called()
+        def adjust(data, expected):
+            # get the character and adjust its HP with a single UPDATE in a savepoint
+            with self.assertNumQueries(5):
+                response = self.client.post(url, data=data, content_type="application/json")
+                self.assertEqual(response.status_code, HTTP_200_OK)
+            health = (
+                response.data["current_hp"],
+                response.data["max_hp"],
+                response.data["temporary_hp"],
+            )
+            self.assertEqual(health, expected)
+            character.refresh_from_db()
+            self.assertEqual(
+                (character.current_hp, character.max_hp, character.temporary_hp), expected
+            )
 
-        mock_heal.reset_mock()
-        mock_temporary_hp.reset_mock()
-        mock_max_hp.reset_mock()
+        adjust({"current_hp": 2}, (30, 35, 0))
+        adjust({"max_hp": 5}, (35, 40, 0))  # ceil(30 * 40 / 35)
+        # +1 constitution modifier
+        adjust({"add_constitution_to_max_hp": True, "temporary_hp": 4}, (36, 41, 4))
+        adjust({"max_hp": -3, "add_constitution_to_max_hp": True}, (35, 39, 4))
+        adjust({"current_hp": -50, "temporary_hp": -10}, (0, 39, 0))
 
-        data = {"max_hp": 5}
-        with self.assertNumQueries(2):
-            response = self.client.post(url, data=data, content_type="application/json")
+        with self.assertNumQueries(1):
+            response = self.client.post(url, data={}, content_type="application/json")
             self.assertEqual(response.status_code, HTTP_200_OK)
-        mock_max_hp.assert_called_with(5, add_constitution=False)
-        mock_heal.assert_not_called()
-        mock_temporary_hp.assert_not_called()
+        self.assertEqual(response.data["current_hp"], 0)
 
-        mock_heal.reset_mock()
-        mock_temporary_hp.reset_mock()
-        mock_max_hp.reset_mock()
 
-        data = {"add_constitution_to_max_hp": True, "temporary_hp": 4}
-        with self.assertNumQueries(2):
-            response = self.client.post(url, data=data, content_type="application/json")
-            self.assertEqual(response.status_code, HTTP_200_OK)
-        mock_max_hp.assert_called_with(0, add_constitution=True)
-        mock_temporary_hp.assert_called_with(4)
-        mock_heal.assert_not_called()
+class TestCharacterHealthConcurrency(TransactionTestCase):
+    fixtures = [
+        "campaign/fixtures/campaign.json",
+        "character/fixtures/character.json",
+        "equipment/fixtures/equipment.json",
+    ]
 
-        mock_heal.reset_mock()
-        mock_temporary_hp.reset_mock()
-        mock_max_hp.reset_mock()
+    def test_concurrent_damage(self):
+        """Parallel HP adjustments to the same character are all applied."""
 
-        data = {"max_hp": -3, "add_constitution_to_max_hp": True}
-        with self.assertNumQueries(2):
-            response = self.client.post(url, data=data, content_type="application/json")
-            self.assertEqual(response.status_code, HTTP_200_OK)
-        mock_max_hp.assert_called_with(-3, add_constitution=True)
-        mock_heal.assert_not_called()
-        mock_temporary_hp.assert_not_called()
+        character = Character.objects.get(first_name="Glod")
+        Character.objects.filter(pk=character.pk).update(max_hp=500, current_hp=500)
+        url = f"/api/character/{character.id}/hit-points/"
+
+        def hit(hp):
+            try:
+                response = Client().post(
+                    url, data={"current_hp": -hp}, content_type="application/json"
+                )
+                return response.status_code
+            finally:
+                connection.close()
+
+        damage = [1, 2, 3] * 100
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            status_codes = list(executor.map(hit, damage))
+
+        self.assertEqual(status_codes, [HTTP_200_OK] * len(damage))
+        character.refresh_from_db()
+        self.assertEqual(character.current_hp, 500 - sum(damage))
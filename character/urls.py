@@ -5,10 +5,13 @@ from .views import (
     CharacterClassListView,
     CharacterClassView,
     CharacterEquipmentView,
+    CharacterFeaturesView,
     CharacterHealthView,
+    CharacterLevelUpView,
     CharacterListView,
     CharacterRaceListView,
     CharacterRaceView,
+    CharacterStatsView,
     CharacterView,
 )
 
@@ -20,7 +23,10 @@ urlpatterns = [
     path('race/<str:pk>/', CharacterRaceView.as_view(), name="character_race_detail"),
     path('list/', CharacterListView.as_view(), name="character_list"),
     path('', CharacterAddView.as_view(), name="character"),
+    path('level-up/', CharacterLevelUpView.as_view(), name="character_level_up"),
     path('<str:pk>/', CharacterView.as_view(), name="character_detail"),
     path('<str:pk>/equipment/', CharacterEquipmentView.as_view(), name="character_equipment"),
+    path('<str:pk>/features/', CharacterFeaturesView.as_view(), name="character_features"),
+    path('<str:pk>/stats/', CharacterStatsView.as_view(), name="character_stats"),
     path('<str:pk>/hit-points/', CharacterHealthView.as_view(), name="character_hit_points"),
 ]
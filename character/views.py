@@ -1,10 +1,12 @@
+from django.db import transaction
+from django.http import Http404
 from drf_spectacular.utils import extend_schema
 from rest_framework import filters
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.generics import (
     CreateAPIView,
     GenericAPIView,
     get_object_or_404,
-    ListAPIView,
     RetrieveAPIView,
     RetrieveDestroyAPIView,
     RetrieveUpdateAPIView,
@@ -13,6 +15,8 @@ from rest_framework.pagination import PageNumberPagination
 from rest_framework.request import Request
 from rest_framework.response import Response
 
+from common.counting import CachedCount, EstimatedCount
+from common.models import HEALTH_FIELDS
 from common.pagination import Pagination
 from .models import CharacterClass, CharacterRace, Character
 from .serializers import (
@@ -22,14 +26,19 @@ from .serializers import (
     CharacterClassSerializer,
     CharacterDetailSerializer,
     CharacterEquipmentSerializer,
+    CharacterFeaturesSerializer,
     CharacterHealthSerializer,
+    CharacterLevelUpResultSerializer,
+    CharacterLevelUpSerializer,
     CharacterListEntrySerializer,
     CharacterRaceSerializer,
+    CharacterStatsSerializer,
 )
-from common.views import ManagedListView
+from common.views import ManagedListView, ReferenceRetrieveAPIView, StreamingListAPIView
+from .stats import stat_sheet
 
 
-class CharacterClassListView(ListAPIView):
+class CharacterClassListView(StreamingListAPIView):
     """
     Paginated character class list view with search, and sorting capability.
     """
@@ -43,18 +52,16 @@ class CharacterClassListView(ListAPIView):
     serializer_class = CharacterClassListEntrySerializer
 
 
-class CharacterClassView(RetrieveAPIView):
+class CharacterClassView(ReferenceRetrieveAPIView):
     """
     Get a character class' details.
     """
 
-    queryset = CharacterClass.objects.all().prefetch_related(
-        "armor_proficiencies", "tool_proficiencies", "weapon_proficiencies",
-    )  # TODO reduce queries on feat
+    queryset = CharacterClass.objects.all()
     serializer_class = CharacterClassSerializer
 
 
-class CharacterRaceListView(ListAPIView):
+class CharacterRaceListView(StreamingListAPIView):
     """
     Paginated character class list view with filter, search, and sorting capability.
     """
@@ -77,7 +84,7 @@ class CharacterRaceListView(ListAPIView):
     serializer_class = CharacterRaceSerializer
 
 
-class CharacterRaceView(RetrieveAPIView):
+class CharacterRaceView(ReferenceRetrieveAPIView):
     """
     Get a character race's details.
     """
@@ -86,18 +93,26 @@ class CharacterRaceView(RetrieveAPIView):
     serializer_class = CharacterRaceSerializer
 
 
-class CharacterListView(ListAPIView):
+class CharacterListView(StreamingListAPIView):
     """
     Paginated character class list view with filter, search, and sorting capability.
     """
 
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     ordering_fields = (
-        "first_name", "last_name", "title", "age", "level", "race__name", "character_class__name"
+        "first_name",
+        "last_name",
+        "title",
+        "age",
+        "level",
+        "race__name",
+        "character_class__name",
+        "carried_weight",
     )
     ordering = ["first_name", "last_name", "id"]
+    count_strategy = CachedCount(EstimatedCount())
     pagination_class = Pagination
-    queryset = Character.objects.all().prefetch_related("race", "character_class")
+    queryset = Character.objects.all()
     search_fields = (
         "first_name", "last_name", "title", "race__name", "character_class__name",
     )
@@ -114,7 +129,7 @@ class CharacterAddView(CreateAPIView):
 class CharacterView(RetrieveDestroyAPIView):
     """Manage a character's details."""
 
-    queryset = Character.objects.all().select_related("race", "character_class", "campaign")
+    queryset = Character.objects.all().select_related("campaign")
     serializer_class = CharacterDetailSerializer
 
 
@@ -123,35 +138,52 @@ class CharacterEquipmentView(GenericAPIView):
     Manage equipment assigned to a character.
     """
 
-    queryset = Character.objects.prefetch_related("tools")
-    # TODO Get this prefetch working to reduce queries
-    # For some reason Django isn't using the prefetched data.
-    # queryset = Character.objects.prefetch_related(
-    #     "tools",
-    #     Prefetch(
-    #         "adventuring_gear",
-    #         queryset=CharacterAdventuringGear.objects.select_related("adventuring_gear")
-    #     ),
-    #     Prefetch("armor", queryset=CharacterArmor.objects.select_related("armor")),
-    #     Prefetch("weapons", queryset=CharacterWeapon.objects.select_related("weapon")),
-    # )
+    queryset = Character.objects.prefetch_equipment()
     serializer_class = CharacterEquipmentSerializer
 
     def get(self, request: Request, pk):
         """
-        Get equipment assigned to a character and the sum of their weights.
+        Get equipment assigned to a character, the sum of their weights, and the character's
+        encumbrance.
         """
 
         instance = get_object_or_404(self.queryset, pk=pk)
         serializer = self.get_serializer(instance)
-        response_data = serializer.data
+        return Response(serializer.data)
+
+
+class CharacterFeaturesView(RetrieveAPIView):
+    """
+    Get the features a character has from their class at their level, and their feats.
+
+    Class features come from the class feature index and feats from the reference cache, see
+    features.reference.
+    """
+
+    queryset = Character.objects.prefetch_related("characterfeat_set")
+    serializer_class = CharacterFeaturesSerializer
+
+
+class CharacterStatsView(GenericAPIView):
+    """
+    Get a character's derived stats.
+    """
+
+    serializer_class = CharacterStatsSerializer
+
+    def get(self, request: Request, pk):
+        """
+        Get the character's ability scores with racial increases, modifiers, saving throws, armor
+        class from their equipped armor, initiative, speed, and passive perception.
 
-        weight = 0
-        for equipment, items in response_data.items():
-            # assuming the serializer includes only lists of weighted items
-            weight += sum(float(item["weight"]) for item in items)
-        response_data["total_weight"] = f"{weight:.2f}"
-        return Response(response_data)
+        The stat sheet is memoized until the character, their armor, or the race, class, and armor
+        tables change, see character.stats.
+        """
+
+        sheet = stat_sheet(pk)
+        if sheet is None:
+            raise Http404
+        return Response(self.get_serializer(sheet).data)
 
 
 class CharacterHealthView(RetrieveUpdateAPIView):
@@ -173,23 +205,55 @@ class CharacterHealthView(RetrieveUpdateAPIView):
         serializer.is_valid(raise_exception=True)
         request_data = serializer.validated_data
         character = self.get_object()
-
-        update_fields = []
-        heal_amount = request_data["current_hp"]
-        if heal_amount:
-            character.heal(heal_amount)
-            update_fields.append("current_hp")
-        max_hp_adjustment = request_data["max_hp"]
-        add_constitution = request_data["add_constitution_to_max_hp"]
-        if max_hp_adjustment or add_constitution:
-            character.increase_max_hp(max_hp_adjustment, add_constitution=add_constitution)
-            update_fields.append("max_hp")
-        temporary_hp_adjustment = request_data["temporary_hp"]
-        if temporary_hp_adjustment:
-            character.adjust_temporary_hp(temporary_hp_adjustment)
-            update_fields.append("temporary_hp")
-
-        if update_fields:
-            character.save(update_fields=update_fields)
+        character.adjust_health(
+            current_hp=request_data["current_hp"],
+            max_hp=request_data["max_hp"],
+            temporary_hp=request_data["temporary_hp"],
+            add_constitution=request_data["add_constitution_to_max_hp"],
+        )
         serializer = self.get_serializer(character)
         return Response(serializer.data)
+
+
+class CharacterLevelUpView(GenericAPIView):
+    """
+    Level up one character or a whole party.
+    """
+
+    serializer_class = CharacterLevelUpResultSerializer
+
+    @extend_schema(
+        request=CharacterLevelUpSerializer,
+        responses=CharacterLevelUpResultSerializer(many=True),
+    )
+    def post(self, request: Request):
+        """
+        Level up the characters, increasing their max HP by a roll of their class' hit die, or
+        its average, and granting their class' features for the new level.
+
+        Nothing is levelled up if any of the characters don't exist, or are at the maximum level.
+        """
+
+        serializer = CharacterLevelUpSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        request_data = serializer.validated_data
+        pks = set(request_data["characters"])
+        with transaction.atomic():
+            try:
+                granted = Character.objects.filter(pk__in=pks).level_up(
+                    average_hit_points=request_data["average_hit_points"]
+                )
+            except ValueError as e:
+                raise ValidationError(str(e))
+            characters = list(
+                Character.objects.filter(pk__in=pks)
+                .order_by("pk")
+                .values("id", "level", *HEALTH_FIELDS)
+            )
+            missing = pks.difference(character["id"] for character in characters)
+            if missing:
+                raise NotFound(f"Characters not found: {', '.join(map(str, missing))}")
+        for character in characters:
+            character["features"] = granted.get(character["id"], [])
+        serializer = self.get_serializer(characters, many=True)
+        return Response(serializer.data)
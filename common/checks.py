@@ -0,0 +1,19 @@
+from django.core.checks import Error, register, Tags
+
+from .reference import versions_are_shared
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """Table and character versions need a cache shared by every worker process."""
+
+    if versions_are_shared():
+        return []
+    return [
+        Error(
+            "The default cache is local to each process, so cached reference tables, stat "
+            "sheets, and ETags would go stale in every worker but the one making a change.",
+            hint="Configure a shared cache backend, like memcached, as the default cache.",
+            id="common.E001",
+        )
+    ]
@@ -0,0 +1,90 @@
+import hashlib
+import json
+
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+from rest_framework.status import HTTP_200_OK, HTTP_304_NOT_MODIFIED
+
+from .reference import is_tracked, table_version, versions_are_shared
+
+
+class NotModified(APIException):
+    status_code = HTTP_304_NOT_MODIFIED
+    default_detail = "Not modified."
+    default_code = "not_modified"
+
+
+def make_etag(*parts):
+    """Hash the parts a response depends on into a strong ETag."""
+
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return f'"{hashlib.sha1(payload.encode()).hexdigest()}"'
+
+
+def etag_matches(etag, if_none_match):
+    """Check whether an If-None-Match header matches the ETag, using weak comparison."""
+
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+
+class ConditionalMixin:
+    """
+    Add an ETag to responses and answer matching If-None-Match requests with 304 Not Modified.
+
+    The ETag is derived from the change versions of `etag_tables`, see common.reference, and the
+    request itself, so a 304 is returned before the queryset is evaluated or serialized.
+    Responses only get an ETag if the versions of all the tables are tracked, and kept in a cache
+    shared by every process, so a worker can't answer 304 for a change made through another one.
+
+    etag_tables: Models the response depends on, the queryset's model by default.
+    """
+
+    etag_tables = None
+    etag_methods = ("GET", "HEAD")
+
+    def get_etag_tables(self):
+        if self.etag_tables is not None:
+            return self.etag_tables
+        return (self.get_queryset().model,)
+
+    def get_etag(self, request):
+        tables = self.get_etag_tables()
+        if not tables or not all(is_tracked(table) for table in tables):
+            return None
+        if not versions_are_shared():
+            return None
+        data = request.data if request.method == "POST" else None
+        if hasattr(data, "lists"):
+            data = dict(data.lists())
+        return make_etag(
+            f"{type(self).__module__}.{type(self).__name__}",
+            table_version(*tables),
+            request.get_full_path(),
+            request.accepted_media_type,
+            data,
+        )
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.etag = None
+        if request.method in self.etag_methods:
+            self.etag = self.get_etag(request)
+            if self.etag and etag_matches(self.etag, request.META.get("HTTP_IF_NONE_MATCH")):
+                raise NotModified()
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return Response(status=exc.status_code)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        etag = getattr(self, "etag", None)
+        if etag and response.status_code in (HTTP_200_OK, HTTP_304_NOT_MODIFIED):
+            response["ETag"] = etag
+        return response
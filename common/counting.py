@@ -0,0 +1,101 @@
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+class ExactCount:
+    """Count the rows with a COUNT query."""
+
+    def count(self, queryset, key=None):
+        return queryset.count()
+
+
+class EstimatedCount:
+    """
+    Estimate the row count from Postgres' statistics instead of scanning the rows.
+
+    Unfiltered querysets use the table's row estimate in pg_class, filtered querysets the
+    planner's row estimate from EXPLAIN. Estimates below `threshold` fall back to an exact count,
+    since small or narrowly filtered results are cheap to count and clients are more likely to
+    notice an inaccurate count.
+    """
+
+    def __init__(self, threshold=1000):
+        self.threshold = threshold
+
+    def count(self, queryset, key=None):
+        estimate = self.estimate(queryset.order_by())
+        if estimate is None or estimate < self.threshold:
+            return queryset.count()
+        return estimate
+
+    @staticmethod
+    def estimate(queryset):
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql":
+            return None
+        with connection.cursor() as cursor:
+            if not queryset.query.where:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [queryset.model._meta.db_table],
+                )
+            else:
+                sql, params = queryset.query.sql_with_params()
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            row = cursor.fetchone()
+        if not row:
+            return None
+        if isinstance(row[0], int):
+            estimate = row[0]
+        else:
+            plan = json.loads(row[0]) if isinstance(row[0], str) else row[0]
+            estimate = plan[0]["Plan"]["Plan Rows"]
+        # reltuples is -1 (or 0 on older Postgres) until the table has been analyzed
+        return estimate if estimate > 0 else None
+
+
+class CachedCount:
+    """
+    Cache the count of another strategy for a short time.
+
+    Counts are cached by the key given by the list view, i.e. the view and its normalized filter,
+    search, and sort parameters, so paging through the same list counts the rows only once.
+    """
+
+    def __init__(self, strategy=None, timeout=30):
+        self.strategy = strategy or ExactCount()
+        self.timeout = timeout
+
+    def count(self, queryset, key=None):
+        if key is None:
+            return self.strategy.count(queryset)
+        cache_key = f"list-count:{key}"
+        count = cache.get(cache_key)
+        if count is None:
+            count = self.strategy.count(queryset, key)
+            cache.set(cache_key, count, self.timeout)
+        return count
+
+
+def count_key(*parts):
+    """Hash the parts of a list request that determine the count into a cache key."""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+class CountingPaginator(Paginator):
+    """Paginator that counts the object list with a count strategy."""
+
+    def __init__(self, object_list, per_page, count_strategy=None, count_key=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_strategy = count_strategy or ExactCount()
+        self.count_key = count_key
+
+    @cached_property
+    def count(self):
+        return self.count_strategy.count(self.object_list, self.count_key)
@@ -0,0 +1,167 @@
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+from .helpers import roll_batch, roll_totals
+from .rng import get_rng
+
+DICE_PATTERN = re.compile(r"(\d*)d(\d+)((?:kh|kl|dh|dl)\d*|adv|dis)?")
+TERM_PATTERN = re.compile(r"[+-]?[^+-]+")
+# rolled dice are drawn into unsigned short arrays, see common.helpers._draw()
+MAX_FACES = 1000
+MAX_DICE = 1000
+
+
+class DiceNotationError(ValueError):
+    pass
+
+
+DiceTerm = namedtuple("DiceTerm", ["sign", "count", "faces", "drop_highest", "drop_lowest"])
+
+
+class DicePlan:
+    """
+    A compiled dice expression, e.g. "4d6kh3+2" or "1d20+1d4-1".
+
+    Plans are immutable and shared through compile_dice()'s cache, so they can be rolled as often
+    as needed without parsing the expression again.
+    """
+
+    __slots__ = ("expression", "terms", "modifier")
+
+    def __init__(self, expression, terms, modifier):
+        self.expression = expression
+        self.terms = tuple(terms)
+        self.modifier = modifier
+
+    def __repr__(self):
+        return f"DicePlan({self.expression!r})"
+
+    def __eq__(self, other):
+        if not isinstance(other, DicePlan):
+            return NotImplemented
+        return self.terms == other.terms and self.modifier == other.modifier
+
+    def __hash__(self):
+        return hash((self.terms, self.modifier))
+
+    @property
+    def dice(self):
+        """Number of dice of each size rolled, keyed by face count."""
+        dice = {}
+        for term in self.terms:
+            dice[term.faces] = dice.get(term.faces, 0) + term.count
+        return dice
+
+    def roll(self, rng=None):
+        """Roll the expression once, returning the rolls of each dice term and the total."""
+
+        rng = rng or get_rng()
+        results = []
+        total = self.modifier
+        for term in self.terms:
+            result = roll_batch(
+                term.faces,
+                term.count,
+                drop_highest=term.drop_highest,
+                drop_lowest=term.drop_lowest,
+                rng=rng,
+            )[0]
+            results.append({"sign": term.sign, "faces": term.faces, **result})
+            total += term.sign * result["total"]
+        return {
+            "expression": self.expression,
+            "results": results,
+            "modifier": self.modifier,
+            "total": total,
+        }
+
+    def totals(self, rolls=1, rng=None):
+        """Roll the expression `rolls` times and return a list of the totals."""
+
+        rng = rng or get_rng()
+        totals = [self.modifier] * rolls
+        for term in self.terms:
+            term_totals = roll_totals(
+                term.faces,
+                term.count,
+                rolls=rolls,
+                drop_highest=term.drop_highest,
+                drop_lowest=term.drop_lowest,
+                rng=rng,
+            )
+            sign = term.sign
+            totals = [t + sign * r for t, r in zip(totals, term_totals)]
+        return totals
+
+
+def _dice_term(sign, count, faces, keep):
+    count = int(count) if count else 1
+    faces = int(faces)
+    if faces < 1:
+        raise DiceNotationError("Dice must have at least one face.")
+    if faces > MAX_FACES:
+        raise DiceNotationError(f"Dice can have at most {MAX_FACES} faces.")
+    if count > MAX_DICE:
+        raise DiceNotationError(f"Cannot roll more than {MAX_DICE} dice at once.")
+    drop_highest = drop_lowest = 0
+    if keep in ("adv", "dis"):
+        if count != 1:
+            raise DiceNotationError("Advantage and disadvantage apply to a single die.")
+        count = 2
+        if keep == "adv":
+            drop_lowest = 1
+        else:
+            drop_highest = 1
+    elif keep:
+        kind, n = keep[:2], int(keep[2:] or 1)
+        if n > count:
+            raise DiceNotationError(f"Cannot keep or drop {n} of {count} dice.")
+        if kind == "kh":
+            drop_lowest = count - n
+        elif kind == "kl":
+            drop_highest = count - n
+        elif kind == "dh":
+            drop_highest = n
+        else:
+            drop_lowest = n
+    return DiceTerm(sign, count, faces, drop_highest, drop_lowest)
+
+
+@lru_cache(maxsize=512)
+def _compile(expression):
+    if not expression:
+        raise DiceNotationError("Empty dice expression.")
+    terms = []
+    modifier = 0
+    position = 0
+    for match in TERM_PATTERN.finditer(expression):
+        if match.start() != position:
+            break
+        position = match.end()
+        token = match.group()
+        sign = -1 if token[0] == "-" else 1
+        token = token.lstrip("+-")
+        if token.isdigit():
+            modifier += sign * int(token)
+            continue
+        dice = DICE_PATTERN.fullmatch(token)
+        if not dice:
+            raise DiceNotationError(f"Invalid dice term '{token}' in '{expression}'.")
+        terms.append(_dice_term(sign, *dice.groups()))
+    if position != len(expression):
+        raise DiceNotationError(f"Invalid dice expression '{expression}'.")
+    return DicePlan(expression, terms, modifier)
+
+
+def compile_dice(expression: str) -> DicePlan:
+    """
+    Compile dice notation into a reusable DicePlan.
+
+    Supports dice terms like "2d6" or "d20", flat modifiers, keep/drop modifiers ("4d6kh3",
+    "2d20kl1", "4d6dl1", "5d8dh2") and advantage/disadvantage ("d20adv", "d20dis"), with at most
+    MAX_DICE dice of MAX_FACES faces per term. Compiled plans are cached, so hot paths may call this
+    on every roll.
+    """
+
+    return _compile(expression.replace(" ", "").lower())
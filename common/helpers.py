@@ -1,11 +1,18 @@
+import heapq
 import math
-import random
+from array import array
+
+from .rng import get_rng
 
 
 def ability_modifier(score):
     return math.floor(score/2)-5
 
 
+def proficiency_bonus(level):
+    return 2 + (max(level, 1) - 1) // 4
+
+
 def _get_total(results, modifier):
     if isinstance(results, dict):
         # get total of each di size
@@ -14,29 +21,99 @@ def _get_total(results, modifier):
     return total_rolled + modifier
 
 
-def _roll(faces, dice_count):
-    return [random.randint(1, faces) for i in range(dice_count)]
+def _draw(faces, count, rng=None):
+    """Draw `count` die faces in a single call to the generator."""
+    rng = rng or get_rng()
+    return array("H", rng.choices(range(1, faces + 1), k=count))
 
 
-def roll(faces, dice_count=1, modifier=0, drop_highest=0, drop_lowest=0):
-    rolled = _roll(faces, dice_count)
-    results = rolled
-    if drop_lowest or drop_highest:
-        slice_start = drop_lowest if drop_lowest > 0 else 0
-        slice_stop = dice_count - (drop_highest if drop_highest > 0 else 0)
-        sorted_results = sorted(rolled)
-        results = sorted_results[slice_start:slice_stop]
-    return {
-        "rolled": rolled,
-        "results": results,
-        "modifier": modifier,
-        "total": _get_total(results, modifier)
-    }
+def _keep(rolled, drop_highest=0, drop_lowest=0):
+    """
+    Return the dice kept after dropping the lowest and highest rolls, in ascending order.
+
+    Uses partial selection so only the kept dice are ordered, not the whole roll.
+    """
+
+    dice_count = len(rolled)
+    drop_lowest = drop_lowest if drop_lowest > 0 else 0
+    drop_highest = drop_highest if drop_highest > 0 else 0
+    keep = dice_count - drop_lowest - drop_highest
+    if keep <= 0:
+        return []
+    if not drop_lowest:
+        return heapq.nsmallest(keep, rolled)
+    if not drop_highest:
+        return heapq.nlargest(keep, rolled)[::-1]
+    return heapq.nsmallest(dice_count - drop_highest, rolled)[drop_lowest:]
+
+
+def _roll(faces, dice_count, rng=None):
+    return _draw(faces, dice_count, rng).tolist()
+
+
+def roll_batch(
+        faces, dice_count=1, rolls=1, modifier=0, drop_highest=0, drop_lowest=0, rng=None
+):
+    """
+    Roll the same dice expression `rolls` times from a single draw.
+
+    Returns a list of result dicts shaped like those returned by roll().
+    """
+
+    drawn = _draw(faces, dice_count * rolls, rng).tolist()
+    batch = []
+    for n in range(rolls):
+        rolled = drawn[n * dice_count:(n + 1) * dice_count]
+        results = rolled
+        if drop_lowest or drop_highest:
+            results = _keep(rolled, drop_highest, drop_lowest)
+        batch.append({
+            "rolled": rolled,
+            "results": results,
+            "modifier": modifier,
+            "total": _get_total(results, modifier),
+        })
+    return batch
+
+
+def roll_totals(
+        faces, dice_count=1, rolls=1, modifier=0, drop_highest=0, drop_lowest=0, rng=None
+):
+    """
+    Roll the same dice expression `rolls` times and return only the totals.
+
+    Cheaper than roll_batch() for hot paths that don't need the individual dice.
+    """
+
+    drawn = _draw(faces, dice_count * rolls, rng)
+    dropping = drop_lowest or drop_highest
+    if dice_count == 1 and not dropping:
+        # every roll is a single die
+        return array("l", (die + modifier for die in drawn) if modifier else drawn)
+    totals = array("l", bytes(array("l").itemsize * rolls))
+    for n in range(rolls):
+        rolled = drawn[n * dice_count:(n + 1) * dice_count]
+        if dropping:
+            rolled = _keep(rolled, drop_highest, drop_lowest)
+        totals[n] = sum(rolled) + modifier
+    return totals
+
+
+def roll(faces, dice_count=1, modifier=0, drop_highest=0, drop_lowest=0, rng=None):
+    return roll_batch(
+        faces,
+        dice_count,
+        modifier=modifier,
+        drop_highest=drop_highest,
+        drop_lowest=drop_lowest,
+        rng=rng,
+    )[0]
 
 
-def roll_multiple_dice(dice_dict, modifier=0):
+def roll_multiple_dice(dice_dict, modifier=0, rng=None):
     """roll dice of different sizes/faces"""
-    results = {d: _roll(int(d), n) for d, n in dice_dict.items()}
+    rng = rng or get_rng()
+    results = {d: _roll(int(d), n, rng) for d, n in dice_dict.items()}
     response = {
         "results": results,
         "modifier": modifier,
@@ -0,0 +1,91 @@
+from statistics import median
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory
+
+from equipment.models import Weapon
+from equipment.views import WeaponListView
+from monster.models import Monster, MonsterType
+from monster.views import MonsterListView
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark managed list view latency as the Weapon and Monster tables grow. "
+        "Benchmark rows are inserted in a transaction that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            type=int,
+            default=[1000, 10000, 100000, 1000000],
+            help="Table sizes to benchmark at.",
+        )
+        parser.add_argument(
+            "--requests", type=int, default=20, help="Requests to time at each table size."
+        )
+        parser.add_argument("--batch-size", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        views = (
+            ("weapon", WeaponListView.as_view(), self.add_weapons),
+            ("monster", MonsterListView.as_view(), self.add_monsters),
+        )
+        self.stdout.write(f"{'table':<10}{'rows':>10}{'median ms':>12}{'max ms':>10}")
+        with transaction.atomic():
+            for name, view, add_rows in views:
+                rows = 0
+                for size in sorted(options["sizes"]):
+                    add_rows(rows, size, options["batch_size"])
+                    rows = size
+                    timings = []
+                    for _ in range(options["requests"]):
+                        request = factory.post("/?page=2&page_size=25", {}, format="json")
+                        start = perf_counter()
+                        response = view(request)
+                        response.render()
+                        timings.append((perf_counter() - start) * 1000)
+                    self.stdout.write(
+                        f"{name:<10}{size:>10}{median(timings):>12.2f}{max(timings):>10.2f}"
+                    )
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def add_weapons(start, stop, batch_size):
+        for batch_start in range(start, stop, batch_size):
+            Weapon.objects.bulk_create(
+                Weapon(
+                    name=f"Bench Weapon {i}",
+                    weapon_type=Weapon.SIMPLE_MELEE,
+                    gold=1,
+                    damage_die=6,
+                )
+                for i in range(batch_start, min(batch_start + batch_size, stop))
+            )
+
+    @staticmethod
+    def add_monsters(start, stop, batch_size):
+        monster_type, _ = MonsterType.objects.get_or_create(name="Bench Goblin")
+        for batch_start in range(start, stop, batch_size):
+            Monster.objects.bulk_create(
+                Monster(
+                    monster_type=monster_type,
+                    first_name="Bench",
+                    last_name=str(i),
+                    max_hp=7,
+                    current_hp=7,
+                    armor_class=15,
+                    strength=8,
+                    dexterity=14,
+                    constitution=10,
+                    intelligence=10,
+                    wisdom=8,
+                    charisma=8,
+                )
+                for i in range(batch_start, min(batch_start + batch_size, stop))
+            )
@@ -0,0 +1,26 @@
+from .rng import use_rng
+
+DICE_SEED_HEADER = "X-Dice-Seed"
+
+
+class DiceRNGMiddleware:
+    """
+    Seed the dice generator per request.
+
+    Clients can replay a request's rolls by sending the X-Dice-Seed header returned with the
+    original response. Invalid seeds are ignored and a random seed is used instead.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        seed = request.headers.get(DICE_SEED_HEADER)
+        try:
+            seed = int(seed) if seed else None
+        except ValueError:
+            seed = None
+        with use_rng(seed) as rng:
+            response = self.get_response(request)
+        response[DICE_SEED_HEADER] = str(rng.root_seed)
+        return response
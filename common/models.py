@@ -2,10 +2,128 @@ from math import ceil
 
 from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Cast, Ceil, Greatest, Least
 from django.utils.translation import gettext_lazy as _
 
+from .dice import compile_dice
 from .helpers import ability_modifier
+from .reference import bump_table_version, is_tracked
+
+HEALTH_FIELDS = ("current_hp", "max_hp", "temporary_hp")
+
+
+def damage_taken(damage, damage_type=None, resistances=(), vulnerabilities=(), immunities=()):
+    """
+    Get the damage a creature takes after its immunities, resistances, and vulnerabilities.
+
+    Resistance halves the damage, rounding down, before vulnerability doubles it.
+    """
+
+    if damage_type in immunities:
+        return 0
+    if damage_type in resistances:
+        damage //= 2
+    if damage_type in vulnerabilities:
+        damage *= 2
+    return damage
+
+
+class HealthQuerySet(models.QuerySet):
+    def adjust_health(self, current_hp=0, max_hp=0, temporary_hp=0, add_constitution=False):
+        """
+        Adjust the current, maximum, and temporary HP of every row in a single UPDATE.
+
+        Applies AbilityScoreHealthMixin.heal(), increase_max_hp(), and adjust_temporary_hp(), in
+        that order, with the clamping done in SQL. A negative current_hp adjustment is damage.
+        max_hp may be a dictionary of the increase by primary key, e.g. rolled for each row.
+        Returns the number of rows updated.
+        """
+
+        updates = self._health_updates(current_hp, max_hp, temporary_hp, add_constitution)
+        if not updates:
+            return 0
+        return self._update_health(updates)
+
+    @staticmethod
+    def _health_updates(current_hp=0, max_hp=0, temporary_hp=0, add_constitution=False,
+                        min_max_hp_increase=None):
+        hp_field = IntegerField()
+        updates = {}
+        current = F("current_hp")
+        if current_hp:
+            current = Greatest(
+                Value(0),
+                Least(F("max_hp"), F("current_hp") + Value(current_hp), output_field=hp_field),
+                output_field=hp_field,
+            )
+            updates["current_hp"] = current
+        if max_hp or add_constitution:
+            if isinstance(max_hp, dict):
+                increase = Case(
+                    *(When(pk=pk, then=Value(hp)) for pk, hp in max_hp.items()),
+                    default=Value(0),
+                    output_field=hp_field,
+                )
+            else:
+                increase = Value(max_hp)
+            if add_constitution:
+                # ability_modifier(), scores are positive so integer division floors
+                increase = increase + F("constitution") / Value(2) - Value(5)
+            if min_max_hp_increase is not None:
+                increase = Greatest(Value(min_max_hp_increase), increase, output_field=hp_field)
+            new_max = Greatest(Value(0), F("max_hp") + increase, output_field=hp_field)
+            updates["max_hp"] = new_max
+            # current HP proportionate to the new max HP
+            proportionate = Ceil(Cast(current * new_max, models.FloatField()) / F("max_hp"))
+            updates["current_hp"] = Case(
+                When(max_hp__gt=0, then=Cast(proportionate, hp_field)),
+                default=new_max,
+                output_field=hp_field,
+            )
+        if temporary_hp:
+            updates["temporary_hp"] = Greatest(
+                Value(0), F("temporary_hp") + Value(temporary_hp), output_field=hp_field
+            )
+        return updates
+
+    def apply_damage(self, damage):
+        """
+        Deal damage to every row in a single UPDATE, consuming temporary HP before current HP.
+
+        damage: The damage taken by each row, or a dictionary of the damage taken by primary key.
+        Returns the number of rows updated.
+        """
+
+        hp_field = IntegerField()
+        if isinstance(damage, dict):
+            damage = Case(
+                *(When(pk=pk, then=Value(hp)) for pk, hp in damage.items()),
+                default=Value(0),
+                output_field=hp_field,
+            )
+        else:
+            damage = Value(damage)
+        # both expressions are evaluated against the row's values before the update
+        remaining = Greatest(Value(0), damage - F("temporary_hp"), output_field=hp_field)
+        return self._update_health(
+            {
+                "temporary_hp": Greatest(
+                    Value(0), F("temporary_hp") - damage, output_field=hp_field
+                ),
+                "current_hp": Greatest(
+                    Value(0), F("current_hp") - remaining, output_field=hp_field
+                ),
+            }
+        )
+
+    def _update_health(self, updates):
+        updated = self.update(**updates)
+        if is_tracked(self.model):
+            # update() skips the signals that version the table
+            bump_table_version(self.model)
+        return updated
 
 
 class AbilityScoreHealthMixin(models.Model):
@@ -20,6 +138,8 @@ class AbilityScoreHealthMixin(models.Model):
     wisdom = models.PositiveSmallIntegerField(validators=[MaxValueValidator(20)])
     charisma = models.PositiveSmallIntegerField(validators=[MaxValueValidator(20)])
 
+    objects = HealthQuerySet.as_manager()
+
     class Meta:
         abstract = True
 
@@ -65,6 +185,54 @@ class AbilityScoreHealthMixin(models.Model):
         if self.temporary_hp < 0:
             self.temporary_hp = 0
 
+    def adjust_health(self, current_hp=0, max_hp=0, temporary_hp=0, add_constitution=False):
+        """
+        Atomically adjust the current, maximum, and temporary HP in the database.
+
+        Unlike heal(), increase_max_hp(), and adjust_temporary_hp() followed by save(), the
+        adjustment is applied to the row's current values in a single UPDATE, see
+        HealthQuerySet.adjust_health(), so concurrent adjustments aren't lost. The instance is
+        updated with, and the method returns, the resulting HP values.
+        Raises DoesNotExist if the row was deleted.
+        """
+
+        if current_hp or max_hp or temporary_hp or add_constitution:
+            return self._update_health(
+                lambda queryset: queryset.adjust_health(
+                    current_hp, max_hp, temporary_hp, add_constitution
+                )
+            )
+        return self._health()
+
+    def apply_damage(self, damage: int, damage_type=None, resistances=(), vulnerabilities=(),
+                     immunities=()):
+        """
+        Atomically deal damage, consuming temporary HP before current HP.
+
+        The damage is reduced or increased by the creature's resistances, vulnerabilities, and
+        immunities to the damage type, see damage_taken(), and applied in a single UPDATE like
+        adjust_health(). The instance is updated with, and the method returns, the resulting HP
+        values. Raises DoesNotExist if the row was deleted.
+        """
+
+        damage = damage_taken(damage, damage_type, resistances, vulnerabilities, immunities)
+        if damage > 0:
+            return self._update_health(lambda queryset: queryset.apply_damage(damage))
+        return self._health()
+
+    def _health(self):
+        return {field: getattr(self, field) for field in HEALTH_FIELDS}
+
+    def _update_health(self, update):
+        queryset = type(self)._default_manager.filter(pk=self.pk)
+        # the UPDATE locks the row until the transaction ends, so the SELECT reads its result
+        with transaction.atomic():
+            update(queryset)
+            health = queryset.values(*HEALTH_FIELDS).get()
+        for field, value in health.items():
+            setattr(self, field, value)
+        return health
+
 
 class CampaignManagementMixin(models.Model):
     backstory = models.TextField(blank=True)
@@ -115,6 +283,12 @@ class DamageMixin(models.Model):
     def damage(self):
         return f"{self.damage_die_count}d{self.damage_die}"
 
+    def damage_plan(self):
+        return compile_dice(self.damage())
+
+    def roll_damage(self, rng=None):
+        return self.damage_plan().roll(rng)
+
 
 class MoneyMixin(models.Model):
     copper = models.PositiveSmallIntegerField(null=True, blank=True)
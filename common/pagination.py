@@ -1,7 +1,208 @@
+import base64
+import json
+from collections import OrderedDict
+from functools import partial
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .counting import count_key, CountingPaginator
+
+CURSOR_QUERY_PARAM = "cursor"
+
+
+def encode_cursor(values, reverse=False):
+    payload = json.dumps({"v": values, "r": reverse}, cls=DjangoJSONEncoder)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(cursor + padding))
+        return payload["v"], bool(payload["r"])
+    except (ValueError, KeyError, TypeError):
+        raise NotFound("Invalid cursor.")
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset by the values of its ordering fields rather than by OFFSET.
+
+    Each page is fetched with a WHERE clause on the ordering fields of the last (or first) row of
+    the previous page, so every page costs the same no matter how deep it is. The ordering must end
+    on a unique field; the primary key is appended if it doesn't.
+
+    Cursors encode the ordering values of the row the page starts after (or, for previous pages,
+    ends before). NULLs are ordered as Postgres orders them: last ascending, first descending.
+    """
+
+    def __init__(self, queryset, page_size, ordering=None):
+        ordering = list(ordering or queryset.query.order_by or queryset.model._meta.ordering)
+        if not ordering or ordering[-1].lstrip("-") not in ("id", "pk"):
+            ordering.append("pk")
+        self.fields = []
+        self.nullable = set()
+        for field in ordering:
+            if not isinstance(field, str):
+                raise TypeError("Keyset pagination only supports ordering by field names.")
+            name = field.lstrip("-")
+            self.fields.append((name, field.startswith("-")))
+            if self.is_nullable(queryset.model, name):
+                self.nullable.add(name)
+        self.queryset = queryset.annotate(
+            **{self.alias(i): F(name) for i, (name, _) in enumerate(self.fields)}
+        )
+        self.page_size = page_size
+
+    @staticmethod
+    def alias(i):
+        return f"keyset_{i}"
+
+    @staticmethod
+    def is_nullable(model, name):
+        """Whether the ordering field, possibly spanning relations, may be NULL."""
+        for part in name.split("__"):
+            if part == "pk":
+                return False
+            field = model._meta.get_field(part)
+            if field.null or field.many_to_many or field.one_to_many:
+                return True
+            model = field.related_model
+        return False
+
+    def ordering(self, reverse=False):
+        return [
+            f"{'-' if descending != reverse else ''}{name}" for name, descending in self.fields
+        ]
+
+    def after(self, name, value, descending):
+        """Rows ordered after the value for a single field."""
+        if descending:
+            return Q(**{f"{name}__isnull": False}) if value is None else Q(**{f"{name}__lt": value})
+        if value is None:
+            return Q(pk__in=[])
+        after = Q(**{f"{name}__gt": value})
+        if name in self.nullable:
+            after |= Q(**{f"{name}__isnull": True})
+        return after
+
+    @staticmethod
+    def equal(name, value):
+        if value is None:
+            return Q(**{f"{name}__isnull": True})
+        return Q(**{name: value})
+
+    def seek(self, values, reverse=False):
+        """Rows after (or, in reverse, before) the row with the given ordering values."""
+        if len(values) != len(self.fields):
+            raise NotFound("Invalid cursor.")
+        query = Q(pk__in=[])
+        equal = Q()
+        for (name, descending), value in zip(self.fields, values):
+            query |= equal & self.after(name, value, descending != reverse)
+            equal &= self.equal(name, value)
+        return query
+
+    def cursor_values(self, obj):
+        return [getattr(obj, self.alias(i)) for i in range(len(self.fields))]
+
+    def page(self, cursor=None):
+        values, reverse = decode_cursor(cursor) if cursor else (None, False)
+        queryset = self.queryset
+        if values is not None:
+            try:
+                queryset = queryset.filter(self.seek(values, reverse))
+            except (DjangoValidationError, TypeError, ValueError):
+                raise NotFound("Invalid cursor.")
+        rows = list(queryset.order_by(*self.ordering(reverse))[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        next_cursor = previous_cursor = None
+        if rows:
+            if has_more or reverse:
+                next_cursor = encode_cursor(self.cursor_values(rows[-1]))
+            if values is not None and (has_more or not reverse):
+                previous_cursor = encode_cursor(self.cursor_values(rows[0]), reverse=True)
+        return KeysetPage(rows, next_cursor, previous_cursor)
 
 
 class Pagination(PageNumberPagination):
+    """
+    Page number pagination, or keyset pagination if the request includes a cursor parameter.
+
+    An empty cursor parameter requests the first page of keyset pagination. Page numbers are
+    counted with the view's count_strategy (see common.counting), if it has one.
+    """
+
     page_size = 25
     page_size_query_param = "page_size"
     max_page_size = 200
+    cursor_query_param = CURSOR_QUERY_PARAM
+    ordering_query_param = "ordering"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset_page = None
+        if self.cursor_query_param not in request.query_params:
+            self.django_paginator_class = partial(
+                CountingPaginator,
+                count_strategy=getattr(view, "count_strategy", None),
+                count_key=self.count_key(request, view),
+            )
+            return super().paginate_queryset(queryset, request, view)
+        self.request = request
+        paginator = KeysetPaginator(queryset, self.get_page_size(request))
+        self.keyset_page = paginator.page(request.query_params[self.cursor_query_param])
+        return self.keyset_page.object_list
+
+    def count_key(self, request, view):
+        """Key the result count by the view and the query parameters that filter the results."""
+        ignored = (
+            self.page_query_param,
+            self.page_size_query_param,
+            self.cursor_query_param,
+            self.ordering_query_param,
+        )
+        params = {
+            param: sorted(request.query_params.getlist(param))
+            for param in request.query_params
+            if param not in ignored
+        }
+        return count_key(type(view).__module__, type(view).__name__, params)
+
+    def get_paginated_response(self, data):
+        if self.keyset_page is None:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ("next", self.get_cursor_link(self.keyset_page.next_cursor)),
+            ("previous", self.get_cursor_link(self.keyset_page.previous_cursor)),
+            ("results", data),
+        ]))
+
+    def get_cursor_link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
@@ -0,0 +1,171 @@
+from functools import lru_cache
+from math import factorial, sqrt
+
+from .dice import compile_dice, DicePlan
+
+
+class Distribution:
+    """
+    Exact probability distribution of a dice expression's total.
+
+    counts[i] is the number of equally likely outcomes in which the total is offset + i, out of
+    `outcomes` possible outcomes.
+    """
+
+    __slots__ = ("offset", "counts", "outcomes")
+
+    def __init__(self, offset, counts, outcomes=None):
+        counts = list(counts)
+        start = next((i for i, c in enumerate(counts) if c), 0)
+        while len(counts) > start + 1 and not counts[-1]:
+            counts.pop()
+        self.offset = offset + start
+        self.counts = tuple(counts[start:])
+        self.outcomes = outcomes if outcomes is not None else sum(self.counts)
+
+    @property
+    def minimum(self):
+        return self.offset
+
+    @property
+    def maximum(self):
+        return self.offset + len(self.counts) - 1
+
+    @property
+    def mean(self):
+        return sum((self.offset + i) * c for i, c in enumerate(self.counts)) / self.outcomes
+
+    @property
+    def variance(self):
+        mean = self.mean
+        return sum(
+            (self.offset + i - mean) ** 2 * c for i, c in enumerate(self.counts)
+        ) / self.outcomes
+
+    @property
+    def standard_deviation(self):
+        return sqrt(self.variance)
+
+    def pmf(self):
+        """Probability of rolling each possible total."""
+        return {
+            self.offset + i: c / self.outcomes for i, c in enumerate(self.counts) if c
+        }
+
+    def cdf(self):
+        """Probability of rolling each possible total or less."""
+        cdf = {}
+        cumulative = 0
+        for i, c in enumerate(self.counts):
+            cumulative += c
+            if c:
+                cdf[self.offset + i] = cumulative / self.outcomes
+        return cdf
+
+    def percentile(self, percent):
+        """The smallest total that is rolled at least `percent`% of the time or less."""
+        threshold = self.outcomes * percent / 100
+        cumulative = 0
+        for i, c in enumerate(self.counts):
+            cumulative += c
+            if c and cumulative >= threshold:
+                return self.offset + i
+        return self.maximum
+
+    def probability_at_least(self, total):
+        """Probability of rolling `total` or more, e.g. meeting a DC or armor class."""
+        index = max(total - self.offset, 0)
+        return sum(self.counts[index:]) / self.outcomes
+
+    def negated(self):
+        return Distribution(-self.maximum, reversed(self.counts), self.outcomes)
+
+    def shifted(self, modifier):
+        return Distribution(self.offset + modifier, self.counts, self.outcomes)
+
+    def convolve(self, other):
+        counts = [0] * (len(self.counts) + len(other.counts) - 1)
+        for i, a in enumerate(self.counts):
+            if a:
+                for j, b in enumerate(other.counts):
+                    counts[i + j] += a * b
+        return Distribution(self.offset + other.offset, counts, self.outcomes * other.outcomes)
+
+
+@lru_cache(maxsize=None)
+def _binomial(n, k):
+    return factorial(n) // (factorial(k) * factorial(n - k))
+
+
+@lru_cache(maxsize=None)
+def _die(faces):
+    return Distribution(1, [1] * faces, faces)
+
+
+@lru_cache(maxsize=1024)
+def _dice_sum(faces, count):
+    """Distribution of the sum of `count` dice, built by repeated squaring of memoized halves."""
+    if count == 0:
+        return Distribution(0, [1], 1)
+    if count == 1:
+        return _die(faces)
+    half = _dice_sum(faces, count // 2)
+    total = half.convolve(half)
+    if count % 2:
+        total = total.convolve(_die(faces))
+    return total
+
+
+@lru_cache(maxsize=1024)
+def _dice_kept(faces, count, drop_highest, drop_lowest):
+    """
+    Distribution of the sum of `count` dice after dropping the highest and lowest rolls.
+
+    Walks the face values in ascending order, tracking how many dice have been assigned a value so
+    far. Dice assigned the value v occupy the next positions of the sorted roll, of which only the
+    positions between drop_lowest and count - drop_highest are kept.
+    """
+
+    keep_stop = count - drop_highest
+    max_total = faces * (keep_stop - drop_lowest)
+    # states[m][s]: ways to assign m dice values so far with kept sum s
+    states = [[0] * (max_total + 1) for _ in range(count + 1)]
+    states[0][0] = 1
+    for value in range(1, faces + 1):
+        next_states = [[0] * (max_total + 1) for _ in range(count + 1)]
+        for assigned, sums in enumerate(states):
+            remaining = count - assigned
+            for s, ways in enumerate(sums):
+                if not ways:
+                    continue
+                # on the last face, every remaining die must take this value
+                start = remaining if value == faces else 0
+                for j in range(start, remaining + 1):
+                    kept = max(0, min(assigned + j, keep_stop) - max(assigned, drop_lowest))
+                    next_states[assigned + j][s + kept * value] += ways * _binomial(remaining, j)
+        states = next_states
+    return Distribution(0, states[count], faces ** count)
+
+
+def _term_distribution(term):
+    if term.drop_highest or term.drop_lowest:
+        distribution = _dice_kept(term.faces, term.count, term.drop_highest, term.drop_lowest)
+    else:
+        distribution = _dice_sum(term.faces, term.count)
+    if term.sign < 0:
+        distribution = distribution.negated()
+    return distribution
+
+
+@lru_cache(maxsize=512)
+def _plan_distribution(plan):
+    distribution = Distribution(0, [1], 1)
+    for term in plan.terms:
+        distribution = distribution.convolve(_term_distribution(term))
+    return distribution.shifted(plan.modifier)
+
+
+def distribution(expression) -> Distribution:
+    """Exact distribution of a dice expression, given as notation or a compiled DicePlan."""
+    plan = expression if isinstance(expression, DicePlan) else compile_dice(expression)
+    return _plan_distribution(plan)
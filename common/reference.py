@@ -0,0 +1,144 @@
+import uuid
+
+from django.core.cache import cache, caches, DEFAULT_CACHE_ALIAS
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+_tables = {}
+_tracked = set()
+
+
+def _version_key(model):
+    return f"table-version:{model._meta.db_table}"
+
+
+def versions_are_shared():
+    """
+    Check whether the cache the versions are kept in is shared by every process.
+
+    A local-memory cache is private to the process, so a change bumps the version only in the
+    worker that made it, and the others keep serving what they cached before.
+    """
+
+    return not isinstance(caches[DEFAULT_CACHE_ALIAS], LocMemCache)
+
+
+def table_version(*models):
+    """
+    Get the current change version of one or more tables.
+
+    Versions are random tokens kept in the cache, so with a shared cache, like memcached, every
+    process sees a change made by any of them, see versions_are_shared(). A table without a
+    version, e.g. after the cache was cleared, gets a new one.
+    """
+
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, uuid.uuid4().hex, None)
+            versions[key] = cache.get(key)
+    return ":".join(versions[key] for key in keys)
+
+
+def bump_versions(*keys):
+    """
+    Give the version keys new random tokens, now and again once the current transaction commits.
+
+    Until the change is committed, other connections read the old rows, and could cache them
+    under the version bumped by the first bump. The second bump makes those entries unreachable.
+    """
+
+    def bump():
+        cache.set_many({key: uuid.uuid4().hex for key in keys}, None)
+
+    bump()
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(bump)
+
+
+def bump_table_version(model):
+    """
+    Mark a table as changed, invalidating everything cached from it, see bump_versions().
+
+    Saves, deletes, many-to-many changes, and loaddata bump the version through signals. Changes
+    that skip the signals, like QuerySet.update() or bulk_create(), should bump it themselves.
+    """
+
+    bump_versions(_version_key(model))
+
+
+def _bump_changed_table(sender, **kwargs):
+    bump_table_version(sender)
+
+
+def track_table_versions(*models):
+    """Bump the models' table versions whenever they are changed through signals."""
+
+    for model in models:
+        if model in _tracked:
+            continue
+        _tracked.add(model)
+        # connected per model, so untracked models can still be fast deleted
+        post_save.connect(_bump_changed_table, sender=model, weak=False)
+        post_delete.connect(_bump_changed_table, sender=model, weak=False)
+
+
+def is_tracked(model):
+    return model in _tracked
+
+
+class ReferenceTable:
+    """
+    In-process cache of a static table, e.g. armor, weapons, and character races.
+
+    The whole table is loaded with `queryset`, including any prefetched relations, and kept in
+    memory until the version of the table or one of the tables it `depends_on` changes. Cached
+    instances are shared between requests and should be treated as read-only.
+    """
+
+    def __init__(self, queryset, depends_on=()):
+        self.queryset = queryset
+        self.model = queryset.model
+        self.models = (self.model, *depends_on)
+        self._rows = None
+        _tables[self.model] = self
+        track_table_versions(*self.models)
+
+    def rows(self):
+        version = table_version(*self.models)
+        rows = self._rows
+        if rows is None or rows[0] != version:
+            rows = (version, {instance.pk: instance for instance in self.queryset.all()})
+            self._rows = rows
+        return rows[1]
+
+    def get(self, pk):
+        """Get a cached instance by its primary key, or None if it doesn't exist."""
+
+        try:
+            pk = self.model._meta.pk.to_python(pk)
+        except ValidationError:
+            return None
+        return self.rows().get(pk)
+
+    def all(self):
+        return list(self.rows().values())
+
+
+def reference_table(model):
+    """Get the ReferenceTable registered for a model, or None if it isn't cached."""
+
+    return _tables.get(model)
+
+
+@receiver(m2m_changed, dispatch_uid="reference_m2m_changed")
+def _bump_changed_relation(sender, instance, model, action, **kwargs):
+    if not action.startswith("post_"):
+        return
+    for changed in (type(instance), model):
+        if changed in _tracked:
+            bump_table_version(changed)
@@ -0,0 +1,76 @@
+import hashlib
+import random
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_context_rng = ContextVar("dice_rng", default=None)
+_thread_rng = threading.local()
+
+
+class DiceRNG(random.Random):
+    """
+    Seedable random number generator for dice rolls.
+
+    Every generator remembers the seed it was created with, so any sequence of rolls can be
+    replayed, and can spawn child generators whose streams are derived from that seed and a key
+    (e.g. a campaign id or worker number) rather than from the parent's state. Spawning is
+    therefore deterministic regardless of how many rolls the parent has made, and parallel
+    workers can each roll from their own stream without sharing state.
+    """
+
+    def __init__(self, seed=None):
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(64)
+        self.root_seed = int(seed)
+        super().__init__(self.root_seed)
+
+    def __repr__(self):
+        return f"DiceRNG({self.root_seed})"
+
+    def spawn(self, *key):
+        """Create an independent generator for the stream identified by `key`."""
+        digest = hashlib.blake2b(repr((self.root_seed, key)).encode(), digest_size=8).digest()
+        return DiceRNG(int.from_bytes(digest, "big"))
+
+    def split(self, streams):
+        """Create `streams` independent generators, e.g. one per simulation worker."""
+        return [self.spawn("stream", i) for i in range(streams)]
+
+
+def get_rng() -> DiceRNG:
+    """
+    Get the generator for the current context.
+
+    Defaults to a generator per thread, so rolls never contend on the global random module's
+    state.
+    """
+
+    rng = _context_rng.get()
+    if rng is None:
+        rng = getattr(_thread_rng, "rng", None)
+        if rng is None:
+            rng = _thread_rng.rng = DiceRNG()
+    return rng
+
+
+@contextmanager
+def use_rng(rng=None):
+    """
+    Roll with `rng` for the duration of the context.
+
+    `rng` may be a DiceRNG or a seed, and defaults to a freshly seeded generator.
+    """
+
+    if not isinstance(rng, DiceRNG):
+        rng = DiceRNG(rng)
+    token = _context_rng.set(rng)
+    try:
+        yield rng
+    finally:
+        _context_rng.reset(token)
+
+
+def campaign_rng(campaign_id, rng=None) -> DiceRNG:
+    """Get the campaign's stream of the current (or given) generator."""
+    return (rng or get_rng()).spawn("campaign", str(campaign_id))
@@ -0,0 +1,36 @@
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db.models import Q
+
+
+class ContainsSearch:
+    """
+    Case-insensitive substring search, OR'd across the search fields.
+
+    Fields are matched with icontains (ILIKE '%search%'), which Postgres answers from trigram
+    (pg_trgm) GIN indexes on the searched text columns. Other fields, like numbers, are cast to
+    text for the substring match, so searching "1" matches an armor class of 12 or 15.
+    """
+
+    def search(self, queryset, fields, search):
+        query = Q()
+        for field in fields:
+            query |= Q(**{f"{field}__icontains": search})
+        return queryset.filter(query)
+
+
+class FullTextSearch:
+    """
+    Postgres full-text search across the search fields.
+
+    Matches whole (stemmed) words rather than substrings, using web search syntax for the search
+    terms. The search fields' SearchVector should be indexed with a GinIndex on the same
+    expression, e.g. GinIndex(SearchVector("name", "description", config="english")).
+    """
+
+    def __init__(self, config="english"):
+        self.config = config
+
+    def search(self, queryset, fields, search):
+        vector = SearchVector(*fields, config=self.config)
+        query = SearchQuery(search, config=self.config, search_type="websearch")
+        return queryset.alias(search_vector=vector).filter(search_vector=query)
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
+from .reference import reference_table
+
 
 class FilteringSerializer(serializers.Serializer):
     """Dynamically create a choice list field for each filterable field"""
@@ -41,3 +43,67 @@ class ManagedListSerializer(serializers.Serializer):
             filter_options=filter_options, required=False
         )
         self.fields["sort"] = SortingSerializer(sort_fields=sort_fields, required=False)
+
+
+class DamageDiceSerializer(serializers.Serializer):
+    """Validate the DamageMixin dice fields of a damage distribution request."""
+
+    damage_die = serializers.IntegerField(min_value=1, max_value=20)
+    damage_die_count = serializers.IntegerField(min_value=1, max_value=100, default=1)
+    modifier = serializers.IntegerField(default=0)
+
+    def expression(self):
+        data = self.validated_data
+        expression = f"{data['damage_die_count']}d{data['damage_die']}"
+        if data["modifier"]:
+            expression = f"{expression}{data['modifier']:+d}"
+        return expression
+
+
+class DistributionSerializer(serializers.Serializer):
+    """
+    Serialize the exact distribution of a dice expression's total.
+
+    Expects a dictionary with the dice expression and its common.probability.Distribution.
+    """
+
+    PERCENTILES = (10, 25, 50, 75, 90)
+
+    def to_representation(self, instance):
+        expression, distribution = instance["expression"], instance["distribution"]
+        cdf = distribution.cdf()
+        return {
+            "expression": expression,
+            "minimum": distribution.minimum,
+            "maximum": distribution.maximum,
+            "mean": distribution.mean,
+            "variance": distribution.variance,
+            "standard_deviation": distribution.standard_deviation,
+            "percentiles": {str(p): distribution.percentile(p) for p in self.PERCENTILES},
+            "distribution": [
+                {"total": total, "probability": probability, "cumulative": cdf[total]}
+                for total, probability in distribution.pmf().items()
+            ],
+        }
+
+
+class ReferenceNameSerializer(serializers.ModelSerializer):
+    """
+    Serialize a static table's related object from the reference cache, see common.reference.
+
+    Nested on a foreign key, the related object is looked up by the key's value instead of being
+    fetched from the database, so views don't need to select or prefetch it.
+    """
+
+    def get_attribute(self, instance):
+        table = reference_table(self.Meta.model)
+        if table is not None and len(self.source_attrs) == 1:
+            field = instance._meta.get_field(self.source)
+            if field.many_to_one and field.concrete:
+                pk = getattr(instance, field.attname)
+                if pk is None:
+                    return None
+                related = table.get(pk)
+                if related is not None:
+                    return related
+        return super().get_attribute(instance)
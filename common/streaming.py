@@ -0,0 +1,69 @@
+"""
+Streamed JSON responses, so large results are encoded and sent in chunks instead of being built
+in memory.
+"""
+
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+# rows fetched from server-side cursors, and encoded, at a time
+STREAM_CHUNK_SIZE = 500
+
+_encoder = DjangoJSONEncoder()
+
+
+def _json_array(items, chunk_size):
+    yield "["
+    separator = ""
+    chunk = []
+    for item in items:
+        chunk.append(_encoder.encode(item))
+        if len(chunk) == chunk_size:
+            yield separator + ",".join(chunk)
+            separator = ","
+            chunk = []
+    if chunk:
+        yield separator + ",".join(chunk)
+    yield "]"
+
+
+def json_array_stream(items, chunk_size=STREAM_CHUNK_SIZE):
+    """Encode a JSON array, a chunk of items at a time, e.g. for a StreamingHttpResponse."""
+
+    yield from _json_array(items, chunk_size)
+
+
+def ndjson_stream(items, chunk_size=STREAM_CHUNK_SIZE):
+    """Encode newline delimited JSON, one item per line, a chunk of lines at a time."""
+
+    chunk = []
+    for item in items:
+        chunk.append(_encoder.encode(item))
+        if len(chunk) == chunk_size:
+            yield "\n".join(chunk) + "\n"
+            chunk = []
+    if chunk:
+        yield "\n".join(chunk) + "\n"
+
+
+# export format: (content type, encoder)
+EXPORT_FORMATS = {
+    "json": ("application/json", json_array_stream),
+    "ndjson": ("application/x-ndjson", ndjson_stream),
+}
+
+
+def json_object_stream(sections, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Encode a JSON object of arrays, section by section, e.g. for a StreamingHttpResponse.
+
+    sections: (key, items) pairs. Items are only iterated while the object is streamed, so
+    generators over QuerySet.iterator() keep memory flat.
+    """
+
+    yield "{"
+    for i, (key, items) in enumerate(sections):
+        yield f"{',' if i else ''}{json.dumps(key)}:"
+        yield from _json_array(items, chunk_size)
+    yield "}"
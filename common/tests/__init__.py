@@ -2,7 +2,15 @@ from unittest.mock import patch
 
 from django.test import SimpleTestCase
 
-from ..helpers import ability_modifier, roll, roll_multiple_dice, result_values_for_field
+from ..helpers import (
+    ability_modifier,
+    result_values_for_field,
+    roll,
+    roll_batch,
+    roll_multiple_dice,
+    roll_totals,
+)
+from ..rng import DiceRNG
 
 
 class TestHelpers(SimpleTestCase):
@@ -11,42 +19,75 @@ class TestHelpers(SimpleTestCase):
         for score, expected_modifier in modifiers:
             self.assertEqual(ability_modifier(score), expected_modifier)
 
-    @patch('random.randint')
-    def test_roll(self, mock_randint):
-        mock_randint.return_value = 4
+    @patch.object(DiceRNG, "choices")
+    def test_roll(self, mock_choices):
+        mock_choices.return_value = [4]
         roll_results = roll(6)
         self.assertEqual(roll_results["rolled"], [4])
         self.assertEqual(roll_results["results"], [4])
         self.assertEqual(roll_results["total"], 4)
 
-        mock_randint.side_effect = [4, 2, 3, 1]
+        mock_choices.return_value = [4, 2, 3, 1]
         roll_results = roll(6, 4, modifier=2, drop_lowest=2)
         self.assertEqual(roll_results["rolled"], [4, 2, 3, 1])
         self.assertEqual(roll_results["results"], [3, 4])
         self.assertEqual(roll_results["modifier"], 2)
         self.assertEqual(roll_results["total"], 9)
 
-        mock_randint.side_effect = [4, 5, 2, 1, 1]
+        mock_choices.return_value = [4, 5, 2, 1, 1]
         roll_results = roll(6, dice_count=5, modifier=3, drop_lowest=1, drop_highest=2)
         self.assertEqual(roll_results["rolled"], [4, 5, 2, 1, 1])
         self.assertEqual(roll_results["results"], [1, 2])
         self.assertEqual(roll_results["modifier"], 3)
         self.assertEqual(roll_results["total"], 6)
 
-    @patch('random.randint')
-    def test_roll_multiple(self, mock_randint):
-        mock_randint.return_value = 8
+    @patch.object(DiceRNG, "choices")
+    def test_roll_multiple(self, mock_choices):
+        mock_choices.return_value = [8]
         roll_results = roll_multiple_dice({"20": 1})
         self.assertEqual(roll_results["modifier"], 0)
         self.assertEqual(roll_results["results"], {"20": [8]})
         self.assertEqual(roll_results["total"], 8)
 
-        mock_randint.side_effect = [3, 4, 7, 16]
+        mock_choices.side_effect = [[3, 4], [7], [16]]
         roll_results = roll_multiple_dice({"6": 2, "12": 1, "20": 1}, modifier=2)
         self.assertEqual(roll_results["modifier"], 2)
         self.assertEqual(roll_results["results"], {"6": [3, 4], "12": [7], "20": [16]})
         self.assertEqual(roll_results["total"], 32)
 
+    @patch.object(DiceRNG, "choices")
+    def test_roll_batch(self, mock_choices):
+        mock_choices.return_value = [4, 2, 3, 1, 6, 6, 1, 5]
+        batch = roll_batch(6, 4, rolls=2, modifier=1, drop_lowest=1)
+        mock_choices.assert_called_once()
+        self.assertEqual(len(batch), 2)
+        self.assertEqual(batch[0]["rolled"], [4, 2, 3, 1])
+        self.assertEqual(batch[0]["results"], [2, 3, 4])
+        self.assertEqual(batch[0]["total"], 10)
+        self.assertEqual(batch[1]["rolled"], [6, 6, 1, 5])
+        self.assertEqual(batch[1]["results"], [5, 6, 6])
+        self.assertEqual(batch[1]["total"], 18)
+
+        mock_choices.return_value = [4, 5, 2, 1, 1]
+        batch = roll_batch(6, 5, drop_lowest=1, drop_highest=2)
+        self.assertEqual(batch[0]["results"], [1, 2])
+
+        mock_choices.return_value = [3, 4]
+        batch = roll_batch(6, 2, drop_lowest=3)
+        self.assertEqual(batch[0]["results"], [])
+        self.assertEqual(batch[0]["total"], 0)
+
+    @patch.object(DiceRNG, "choices")
+    def test_roll_totals(self, mock_choices):
+        mock_choices.return_value = [20, 3, 11, 12, 1, 1]
+        totals = roll_totals(20, 2, rolls=3, modifier=2, drop_lowest=1)
+        mock_choices.assert_called_once()
+        self.assertEqual(list(totals), [22, 14, 3])
+
+        mock_choices.return_value = [20, 3, 11, 12]
+        totals = roll_totals(20, 2, rolls=2, drop_highest=1)
+        self.assertEqual(list(totals), [3, 11])
+
     def test_result_values_for_field(self):
         values_a = [1, 2, 3]
         values_b = ["a", "b", "c"]
@@ -0,0 +1,17 @@
+from django.test import override_settings, SimpleTestCase
+
+from ..checks import check_shared_cache
+
+LOCAL_MEMORY_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+
+
+class TestSharedCacheCheck(SimpleTestCase):
+    def test_shared_cache(self):
+        self.assertEqual(check_shared_cache(None), [])
+
+    @override_settings(CACHES=LOCAL_MEMORY_CACHES)
+    def test_local_memory_cache(self):
+        errors = check_shared_cache(None)
+        self.assertEqual([error.id for error in errors], ["common.E001"])
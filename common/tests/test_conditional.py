@@ -0,0 +1,29 @@
+from django.test import override_settings, RequestFactory, SimpleTestCase
+from rest_framework.request import Request
+
+from character.views import CharacterRaceView
+from ..conditional import etag_matches, make_etag
+from ..reference import is_tracked
+from .test_checks import LOCAL_MEMORY_CACHES
+
+
+class TestConditional(SimpleTestCase):
+    def test_make_etag(self):
+        etag = make_etag("view", "version", {"b": 1, "a": [2]})
+        self.assertEqual(etag, make_etag("view", "version", {"a": [2], "b": 1}))
+        self.assertNotEqual(etag, make_etag("view", "other version", {"a": [2], "b": 1}))
+        self.assertTrue(etag.startswith('"') and etag.endswith('"'))
+
+    def test_etag_matches(self):
+        etag = make_etag("view")
+        self.assertTrue(etag_matches(etag, etag))
+        self.assertTrue(etag_matches(etag, f'"other", W/{etag}'))
+        self.assertTrue(etag_matches(etag, "*"))
+        self.assertFalse(etag_matches(etag, '"other"'))
+        self.assertFalse(etag_matches(etag, None))
+
+    @override_settings(CACHES=LOCAL_MEMORY_CACHES)
+    def test_no_etag_with_local_memory_cache(self):
+        view = CharacterRaceView()
+        self.assertTrue(all(is_tracked(table) for table in view.get_etag_tables()))
+        self.assertIsNone(view.get_etag(Request(RequestFactory().get("/"))))
@@ -0,0 +1,41 @@
+from unittest.mock import Mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from ..counting import CachedCount, CountingPaginator
+from ..views import ManagedListView
+
+
+class TestCounting(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_cached_count(self):
+        strategy = Mock()
+        strategy.count.return_value = 42
+        counting = CachedCount(strategy)
+
+        self.assertEqual(counting.count([], key="a"), 42)
+        self.assertEqual(counting.count([], key="a"), 42)
+        strategy.count.assert_called_once()
+
+        strategy.count.return_value = 7
+        self.assertEqual(counting.count([], key="b"), 7)
+        self.assertEqual(counting.count([], key=None), 7)
+        self.assertEqual(strategy.count.call_count, 3)
+
+    def test_counting_paginator(self):
+        strategy = Mock()
+        strategy.count.return_value = 60
+        paginator = CountingPaginator(list(range(10)), 25, count_strategy=strategy, count_key="k")
+        self.assertEqual(paginator.count, 60)
+        self.assertEqual(paginator.num_pages, 3)
+        strategy.count.assert_called_once_with(paginator.object_list, "k")
+
+    def test_managed_list_count_key(self):
+        view = ManagedListView()
+        key = view.count_key({"filter": {"type": ["B", "A"]}, "search": " Orc ", "sort": {"a": 1}})
+        self.assertEqual(key, view.count_key({"filter": {"type": ["A", "B"]}, "search": "orc"}))
+        self.assertEqual(view.count_key({"filter": {"type": []}}), view.count_key({}))
+        self.assertNotEqual(key, view.count_key({"filter": {"type": ["A"]}, "search": "orc"}))
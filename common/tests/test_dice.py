@@ -0,0 +1,52 @@
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from ..dice import compile_dice, DiceNotationError, DiceTerm
+from ..rng import DiceRNG
+
+
+class TestDiceNotation(SimpleTestCase):
+    def test_compile(self):
+        plan = compile_dice("4d6kh3+2")
+        self.assertEqual(plan.terms, (DiceTerm(1, 4, 6, 0, 1),))
+        self.assertEqual(plan.modifier, 2)
+
+        plan = compile_dice("1d20 + 1d4 - 1")
+        self.assertEqual(plan.terms, (DiceTerm(1, 1, 20, 0, 0), DiceTerm(1, 1, 4, 0, 0)))
+        self.assertEqual(plan.modifier, -1)
+        self.assertEqual(plan.dice, {20: 1, 4: 1})
+
+        plan = compile_dice("-d4+5d8dh2+3-2")
+        self.assertEqual(plan.terms, (DiceTerm(-1, 1, 4, 0, 0), DiceTerm(1, 5, 8, 2, 0)))
+        self.assertEqual(plan.modifier, 1)
+
+        self.assertEqual(compile_dice("2d20kl1").terms, (DiceTerm(1, 2, 20, 1, 0),))
+        self.assertEqual(compile_dice("4d6dl").terms, (DiceTerm(1, 4, 6, 0, 1),))
+        self.assertEqual(compile_dice("7").terms, ())
+
+    def test_advantage(self):
+        self.assertEqual(compile_dice("d20adv"), compile_dice("2d20kh1"))
+        self.assertEqual(compile_dice("1d20dis+2"), compile_dice("2d20kl1+2"))
+
+    def test_compile_cached(self):
+        self.assertIs(compile_dice("3d8+4"), compile_dice("3D8 + 4"))
+
+    def test_invalid_notation(self):
+        invalid = ("", "1d", "d", "2d20adv", "1d6kh2", "fireball", "1d6+-1", "d0", "2d6+")
+        for expression in invalid + ("1d100000", "1001d6"):
+            with self.assertRaises(DiceNotationError, msg=expression):
+                compile_dice(expression)
+
+    @patch.object(DiceRNG, "choices")
+    def test_roll(self, mock_choices):
+        mock_choices.side_effect = [[5, 1, 4, 3], [2]]
+        result = compile_dice("4d6kh3-1d4+2").roll()
+        self.assertEqual(result["results"][0]["results"], [3, 4, 5])
+        self.assertEqual(result["results"][1]["results"], [2])
+        self.assertEqual(result["modifier"], 2)
+        self.assertEqual(result["total"], 12)
+
+        mock_choices.side_effect = [[20, 1, 7, 8], [3, 4]]
+        totals = compile_dice("d20adv+d4+1").totals(2)
+        self.assertEqual(totals, [24, 13])
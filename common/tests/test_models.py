@@ -0,0 +1,20 @@
+from django.test import SimpleTestCase
+
+from ..models import damage_taken
+
+
+class TestDamage(SimpleTestCase):
+    def test_damage_taken(self):
+        self.assertEqual(damage_taken(9), 9)
+        self.assertEqual(damage_taken(9, "FIRE"), 9)
+        self.assertEqual(damage_taken(9, "FIRE", resistances=["FIRE"]), 4)
+        self.assertEqual(damage_taken(9, "FIRE", resistances=["COLD"]), 9)
+        self.assertEqual(damage_taken(9, "FIRE", vulnerabilities=["FIRE"]), 18)
+        self.assertEqual(
+            damage_taken(9, "FIRE", resistances=["FIRE"], vulnerabilities=["FIRE"]), 8
+        )
+        self.assertEqual(
+            damage_taken(9, "FIRE", resistances=["FIRE"], immunities=["FIRE", "COLD"]), 0
+        )
+        # untyped damage can't be resisted
+        self.assertEqual(damage_taken(9, resistances=["FIRE"]), 9)
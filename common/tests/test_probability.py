@@ -0,0 +1,60 @@
+from itertools import product
+
+from django.test import SimpleTestCase
+
+from ..dice import compile_dice
+from ..probability import distribution
+
+
+class TestProbability(SimpleTestCase):
+    @staticmethod
+    def enumerate_pmf(expression):
+        """Brute force the distribution by enumerating every possible roll."""
+
+        plan = compile_dice(expression)
+        ranges = []
+        for term in plan.terms:
+            ranges.extend([range(1, term.faces + 1)] * term.count)
+        counts = {}
+        for rolled in product(*ranges):
+            total = plan.modifier
+            position = 0
+            for term in plan.terms:
+                dice = sorted(rolled[position:position + term.count])
+                position += term.count
+                total += term.sign * sum(dice[term.drop_lowest:term.count - term.drop_highest])
+            counts[total] = counts.get(total, 0) + 1
+        outcomes = sum(counts.values())
+        return {total: count / outcomes for total, count in counts.items()}
+
+    def test_exact_distribution(self):
+        for expression in ("2d6", "1d20+1d4-1", "4d6kh3+2", "5d4dh2", "4d6kl2", "d20adv", "-d6+2"):
+            expected = self.enumerate_pmf(expression)
+            pmf = distribution(expression).pmf()
+            self.assertEqual(set(pmf), set(expected), expression)
+            for total, probability in expected.items():
+                self.assertAlmostEqual(pmf[total], probability, msg=expression)
+
+    def test_statistics(self):
+        dist = distribution("2d6+3")
+        self.assertEqual(dist.minimum, 5)
+        self.assertEqual(dist.maximum, 15)
+        self.assertAlmostEqual(dist.mean, 10)
+        self.assertAlmostEqual(dist.variance, 35 / 6)
+        self.assertEqual(dist.percentile(50), 10)
+        self.assertEqual(dist.percentile(100), 15)
+        self.assertAlmostEqual(dist.cdf()[15], 1)
+        self.assertAlmostEqual(dist.probability_at_least(14), 3 / 36)
+
+        advantage = distribution("d20adv")
+        self.assertAlmostEqual(advantage.mean, 13.825)
+        self.assertAlmostEqual(advantage.probability_at_least(20), 39 / 400)
+
+    def test_large_expressions(self):
+        dist = distribution("40d6")
+        self.assertAlmostEqual(dist.mean, 140)
+        self.assertAlmostEqual(dist.variance, 40 * 35 / 12)
+        self.assertAlmostEqual(sum(dist.pmf().values()), 1)
+
+    def test_distribution_cached(self):
+        self.assertIs(distribution("3d8+4"), distribution(compile_dice("3d8 + 4")))
@@ -0,0 +1,66 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from ..dice import compile_dice
+from ..helpers import roll, roll_multiple_dice, roll_totals
+from ..middleware import DICE_SEED_HEADER, DiceRNGMiddleware
+from ..rng import campaign_rng, DiceRNG, get_rng, use_rng
+
+
+class TestDiceRNG(SimpleTestCase):
+    def test_seeded_rolls_replay(self):
+        first = roll(20, 10, rng=DiceRNG(42))
+        second = roll(20, 10, rng=DiceRNG(42))
+        self.assertEqual(first, second)
+
+        with use_rng(7):
+            first = [roll_multiple_dice({"6": 3, "8": 2}), compile_dice("4d6kh3").totals(5)]
+        with use_rng(7):
+            second = [roll_multiple_dice({"6": 3, "8": 2}), compile_dice("4d6kh3").totals(5)]
+        self.assertEqual(first, second)
+
+    def test_use_rng_restores_previous(self):
+        outer = get_rng()
+        with use_rng(1) as rng:
+            self.assertIs(get_rng(), rng)
+            self.assertEqual(rng.root_seed, 1)
+            with use_rng(2):
+                self.assertEqual(get_rng().root_seed, 2)
+            self.assertIs(get_rng(), rng)
+        self.assertIs(get_rng(), outer)
+
+    def test_spawn_independent_of_parent_state(self):
+        parent = DiceRNG(99)
+        child = parent.spawn("campaign", "abc")
+        parent.random()
+        self.assertEqual(parent.spawn("campaign", "abc").root_seed, child.root_seed)
+        self.assertNotEqual(parent.spawn("campaign", "xyz").root_seed, child.root_seed)
+        self.assertEqual(campaign_rng("abc", parent).root_seed, child.root_seed)
+
+    def test_split_streams_are_deterministic_in_parallel(self):
+        def totals(rng):
+            return list(roll_totals(6, 3, rolls=100, rng=rng))
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            first = list(executor.map(totals, DiceRNG(5).split(4)))
+            second = list(executor.map(totals, reversed(DiceRNG(5).split(4))))
+        self.assertEqual(first, list(reversed(second)))
+        self.assertEqual(len({tuple(t) for t in first}), 4)
+
+    def test_middleware_seed(self):
+        def view(request):
+            return HttpResponse(roll(20, 5)["total"])
+
+        middleware = DiceRNGMiddleware(view)
+        request = RequestFactory().get("/", HTTP_X_DICE_SEED="1234")
+        response = middleware(request)
+        self.assertEqual(response[DICE_SEED_HEADER], "1234")
+        self.assertEqual(middleware(request).content, response.content)
+
+        response = middleware(RequestFactory().get("/", HTTP_X_DICE_SEED="nope"))
+        replay = middleware(
+            RequestFactory().get("/", HTTP_X_DICE_SEED=response[DICE_SEED_HEADER])
+        )
+        self.assertEqual(replay.content, response.content)
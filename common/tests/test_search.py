@@ -0,0 +1,25 @@
+from django.test import SimpleTestCase
+
+from equipment.models import Tool
+from monster.models import Monster
+from ..search import ContainsSearch, FullTextSearch
+
+MONSTER_SEARCH_FIELDS = ("first_name", "last_name", "armor_class", "max_hp", "monster_type__name")
+
+
+class TestSearchBackends(SimpleTestCase):
+    def test_contains_search(self):
+        queryset = ContainsSearch().search(Monster.objects.all(), MONSTER_SEARCH_FIELDS, "12")
+        where = str(queryset.query).split("WHERE")[1]
+        self.assertIn('UPPER("monster"."first_name"::text) LIKE UPPER(%12%)', where)
+        self.assertIn('UPPER("monster_type"."name"::text) LIKE UPPER(%12%)', where)
+        # numbers are matched as substrings too
+        self.assertIn('UPPER("monster"."armor_class"::text) LIKE UPPER(%12%)', where)
+        self.assertIn('UPPER("monster"."max_hp"::text) LIKE UPPER(%12%)', where)
+
+    def test_full_text_search(self):
+        queryset = FullTextSearch().search(Tool.objects.all(), ("name", "description"), "drum")
+        sql = str(queryset.query)
+        self.assertIn("to_tsvector", sql.split("WHERE")[1])
+        self.assertIn("websearch_to_tsquery", sql)
+        self.assertNotIn("to_tsvector", sql.split("WHERE")[0])
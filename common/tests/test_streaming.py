@@ -0,0 +1,35 @@
+import json
+import uuid
+
+from django.test import SimpleTestCase
+
+from ..streaming import json_array_stream, json_object_stream, ndjson_stream
+
+
+class TestJsonStreams(SimpleTestCase):
+    def test_json_object_stream(self):
+        pk = uuid.UUID(int=1)
+        chunks = list(
+            json_object_stream(
+                [("characters", iter([{"id": pk}, {"id": None}, 3])), ("monsters", iter([]))],
+                chunk_size=2,
+            )
+        )
+        # items are encoded in chunks
+        self.assertIn('{"id": "00000000-0000-0000-0000-000000000001"},{"id": null}', chunks)
+        self.assertEqual(
+            json.loads("".join(chunks)),
+            {"characters": [{"id": str(pk)}, {"id": None}, 3], "monsters": []},
+        )
+        self.assertEqual(json.loads("".join(json_object_stream([]))), {})
+
+    def test_json_array_stream(self):
+        chunks = list(json_array_stream(iter([1, {"a": None}, "b"]), chunk_size=2))
+        self.assertEqual(chunks, ["[", '1,{"a": null}', ',"b"', "]"])
+        self.assertEqual(json.loads("".join(json_array_stream([]))), [])
+
+    def test_ndjson_stream(self):
+        pk = uuid.UUID(int=1)
+        chunks = list(ndjson_stream(iter([{"id": pk}, 2, [3]]), chunk_size=2))
+        self.assertEqual(chunks, ['{"id": "00000000-0000-0000-0000-000000000001"}\n2\n', "[3]\n"])
+        self.assertEqual(list(ndjson_stream([])), [])
@@ -1,14 +1,79 @@
-from django.core.paginator import Paginator
-from django.db.models import Q
-from drf_spectacular.utils import extend_schema
-from rest_framework.generics import GenericAPIView
+from django.db.models import prefetch_related_objects, Q
+from django.http import Http404, StreamingHttpResponse
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import GenericAPIView, ListAPIView, RetrieveAPIView
 from rest_framework.request import Request
 from rest_framework.response import Response
 
+from .conditional import ConditionalMixin
+from .counting import count_key, CountingPaginator, ExactCount
+from .pagination import CURSOR_QUERY_PARAM, KeysetPaginator
+from .reference import reference_table
+from .search import ContainsSearch
 from .serializers import ManagedListSerializer
+from .streaming import EXPORT_FORMATS, STREAM_CHUNK_SIZE
 
+EXPORT_QUERY_PARAM = "export"
+EXPORT_PARAMETER = OpenApiParameter(
+    EXPORT_QUERY_PARAM,
+    OpenApiTypes.STR,
+    enum=list(EXPORT_FORMATS),
+    description=(
+        "Stream every result, unpaginated, as a JSON array or as newline delimited JSON."
+    ),
+)
 
-class ManagedListView(GenericAPIView):
+
+class StreamingExportMixin:
+    """
+    Export the whole list, instead of a page, if the request has an export parameter:
+    `?export=json` streams a JSON array and `?export=ndjson` newline delimited JSON.
+
+    The queryset is iterated with a server-side cursor and serialized and encoded a chunk of rows
+    at a time, so memory use doesn't grow with the size of the list. Prefetches are done per
+    chunk, since QuerySet.iterator() skips them.
+
+    export_chunk_size: Rows fetched, serialized, and encoded at a time.
+    """
+
+    export_chunk_size = STREAM_CHUNK_SIZE
+
+    def export(self, request, queryset):
+        """Get a streaming response of the queryset if the request asks for one, or None."""
+
+        export_format = request.query_params.get(EXPORT_QUERY_PARAM)
+        if export_format is None:
+            return None
+        if export_format not in EXPORT_FORMATS:
+            raise ValidationError(
+                {EXPORT_QUERY_PARAM: [f'"{export_format}" is not a valid export format.']}
+            )
+        content_type, encode = EXPORT_FORMATS[export_format]
+        return StreamingHttpResponse(
+            encode(self.export_rows(queryset), self.export_chunk_size),
+            content_type=content_type,
+        )
+
+    def export_rows(self, queryset):
+        lookups = queryset._prefetch_related_lookups
+        rows = queryset.prefetch_related(None).iterator(chunk_size=self.export_chunk_size)
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == self.export_chunk_size:
+                yield from self.serialize_chunk(chunk, lookups)
+                chunk = []
+        if chunk:
+            yield from self.serialize_chunk(chunk, lookups)
+
+    def serialize_chunk(self, chunk, lookups):
+        prefetch_related_objects(chunk, *lookups)
+        return self.get_serializer(chunk, many=True).data
+
+
+class ManagedListView(StreamingExportMixin, ConditionalMixin, GenericAPIView):
     """
     Base class for list views.
     Allows sorting, filtering, searching, and paginating lists.
@@ -16,6 +81,15 @@ class ManagedListView(GenericAPIView):
     filter_options: Field and options key-value pairs where options is a list of dictionaries
     containing an identifier, 'id', and display name, 'name'.
     ordering: Default sorting order. Should end on a unique field to ensure stable order.
+    pagination_mode: "page" for page number pagination, or "keyset" to paginate with opaque
+    cursors on the ordering fields, so deep pages cost the same as the first. Requests that include
+    a cursor parameter are keyset paginated in either mode. Keyset pages don't include a count.
+    count_strategy: How page number pagination counts the results, see common.counting.
+    search_backend: How search_fields are searched, see common.search.
+    etag_tables: Models the list depends on, see common.conditional. Matching If-None-Match
+    requests get a 304 response without querying the list.
+
+    Requests with an export parameter stream every result instead, see StreamingExportMixin.
 
     """
 
@@ -27,8 +101,12 @@ class ManagedListView(GenericAPIView):
     queryset = None
     serializer_class = None
     page_size = 25
+    pagination_mode = "page"
+    count_strategy = ExactCount()
+    search_backend = ContainsSearch()
+    etag_methods = ("POST",)
 
-    @extend_schema(request=ManagedListSerializer)
+    @extend_schema(request=ManagedListSerializer, parameters=[EXPORT_PARAMETER])
     def post(self, request: Request):
         managed_serializer = ManagedListSerializer(
             data=request.data,
@@ -37,20 +115,42 @@ class ManagedListView(GenericAPIView):
         )
         managed_serializer.is_valid(raise_exception=True)
 
-        filter_query = self.filter_query(managed_serializer.validated_data.get("filter"))
-        search_query = self.search_query(managed_serializer.validated_data.get("search"))
-        queryset = self.get_queryset().filter(filter_query & search_query)
-        queryset = self.sort_queryset(managed_serializer.validated_data.get("sort"), queryset)
+        validated_data = managed_serializer.validated_data
+        filter_query = self.filter_query(validated_data.get("filter"))
+        queryset = self.get_queryset().filter(filter_query)
+        queryset = self.search_queryset(validated_data.get("search"), queryset)
+        queryset = self.sort_queryset(validated_data.get("sort"), queryset)
+
+        export = self.export(request, queryset)
+        if export is not None:
+            return export
 
-        serializer_class = self.get_serializer_class()
-        serializer = serializer_class(queryset, many=True)
-        paginated_response = self.paginate_response(request, serializer.data)
+        paginated_response = self.paginate_response(
+            request, queryset, self.count_key(validated_data)
+        )
 
         if self.filter_options:
             paginated_response["filter_options"] = self.filter_options
         return Response(paginated_response)
 
-    def paginate_response(self, request, data):
+    def count_key(self, validated_data):
+        """Key the result count by the view and its normalized filter and search parameters."""
+        filters = {
+            field: sorted(values, key=str)
+            for field, values in (validated_data.get("filter") or {}).items()
+            if values
+        }
+        search = (validated_data.get("search") or "").strip().lower()
+        return count_key(type(self).__module__, type(self).__name__, filters, search)
+
+    def paginate_response(self, request, queryset, count_key=None):
+        """
+        Paginate the queryset in the database and serialize only the requested page.
+
+        The Paginator issues a COUNT and a LIMIT/OFFSET query, so the cost of a page doesn't grow
+        with the size of the table.
+        """
+
         page_size = self.page_size
         page_size_param = request.query_params.get("page_size")
         if page_size_param:
@@ -59,6 +159,9 @@ class ManagedListView(GenericAPIView):
             except ValueError:
                 pass
 
+        if self.pagination_mode == "keyset" or CURSOR_QUERY_PARAM in request.query_params:
+            return self.keyset_paginate_response(request, queryset, page_size)
+
         page_number = 1
         page_param = request.query_params.get("page")
         if page_param:
@@ -67,11 +170,14 @@ class ManagedListView(GenericAPIView):
             except ValueError:
                 pass
 
-        p = Paginator(data, page_size)
+        p = CountingPaginator(
+            queryset, page_size, count_strategy=self.count_strategy, count_key=count_key
+        )
         page = p.page(page_number)
+        serializer = self.get_serializer(page.object_list, many=True)
         pagination = {
             "count": p.count,
-            "results": page.object_list,
+            "results": serializer.data,
         }
         if page.has_next():
             pagination["next"] = f"?page={page.next_page_number()}&page_size={page_size}"
@@ -79,6 +185,17 @@ class ManagedListView(GenericAPIView):
             pagination["previous"] = f"?page={page.previous_page_number()}&page_size={page_size}"
         return pagination
 
+    def keyset_paginate_response(self, request, queryset, page_size):
+        paginator = KeysetPaginator(queryset, page_size)
+        page = paginator.page(request.query_params.get(CURSOR_QUERY_PARAM))
+        serializer = self.get_serializer(page.object_list, many=True)
+        pagination = {"results": serializer.data}
+        if page.has_next():
+            pagination["next"] = f"?cursor={page.next_cursor}&page_size={page_size}"
+        if page.has_previous():
+            pagination["previous"] = f"?cursor={page.previous_cursor}&page_size={page_size}"
+        return pagination
+
     def filter_query(self, filters: dict):
         filter_query = Q()
         if filters:
@@ -89,15 +206,13 @@ class ManagedListView(GenericAPIView):
                 filter_query &= field_query
         return filter_query
 
-    def search_query(self, search: str):
-        search_query = Q()
+    def search_queryset(self, search: str, queryset):
         if search:
             search = search.strip()
         if search:
             # strip() could return empty string
-            for field in self.search_fields:
-                search_query |= Q(**{f"{field}__icontains": search})
-        return search_query
+            queryset = self.search_backend.search(queryset, self.search_fields, search)
+        return queryset
 
     def sort_queryset(self, sorting, queryset):
         order = self.ordering.copy()
@@ -108,3 +223,44 @@ class ManagedListView(GenericAPIView):
                 direction = "" if ascending else "-"
                 order.insert(0, f"{direction}{field}")
         return queryset.order_by(*order)
+
+
+class StreamingListAPIView(StreamingExportMixin, ListAPIView):
+    """
+    List view that streams the whole filtered and ordered list if the request has an export
+    parameter, see StreamingExportMixin.
+    """
+
+    @extend_schema(parameters=[EXPORT_PARAMETER])
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        export = self.export(request, self.filter_queryset(self.get_queryset()))
+        if export is not None:
+            return export
+        return super().list(request, *args, **kwargs)
+
+
+class ReferenceRetrieveAPIView(ConditionalMixin, RetrieveAPIView):
+    """
+    Retrieve view for static tables, serving the object from the in-process reference cache
+    instead of querying it, see common.reference.
+
+    The queryset's model should have a ReferenceTable registered. Responses get an ETag from the
+    versions of the tables cached in it.
+    """
+
+    def get_etag_tables(self):
+        if self.etag_tables is not None:
+            return self.etag_tables
+        return reference_table(self.queryset.model).models
+
+    def get_object(self):
+        table = reference_table(self.queryset.model)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        instance = table.get(self.kwargs[lookup_url_kwarg])
+        if instance is None:
+            raise Http404
+        self.check_object_permissions(self.request, instance)
+        return instance
@@ -0,0 +1,7 @@
+from django.contrib import admin
+
+from .models import Encounter, Participant
+
+
+admin.site.register(Encounter)
+admin.site.register(Participant)
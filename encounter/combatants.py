@@ -0,0 +1,96 @@
+"""
+Build encounter.simulation combatants from characters and monsters.
+"""
+
+from common.helpers import ability_modifier, proficiency_bonus
+from equipment.models import CharacterWeapon, Weapon
+from equipment.reference import weapons
+from .simulation import MONSTERS, PARTY, Combatant
+
+RANGED_WEAPONS = (Weapon.SIMPLE_RANGED, Weapon.MARTIAL_RANGED)
+
+
+def weapon_attack(weapon, strength, dexterity):
+    """
+    Get the attack modifier of a weapon: dexterity for ranged weapons, strength for melee
+    weapons, and the better of the two for finesse weapons.
+    """
+
+    strength, dexterity = ability_modifier(strength), ability_modifier(dexterity)
+    if weapon.weapon_type in RANGED_WEAPONS:
+        return dexterity
+    if weapon.finesse:
+        return max(strength, dexterity)
+    return strength
+
+
+def character_combatant(character, equipped_weapons=()):
+    """
+    Build a character's combatant, attacking with their best equipped weapon.
+
+    Characters without an equipped weapon make unarmed strikes, dealing 1 plus their strength
+    modifier.
+    """
+
+    # unarmed strike
+    attack = ability_modifier(character.strength)
+    die, die_count, damage = 1, 0, attack + 1
+    best = None
+    for weapon in equipped_weapons:
+        modifier = weapon_attack(weapon, character.strength, character.dexterity)
+        average = weapon.damage_die_count * (weapon.damage_die + 1) / 2 + modifier
+        if best is None or average > best:
+            best = average
+            attack = damage = modifier
+            die, die_count = weapon.damage_die, weapon.damage_die_count
+    return Combatant(
+        name=str(character),
+        side=PARTY,
+        max_hp=character.max_hp,
+        armor_class=character.armor_class,
+        initiative_modifier=ability_modifier(character.dexterity),
+        attack_bonus=attack + proficiency_bonus(character.level),
+        damage_die=die,
+        damage_die_count=die_count,
+        damage_modifier=damage,
+    )
+
+
+def monster_combatant(monster):
+    """
+    Build a monster's combatant.
+
+    Monsters have no weapons or actions yet, so they attack with a natural weapon dealing one of
+    their type's hit dice plus their strength modifier, with a proficiency bonus by hit dice.
+    """
+
+    monster_type = monster.monster_type
+    modifier = ability_modifier(monster.strength)
+    return Combatant(
+        name=str(monster),
+        side=MONSTERS,
+        max_hp=monster.max_hp,
+        armor_class=monster.armor_class,
+        initiative_modifier=ability_modifier(monster.dexterity),
+        attack_bonus=modifier + proficiency_bonus(monster_type.hit_die_count),
+        damage_die=monster_type.hit_die,
+        damage_die_count=1,
+        damage_modifier=modifier,
+    )
+
+
+def load_party(characters):
+    """Build the characters' combatants, looking up their equipped weapons in one query."""
+
+    equipped = {}
+    rows = CharacterWeapon.objects.filter(character__in=characters, equipped=True)
+    for character_id, weapon_id in rows.values_list("character_id", "weapon_id"):
+        equipped.setdefault(character_id, []).append(weapons.get(weapon_id))
+    return [
+        character_combatant(character, equipped.get(character.pk, ()))
+        for character in characters
+    ]
+
+
+def load_monsters(monsters):
+    return [monster_combatant(monster) for monster in monsters]
@@ -0,0 +1,212 @@
+"""
+Encounter difficulty, following the Dungeon Master's Guide's encounter building rules.
+
+A horde of monsters is worth the experience points of their challenge ratings. Multiplied by a
+factor for the number of monsters, adjusted for the size of the party, that total is compared
+with the party's summed XP thresholds for each difficulty. The lookup tables are built once, when
+the module is imported, and the party's thresholds are summed in SQL in a single aggregate query.
+
+Monster types don't have a challenge rating yet, so it's estimated from their defense: the CR
+whose hit points range holds the type's average hit points, moved a step for every 2 points of
+armor class above or below the CR's expected armor class.
+"""
+
+from bisect import bisect_left
+
+from django.db.models import Case, Count, IntegerField, Q, Sum, Value, When
+
+from character.models import Character
+
+TRIVIAL = "TRIVIAL"
+EASY = "EASY"
+MEDIUM = "MEDIUM"
+HARD = "HARD"
+DEADLY = "DEADLY"
+DIFFICULTY_CHOICES = (
+    (TRIVIAL, "Trivial"),
+    (EASY, "Easy"),
+    (MEDIUM, "Medium"),
+    (HARD, "Hard"),
+    (DEADLY, "Deadly"),
+)
+THRESHOLDS = (EASY, MEDIUM, HARD, DEADLY)
+# highest level with XP thresholds, not the highest level a character can reach
+THRESHOLD_MAX_LEVEL = 20
+
+# (easy, medium, hard, deadly) XP thresholds of a character of each level
+LEVEL_THRESHOLDS = {
+    1: (25, 50, 75, 100),
+    2: (50, 100, 150, 200),
+    3: (75, 150, 225, 400),
+    4: (125, 250, 375, 500),
+    5: (250, 500, 750, 1100),
+    6: (300, 600, 900, 1400),
+    7: (350, 750, 1100, 1700),
+    8: (450, 900, 1400, 2100),
+    9: (550, 1100, 1600, 2400),
+    10: (600, 1200, 1900, 2800),
+    11: (800, 1600, 2400, 3600),
+    12: (1000, 2000, 3000, 4500),
+    13: (1100, 2200, 3400, 5100),
+    14: (1250, 2500, 3800, 5700),
+    15: (1400, 2800, 4300, 6400),
+    16: (1600, 3200, 4800, 7200),
+    17: (2000, 3900, 5900, 8800),
+    18: (2100, 4200, 6300, 9500),
+    19: (2400, 4900, 7300, 10900),
+    20: (2800, 5700, 8500, 12700),
+}
+# experience points needed to reach each level
+LEVEL_EXPERIENCE_POINTS = {
+    2: 300,
+    3: 900,
+    4: 2700,
+    5: 6500,
+    6: 14000,
+    7: 23000,
+    8: 34000,
+    9: 48000,
+    10: 64000,
+    11: 85000,
+    12: 100000,
+    13: 120000,
+    14: 140000,
+    15: 165000,
+    16: 195000,
+    17: 225000,
+    18: 265000,
+    19: 305000,
+    20: 355000,
+}
+# (challenge rating, experience points, most hit points, expected armor class)
+CHALLENGE_RATINGS = (
+    ("0", 10, 6, 13),
+    ("1/8", 25, 35, 13),
+    ("1/4", 50, 49, 13),
+    ("1/2", 100, 70, 13),
+    ("1", 200, 85, 13),
+    ("2", 450, 100, 13),
+    ("3", 700, 115, 13),
+    ("4", 1100, 130, 14),
+    ("5", 1800, 145, 15),
+    ("6", 2300, 160, 15),
+    ("7", 2900, 175, 15),
+    ("8", 3900, 190, 16),
+    ("9", 5000, 205, 16),
+    ("10", 5900, 220, 17),
+    ("11", 7200, 235, 17),
+    ("12", 8400, 250, 17),
+    ("13", 10000, 265, 18),
+    ("14", 11500, 280, 18),
+    ("15", 13000, 295, 18),
+    ("16", 15000, 310, 18),
+    ("17", 18000, 325, 19),
+    ("18", 20000, 340, 19),
+    ("19", 22000, 355, 19),
+    ("20", 25000, 400, 19),
+    ("21", 33000, 445, 19),
+    ("22", 41000, 490, 19),
+    ("23", 50000, 535, 19),
+    ("24", 62000, 580, 19),
+    ("25", 75000, 625, 19),
+    ("26", 90000, 670, 19),
+    ("27", 105000, 715, 19),
+    ("28", 120000, 760, 19),
+    ("29", 135000, 805, 19),
+    ("30", 155000, 850, 19),
+)
+_MOST_HIT_POINTS = [hit_points for _, _, hit_points, _ in CHALLENGE_RATINGS]
+# encounter multipliers, and the most monsters each of them applies to
+MULTIPLIERS = (0.5, 1, 1.5, 2, 2.5, 3, 4, 5)
+_MOST_MONSTERS = (0, 1, 2, 6, 10, 14)
+
+_THRESHOLD_SUMS = {
+    difficulty.lower(): Sum(
+        Case(
+            *[
+                When(level=level, then=Value(thresholds[i]))
+                for level, thresholds in LEVEL_THRESHOLDS.items()
+            ],
+            # characters past THRESHOLD_MAX_LEVEL count as that level
+            default=Value(LEVEL_THRESHOLDS[THRESHOLD_MAX_LEVEL][i]),
+            output_field=IntegerField(),
+        )
+    )
+    for i, difficulty in enumerate(THRESHOLDS)
+}
+_NEXT_LEVEL_EXPERIENCE_POINTS = Case(
+    *[When(level=level - 1, then=Value(xp)) for level, xp in LEVEL_EXPERIENCE_POINTS.items()],
+    default=None,
+    output_field=IntegerField(),
+)
+
+
+def challenge_rating(monster_type):
+    """Estimate a monster type's (challenge rating, experience points) from its defense."""
+
+    index = min(
+        bisect_left(_MOST_HIT_POINTS, monster_type.average_hit_points()),
+        len(CHALLENGE_RATINGS) - 1,
+    )
+    armor_class_difference = monster_type.armor_class - CHALLENGE_RATINGS[index][3]
+    index += int(armor_class_difference / 2)
+    rating, experience_points, _, _ = CHALLENGE_RATINGS[
+        max(min(index, len(CHALLENGE_RATINGS) - 1), 0)
+    ]
+    return rating, experience_points
+
+
+def encounter_multiplier(monster_count, party_size):
+    """
+    Get the multiplier of the monsters' XP for the encounter's difficulty.
+
+    Parties of fewer than 3 characters use the next higher multiplier, and parties of 6 or more
+    the next lower one.
+    """
+
+    index = bisect_left(_MOST_MONSTERS, monster_count)
+    if party_size < 3:
+        index += 1
+    elif party_size >= 6:
+        index -= 1
+    return MULTIPLIERS[min(max(index, 0), len(MULTIPLIERS) - 1)]
+
+
+def rate_encounter(characters, monsters):
+    """
+    Rate the difficulty of an encounter between characters and a horde of monsters.
+
+    `characters` are character ids and `monsters` are (MonsterType, count) pairs. Returns the
+    party's XP thresholds, the monsters' XP before and after the encounter multiplier, the
+    difficulty, and the XP each character earns for defeating the monsters along with how many
+    characters that levels up. Raises ValueError if any of the characters don't exist.
+    """
+
+    characters = set(characters)
+    monster_count = sum(count for _, count in monsters)
+    experience_points = sum(challenge_rating(t)[1] * count for t, count in monsters)
+    share = experience_points // len(characters) if characters else 0
+    party = Character.objects.filter(pk__in=characters).aggregate(
+        size=Count("id"),
+        levelling_up=Count(
+            "id", filter=Q(experience_points__gte=_NEXT_LEVEL_EXPERIENCE_POINTS - share)
+        ),
+        **_THRESHOLD_SUMS,
+    )
+    if party["size"] != len(characters):
+        raise ValueError("Not all of the characters exist.")
+
+    thresholds = {difficulty: party[difficulty] or 0 for difficulty in _THRESHOLD_SUMS}
+    adjusted = int(experience_points * encounter_multiplier(monster_count, party["size"]))
+    difficulty = TRIVIAL
+    for threshold in THRESHOLDS:
+        if monster_count and adjusted >= thresholds[threshold.lower()]:
+            difficulty = threshold
+    return {
+        "difficulty": difficulty,
+        "thresholds": thresholds,
+        "experience_points": experience_points,
+        "adjusted_experience_points": adjusted,
+        "experience_points_per_character": share,
+        "characters_levelling_up": party["levelling_up"],
+    }
@@ -0,0 +1,55 @@
+import os
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from common.rng import DiceRNG
+from encounter.simulation import MONSTERS, PARTY, Combatant, simulate
+
+PARTY_COMBATANTS = [
+    Combatant("Fighter", PARTY, 44, 18, 1, 6, 8, 1, 4),
+    Combatant("Rogue", PARTY, 31, 15, 4, 7, 6, 1, 4),
+    Combatant("Cleric", PARTY, 38, 18, 0, 5, 6, 1, 3),
+    Combatant("Wizard", PARTY, 27, 12, 2, 6, 10, 1, 0),
+]
+MONSTER_COMBATANT = Combatant("Hobgoblin", MONSTERS, 11, 18, 1, 3, 8, 1, 1)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark encounter simulations per second as the runs are spread over more worker "
+        "processes. Simulates a level 5 party against a band of hobgoblins."
+    )
+
+    def add_arguments(self, parser):
+        cpus = os.cpu_count() or 1
+        parser.add_argument(
+            "--workers",
+            nargs="+",
+            type=int,
+            default=sorted({1, 2, 4, 8, cpus} & set(range(1, cpus + 1))),
+            help="Worker process counts to benchmark.",
+        )
+        parser.add_argument("--runs", type=int, default=20000, help="Simulations to run.")
+        parser.add_argument("--monsters", type=int, default=8, help="Hobgoblins in the band.")
+        parser.add_argument("--seed", type=int, default=None)
+
+    def handle(self, *args, **options):
+        runs = options["runs"]
+        monsters = [MONSTER_COMBATANT] * options["monsters"]
+        self.stdout.write(f"{'workers':>8}{'seconds':>10}{'runs/sec':>12}{'speedup':>9}")
+        baseline = None
+        for workers in options["workers"]:
+            rng = DiceRNG(options["seed"])
+            start = perf_counter()
+            result = simulate(PARTY_COMBATANTS, monsters, runs=runs, workers=workers, rng=rng)
+            seconds = perf_counter() - start
+            rate = runs / seconds
+            baseline = baseline or rate
+            self.stdout.write(
+                f"{workers:>8}{seconds:>10.2f}{rate:>12.0f}{rate / baseline:>8.2f}x"
+            )
+        self.stdout.write(
+            f"party win rate {result['party_win_rate']:.1%}, "
+            f"mean rounds {result['mean_rounds']:.1f}"
+        )
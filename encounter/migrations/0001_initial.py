@@ -0,0 +1,70 @@
+# Generated by Django 3.2 on 2026-10-17 14:59
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('character', '0013_carried_weight'),
+        ('monster', '0010_search_indexes'),
+        ('campaign', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Encounter',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=50)),
+                ('round', models.PositiveIntegerField(default=0)),
+                ('participants_version', models.PositiveIntegerField(default=0)),
+                ('campaign', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='campaign.campaign')),
+            ],
+            options={
+                'db_table': 'encounter',
+                'ordering': ('name',),
+            },
+        ),
+        migrations.CreateModel(
+            name='Participant',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, primary_key=True, serialize=False)),
+                ('initiative', models.SmallIntegerField()),
+                ('initiative_modifier', models.SmallIntegerField(default=0)),
+                ('acted_round', models.PositiveIntegerField(blank=True, null=True)),
+                ('joined', models.DateTimeField(default=django.utils.timezone.now)),
+                ('conditions', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(choices=[('BLINDED', 'Blinded'), ('CHARMED', 'Charmed'), ('DEAFENED', 'Deafened'), ('EXHAUSTION', 'Exhaustion'), ('FRIGHTENED', 'Frightened'), ('GRAPPLED', 'Grappled'), ('INCAPACITATED', 'Incapacitated'), ('INVISIBLE', 'Invisible'), ('PARALYZED', 'Paralyzed'), ('PETRIFIED', 'Petrified'), ('POISONED', 'Poisoned'), ('PRONE', 'Prone'), ('RESTRAINED', 'Restrained'), ('STUNNED', 'Stunned'), ('UNCONSCIOUS', 'Unconscious')], max_length=13), blank=True, default=list, size=None)),
+                ('character', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='character.character')),
+                ('encounter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participants', to='encounter.encounter')),
+                ('monster', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='monster.monster')),
+            ],
+            options={
+                'db_table': 'encounter_participant',
+                'ordering': ('-initiative', '-initiative_modifier', 'joined', 'id'),
+            },
+        ),
+        migrations.AddField(
+            model_name='encounter',
+            name='turn',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='encounter.participant'),
+        ),
+        migrations.AddConstraint(
+            model_name='participant',
+            constraint=models.CheckConstraint(check=models.Q(models.Q(('character__isnull', False), ('monster__isnull', True)), models.Q(('character__isnull', True), ('monster__isnull', False)), _connector='OR'), name='participant_character_or_monster'),
+        ),
+        migrations.AddConstraint(
+            model_name='participant',
+            constraint=models.UniqueConstraint(fields=('encounter', 'character'), name='unique_encounter_character'),
+        ),
+        migrations.AddConstraint(
+            model_name='participant',
+            constraint=models.UniqueConstraint(fields=('encounter', 'monster'), name='unique_encounter_monster'),
+        ),
+    ]
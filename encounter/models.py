@@ -0,0 +1,221 @@
+from django.contrib.postgres.fields import ArrayField
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+import uuid
+
+from common.dice import compile_dice
+from common.helpers import ability_modifier
+from .tracker import InitiativeTracker
+
+
+class Encounter(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4)
+    name = models.CharField(max_length=50)
+    campaign = models.ForeignKey(
+        "campaign.Campaign", on_delete=models.CASCADE, null=True, blank=True
+    )
+    # 0 until the first turn
+    round = models.PositiveIntegerField(default=0)
+    turn = models.ForeignKey(
+        "Participant", on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    # incremented when participants join, leave, or delay their turn, see participants_changed()
+    participants_version = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = "encounter"
+        ordering = ("name", )
+
+    def __str__(self):
+        return self.name
+
+    def tracker(self, participants=None):
+        """
+        Get the encounter's turn order as an InitiativeTracker.
+
+        Participants are loaded in turn order, so building the heaps doesn't need to sort them.
+        Running encounters keep their tracker between turns, see EncounterState.turn_order().
+        """
+
+        if participants is None:
+            participants = self.participants.all()
+        tracker = InitiativeTracker(self.round)
+        for participant in participants:
+            if participant.id == self.turn_id:
+                tracker.add_current(
+                    participant.id, participant.initiative, participant.initiative_modifier
+                )
+            else:
+                tracker.add(
+                    participant.id,
+                    participant.initiative,
+                    participant.initiative_modifier,
+                    acted=participant.acted_round == self.round,
+                )
+        return tracker
+
+    def participants_changed(self, update_fields=()):
+        """
+        Increment participants_version after participants joined, left, or delayed their turn,
+        so processes keeping the turn order load it again, see EncounterState.turn_order().
+        """
+
+        self.participants_version += 1
+        self.save(update_fields=["participants_version", *update_fields])
+
+    def add_participants(self, characters=(), monsters=(), rng=None):
+        """
+        Roll initiative for characters and monsters and add them to the encounter.
+
+        Initiative is a d20 roll plus the dexterity modifier, rolled for everyone at once.
+        Participants joining after their turn would have passed this round act next round.
+        Raises ValueError if any of them are already in the encounter.
+        """
+
+        creatures = [("character", c) for c in characters] + [("monster", m) for m in monsters]
+        existing = list(self.participants.all())
+        present = {p.character_id or p.monster_id for p in existing}
+        for field, creature in creatures:
+            if creature.pk in present:
+                raise ValueError(f"{creature} is already in the encounter.")
+            present.add(creature.pk)
+        rolls = compile_dice("d20").totals(len(creatures), rng)
+        tracker = self.tracker(existing)
+        participants = []
+        for (field, creature), roll in zip(creatures, rolls):
+            modifier = ability_modifier(creature.dexterity)
+            participant = Participant(
+                encounter=self,
+                initiative=roll + modifier,
+                initiative_modifier=modifier,
+                **{field: creature},
+            )
+            tracker.add(participant.id, participant.initiative, modifier)
+            if tracker.acted(participant.id):
+                participant.acted_round = self.round
+            participants.append(participant)
+        participants = Participant.objects.bulk_create(participants)
+        self.participants_changed()
+        return participants
+
+    def next_turn(self, tracker=None):
+        """
+        End the current turn and start the next one, returning the tracker.
+
+        Pass the encounter's tracker to advance it in place instead of loading the participants.
+        Only the participant ending its turn and the encounter are updated, as participants that
+        acted in an earlier round haven't acted in this one.
+        """
+
+        if tracker is None:
+            tracker = self.tracker()
+        previous = tracker.current
+        self.turn_id = tracker.next()
+        if previous is not None:
+            Participant.objects.filter(pk=previous).update(acted_round=self.round)
+        self.round = tracker.round
+        self.save(update_fields=["round", "turn"])
+        return tracker
+
+    def delay_turn(self, participant, initiative, tracker=None):
+        """
+        Delay a participant's turn until later in the round, at a lower initiative.
+
+        Pass the encounter's tracker to change it in place instead of loading the participants.
+        Raises ValueError if the participant already acted this round, or the initiative isn't
+        later in the round.
+        """
+
+        if tracker is None:
+            tracker = self.tracker()
+        tracker.delay(participant.id, initiative, participant.initiative_modifier)
+        participant.initiative = initiative
+        # ties are broken by who joined the turn order first
+        participant.joined = timezone.now()
+        participant.save(update_fields=["initiative", "joined"])
+        if self.turn_id == participant.id:
+            self.turn = None
+            self.participants_changed(update_fields=["turn"])
+        else:
+            self.participants_changed()
+        return tracker
+
+
+class Participant(models.Model):
+    BLINDED = "BLINDED"
+    CHARMED = "CHARMED"
+    DEAFENED = "DEAFENED"
+    EXHAUSTION = "EXHAUSTION"
+    FRIGHTENED = "FRIGHTENED"
+    GRAPPLED = "GRAPPLED"
+    INCAPACITATED = "INCAPACITATED"
+    INVISIBLE = "INVISIBLE"
+    PARALYZED = "PARALYZED"
+    PETRIFIED = "PETRIFIED"
+    POISONED = "POISONED"
+    PRONE = "PRONE"
+    RESTRAINED = "RESTRAINED"
+    STUNNED = "STUNNED"
+    UNCONSCIOUS = "UNCONSCIOUS"
+    CONDITION_CHOICES = (
+        (BLINDED, "Blinded"),
+        (CHARMED, "Charmed"),
+        (DEAFENED, "Deafened"),
+        (EXHAUSTION, "Exhaustion"),
+        (FRIGHTENED, "Frightened"),
+        (GRAPPLED, "Grappled"),
+        (INCAPACITATED, "Incapacitated"),
+        (INVISIBLE, "Invisible"),
+        (PARALYZED, "Paralyzed"),
+        (PETRIFIED, "Petrified"),
+        (POISONED, "Poisoned"),
+        (PRONE, "Prone"),
+        (RESTRAINED, "Restrained"),
+        (STUNNED, "Stunned"),
+        (UNCONSCIOUS, "Unconscious"),
+    )
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4)
+    encounter = models.ForeignKey(
+        "Encounter", on_delete=models.CASCADE, related_name="participants"
+    )
+    character = models.ForeignKey(
+        "character.Character", on_delete=models.CASCADE, null=True, blank=True
+    )
+    monster = models.ForeignKey("monster.Monster", on_delete=models.CASCADE, null=True, blank=True)
+    initiative = models.SmallIntegerField()
+    initiative_modifier = models.SmallIntegerField(default=0)
+    # the last round the participant took its turn in
+    acted_round = models.PositiveIntegerField(null=True, blank=True)
+    joined = models.DateTimeField(default=timezone.now)
+    conditions = ArrayField(
+        models.CharField(max_length=13, choices=CONDITION_CHOICES), default=list, blank=True
+    )
+
+    class Meta:
+        db_table = "encounter_participant"
+        # turn order
+        ordering = ("-initiative", "-initiative_modifier", "joined", "id")
+        constraints = [
+            models.CheckConstraint(
+                check=(
+                    Q(character__isnull=False, monster__isnull=True)
+                    | Q(character__isnull=True, monster__isnull=False)
+                ),
+                name="participant_character_or_monster",
+            ),
+            models.UniqueConstraint(
+                fields=["encounter", "character"], name="unique_encounter_character"
+            ),
+            models.UniqueConstraint(
+                fields=["encounter", "monster"], name="unique_encounter_monster"
+            ),
+        ]
+
+    def __str__(self):
+        return str(self.character or self.monster)
+
+    @property
+    def acted(self):
+        """Whether the participant has taken its turn this round."""
+        return self.acted_round is not None and self.acted_round == self.encounter.round
@@ -0,0 +1,201 @@
+from django.conf import settings
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+from campaign.models import Campaign
+from common.models import DamageMixin
+from character.models import Character
+from monster.models import Monster
+from monster.reference import monster_types
+from .difficulty import DIFFICULTY_CHOICES
+from .models import Encounter, Participant
+
+
+class ParticipantSerializer(serializers.ModelSerializer):
+    """
+    Serialize an encounter participant's initiative.
+    """
+
+    name = serializers.CharField(source="__str__", read_only=True)
+    acted = serializers.BooleanField(read_only=True)
+
+    class Meta:
+        model = Participant
+        fields = [
+            "id",
+            "character",
+            "monster",
+            "name",
+            "initiative",
+            "initiative_modifier",
+            "acted",
+        ]
+
+
+class EncounterSerializer(serializers.ModelSerializer):
+    """
+    Serialize an encounter with its participants in turn order.
+
+    Expects the participants in the encounter's `turn_order` attribute.
+    """
+
+    participants = ParticipantSerializer(source="turn_order", many=True, read_only=True)
+
+    class Meta:
+        model = Encounter
+        fields = ["id", "name", "campaign", "round", "turn", "participants"]
+
+
+class EncounterParticipantsSerializer(serializers.Serializer):
+    """
+    Validate the characters and monsters joining an encounter, fetching each kind in one query.
+    """
+
+    characters = serializers.ListField(child=serializers.UUIDField(), default=list)
+    monsters = serializers.ListField(child=serializers.UUIDField(), default=list)
+
+    @staticmethod
+    def _creatures(queryset, pks):
+        creatures = queryset.in_bulk(pks)
+        missing = [str(pk) for pk in pks if pk not in creatures]
+        if missing:
+            raise ValidationError(f"Not found: {', '.join(missing)}")
+        return [creatures[pk] for pk in dict.fromkeys(pks)]
+
+    def validate_characters(self, value):
+        return self._creatures(Character.objects.all(), value)
+
+    def validate_monsters(self, value):
+        return self._creatures(Monster.objects.select_related("monster_type"), value)
+
+
+class EncounterAddSerializer(EncounterParticipantsSerializer):
+    """
+    Validate a new encounter and its participants.
+    """
+
+    name = serializers.CharField(max_length=50)
+    campaign = serializers.PrimaryKeyRelatedField(
+        queryset=Campaign.objects.all(), required=False, allow_null=True, default=None
+    )
+
+
+class SimulationRequestSerializer(EncounterParticipantsSerializer):
+    """
+    Validate a simulation of a party of characters against monsters.
+    """
+
+    runs = serializers.IntegerField(min_value=1, max_value=20000, default=1000)
+    max_rounds = serializers.IntegerField(min_value=1, max_value=1000, default=100)
+    workers = serializers.IntegerField(
+        min_value=1, max_value=settings.SIMULATION_MAX_WORKERS, default=1
+    )
+
+    def validate(self, attrs):
+        if not attrs["characters"] or not attrs["monsters"]:
+            raise ValidationError("A simulation needs both characters and monsters.")
+        return attrs
+
+
+class SimulationSerializer(serializers.Serializer):
+    """
+    Serialize the distribution of simulated encounter outcomes, see encounter.simulation.
+    """
+
+    runs = serializers.IntegerField()
+    party_win_rate = serializers.FloatField()
+    monsters_win_rate = serializers.FloatField()
+    draw_rate = serializers.FloatField()
+    mean_rounds = serializers.FloatField()
+    rounds = serializers.DictField(child=serializers.IntegerField())
+    party_survivors = serializers.DictField(child=serializers.IntegerField())
+
+
+class HordeMonsterSerializer(serializers.Serializer):
+    monster_type = serializers.UUIDField()
+    count = serializers.IntegerField(min_value=1, max_value=1000, default=1)
+
+    def validate_monster_type(self, value):
+        monster_type = monster_types.get(value)
+        if monster_type is None:
+            raise ValidationError(f"Not found: {value}")
+        return monster_type
+
+
+class DifficultyRequestSerializer(serializers.Serializer):
+    """
+    Validate a party of characters and a horde of monster types to rate.
+    """
+
+    characters = serializers.ListField(child=serializers.UUIDField(), min_length=1)
+    monsters = HordeMonsterSerializer(many=True)
+
+
+class DifficultyThresholdsSerializer(serializers.Serializer):
+    easy = serializers.IntegerField()
+    medium = serializers.IntegerField()
+    hard = serializers.IntegerField()
+    deadly = serializers.IntegerField()
+
+
+class DifficultySerializer(serializers.Serializer):
+    """
+    Serialize the difficulty of an encounter, see encounter.difficulty.
+    """
+
+    difficulty = serializers.ChoiceField(choices=DIFFICULTY_CHOICES)
+    thresholds = DifficultyThresholdsSerializer()
+    experience_points = serializers.IntegerField()
+    adjusted_experience_points = serializers.IntegerField()
+    experience_points_per_character = serializers.IntegerField()
+    characters_levelling_up = serializers.IntegerField()
+
+
+class DelayTurnSerializer(serializers.Serializer):
+    initiative = serializers.IntegerField(min_value=-32768, max_value=32767)
+
+
+class ParticipantStateSerializer(serializers.Serializer):
+    """
+    Serialize a participant's combat state, see encounter.state.
+    """
+
+    id = serializers.UUIDField()
+    current_hp = serializers.IntegerField()
+    max_hp = serializers.IntegerField()
+    temporary_hp = serializers.IntegerField()
+    conditions = serializers.ListField(
+        child=serializers.ChoiceField(choices=Participant.CONDITION_CHOICES)
+    )
+
+
+class ParticipantAdjustHealthSerializer(serializers.Serializer):
+    max_hp = serializers.IntegerField(default=0)
+    add_constitution_to_max_hp = serializers.BooleanField(default=False)
+    current_hp = serializers.IntegerField(default=0)
+    temporary_hp = serializers.IntegerField(default=0)
+
+
+class ParticipantDamageSerializer(serializers.Serializer):
+    damage = serializers.IntegerField(min_value=0)
+    damage_type = serializers.ChoiceField(
+        choices=DamageMixin.DAMAGE_TYPE_CHOICES, allow_null=True, default=None
+    )
+    resistances = serializers.ListField(
+        child=serializers.ChoiceField(choices=DamageMixin.DAMAGE_TYPE_CHOICES), default=list
+    )
+    vulnerabilities = serializers.ListField(
+        child=serializers.ChoiceField(choices=DamageMixin.DAMAGE_TYPE_CHOICES), default=list
+    )
+    immunities = serializers.ListField(
+        child=serializers.ChoiceField(choices=DamageMixin.DAMAGE_TYPE_CHOICES), default=list
+    )
+
+
+class ParticipantConditionsSerializer(serializers.Serializer):
+    add = serializers.ListField(
+        child=serializers.ChoiceField(choices=Participant.CONDITION_CHOICES), default=list
+    )
+    remove = serializers.ListField(
+        child=serializers.ChoiceField(choices=Participant.CONDITION_CHOICES), default=list
+    )
@@ -0,0 +1,163 @@
+"""
+Monte Carlo simulation of encounters.
+
+Combatants are plain tuples, see encounter.combatants to build them from characters and monsters,
+so simulations can run in worker processes without the database. Each run rolls initiative, then
+every standing combatant attacks a random standing enemy in initiative order until one side falls
+or `max_rounds` pass. Attack and damage dice are rolled for several rounds at once, and hit points
+are kept in an array.
+"""
+
+from array import array
+from collections import Counter, defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from common.helpers import roll_totals
+from common.rng import DiceRNG, get_rng
+
+PARTY = 0
+MONSTERS = 1
+PARTY_WIN = "party"
+MONSTERS_WIN = "monsters"
+DRAW = "draw"
+# rounds of attack and damage rolls drawn at once
+ROUNDS_PER_DRAW = 8
+
+Combatant = namedtuple(
+    "Combatant",
+    [
+        "name",
+        "side",
+        "max_hp",
+        "armor_class",
+        "initiative_modifier",
+        "attack_bonus",
+        "damage_die",
+        "damage_die_count",
+        "damage_modifier",
+    ],
+)
+
+
+def _draw_rounds(count, dice, rng):
+    """Roll every combatant's attack and damage for the next ROUNDS_PER_DRAW rounds."""
+
+    attacks = roll_totals(20, 1, count * ROUNDS_PER_DRAW, rng=rng)
+    damage = [0] * (count * ROUNDS_PER_DRAW)
+    for (faces, dice_count), members in dice.items():
+        totals = iter(roll_totals(faces, dice_count, len(members) * ROUNDS_PER_DRAW, rng=rng))
+        for offset in range(0, count * ROUNDS_PER_DRAW, count):
+            for i in members:
+                damage[offset + i] = next(totals)
+    return attacks, damage
+
+
+def _simulate_runs(combatants, runs, seed, max_rounds):
+    """Simulate `runs` combats, returning the counts of outcomes, rounds, and party survivors."""
+
+    rng = DiceRNG(seed)
+    count = len(combatants)
+    max_hp = array("l", (c.max_hp for c in combatants))
+    sides = [c.side for c in combatants]
+    armor_class = [c.armor_class for c in combatants]
+    attack_bonus = [c.attack_bonus for c in combatants]
+    initiative_modifier = [c.initiative_modifier for c in combatants]
+    damage_modifier = [c.damage_modifier for c in combatants]
+    dice = defaultdict(list)
+    for i, combatant in enumerate(combatants):
+        if combatant.damage_die_count:
+            dice[(combatant.damage_die, combatant.damage_die_count)].append(i)
+
+    outcomes, rounds, survivors = Counter(), Counter(), Counter()
+    for _ in range(runs):
+        hp = array("l", max_hp)
+        standing = ([], [])
+        for i, side in enumerate(sides):
+            standing[side].append(i)
+        initiative = roll_totals(20, 1, count, rng=rng)
+        order = sorted(
+            range(count),
+            key=lambda i: (-initiative[i] - initiative_modifier[i], -initiative_modifier[i]),
+        )
+        round_number = 0
+        while standing[PARTY] and standing[MONSTERS] and round_number < max_rounds:
+            block_round = round_number % ROUNDS_PER_DRAW
+            if not block_round:
+                attacks, damage = _draw_rounds(count, dice, rng)
+            round_number += 1
+            offset = block_round * count
+            for i in order:
+                if hp[i] <= 0:
+                    continue
+                enemies = standing[1 - sides[i]]
+                if not enemies:
+                    break
+                roll = attacks[offset + i]
+                if roll == 1:
+                    continue
+                target = enemies[int(rng.random() * len(enemies))]
+                if roll == 20 or roll + attack_bonus[i] >= armor_class[target]:
+                    dealt = damage[offset + i] + damage_modifier[i]
+                    if roll == 20 and combatants[i].damage_die_count:
+                        # a critical hit rolls the damage dice twice
+                        combatant = combatants[i]
+                        dealt += roll_totals(
+                            combatant.damage_die, combatant.damage_die_count, rng=rng
+                        )[0]
+                    hp[target] -= max(dealt, 1)
+                    if hp[target] <= 0:
+                        enemies.remove(target)
+        if standing[PARTY] and standing[MONSTERS]:
+            outcomes[DRAW] += 1
+        else:
+            outcomes[PARTY_WIN if standing[PARTY] else MONSTERS_WIN] += 1
+        rounds[round_number] += 1
+        survivors[len(standing[PARTY])] += 1
+    return outcomes, rounds, survivors
+
+
+def simulate(party, monsters, runs=1000, max_rounds=100, workers=1, rng=None):
+    """
+    Simulate an encounter between the party and the monsters `runs` times.
+
+    Runs are split between `workers` processes, each rolling from its own stream seeded by the
+    current (or given) generator. Drawing the seeds advances the generator, so every simulation
+    rolls new samples, while one with a freshly seeded generator and the same number of workers
+    is repeatable. Returns the distribution of outcomes, rounds, and surviving party members.
+    """
+
+    combatants = tuple(
+        [c._replace(side=PARTY) for c in party] + [c._replace(side=MONSTERS) for c in monsters]
+    )
+    workers = max(min(workers, runs), 1)
+    rng = rng or get_rng()
+    seeds = [rng.getrandbits(64) for _ in range(workers)]
+    shares = [runs // workers + (i < runs % workers) for i in range(workers)]
+    if workers == 1:
+        results = [_simulate_runs(combatants, runs, seeds[0], max_rounds)]
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            results = list(
+                executor.map(
+                    _simulate_runs,
+                    [combatants] * workers,
+                    shares,
+                    seeds,
+                    [max_rounds] * workers,
+                )
+            )
+
+    outcomes, rounds, survivors = Counter(), Counter(), Counter()
+    for worker_outcomes, worker_rounds, worker_survivors in results:
+        outcomes.update(worker_outcomes)
+        rounds.update(worker_rounds)
+        survivors.update(worker_survivors)
+    return {
+        "runs": runs,
+        "party_win_rate": outcomes[PARTY_WIN] / runs,
+        "monsters_win_rate": outcomes[MONSTERS_WIN] / runs,
+        "draw_rate": outcomes[DRAW] / runs,
+        "mean_rounds": sum(r * n for r, n in rounds.items()) / runs,
+        "rounds": dict(sorted(rounds.items())),
+        "party_survivors": dict(sorted(survivors.items())),
+    }
@@ -0,0 +1,445 @@
+"""
+In-memory combat state of encounters, with write-behind persistence.
+
+While an encounter is running, its participants' HP and conditions are read and changed in
+memory instead of in the database. Every change is first appended to the encounter's journal, a
+file of JSON lines, and synced to disk, so a crashed process loses nothing. Changed participants
+are written to the Character, Monster, and Participant tables in batches, ENCOUNTER_FLUSH_INTERVAL
+seconds after the journal was started, even if the encounter is idle by then, and at the end of
+each round. Each flush starts a new journal. The state also keeps the encounter's turn order
+between turns, so advancing a turn doesn't load and sort everyone.
+
+Every process serving the encounter keeps a copy of the state, and the journal is shared between
+them: a process reading or changing the state holds the encounter's lock, a flock() of a lock file
+next to the journal, only for as long as it takes to catch up with the changes journaled by the
+other processes, and to journal its own. A process that finds a new journal loads the participants
+again, since they were flushed or changed in the meantime. The processes need to share
+ENCOUNTER_JOURNAL_DIR, e.g. by running on the same host. HP changes made outside of the encounter
+while it has unflushed changes are overwritten by the next flush.
+"""
+
+import fcntl
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from character.models import Character
+from common.models import HEALTH_FIELDS, AbilityScoreHealthMixin, damage_taken
+from common.reference import bump_table_version, is_tracked
+from monster.models import Monster
+from .models import Encounter, Participant
+
+_states = {}
+_states_lock = threading.Lock()
+# the generation of a state that hasn't been loaded yet, which matches no journal
+_UNLOADED = object()
+
+
+def _lock(path):
+    """Open and lock a lock file, waiting while another process holds it."""
+
+    while True:
+        lock_file = open(path, "a")
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            if os.stat(path).st_ino == os.fstat(lock_file.fileno()).st_ino:
+                return lock_file
+        except FileNotFoundError:
+            pass
+        # the encounter's state was discarded, and the file removed, while waiting for the lock
+        lock_file.close()
+
+
+class ParticipantState:
+    """A participant's HP and conditions, sharing AbilityScoreHealthMixin's HP arithmetic."""
+
+    __slots__ = (
+        "id",
+        "model",
+        "creature_id",
+        "constitution",
+        "current_hp",
+        "max_hp",
+        "temporary_hp",
+        "conditions",
+    )
+
+    heal = AbilityScoreHealthMixin.heal
+    increase_max_hp = AbilityScoreHealthMixin.increase_max_hp
+    adjust_temporary_hp = AbilityScoreHealthMixin.adjust_temporary_hp
+
+    def __init__(self, participant):
+        creature = participant.character or participant.monster
+        self.id = participant.id
+        self.model = type(creature)
+        self.creature_id = creature.pk
+        self.constitution = creature.constitution
+        self.current_hp = creature.current_hp
+        self.max_hp = creature.max_hp
+        self.temporary_hp = creature.temporary_hp
+        self.conditions = tuple(participant.conditions)
+
+    def absorb_damage(self, damage):
+        """Take damage, consuming temporary HP before current HP."""
+
+        absorbed = min(self.temporary_hp, damage)
+        self.temporary_hp -= absorbed
+        self.current_hp = max(self.current_hp - (damage - absorbed), 0)
+
+    def health(self):
+        return {field: getattr(self, field) for field in HEALTH_FIELDS}
+
+    def values(self):
+        return {**self.health(), "conditions": list(self.conditions)}
+
+    def copy(self):
+        copy = ParticipantState.__new__(ParticipantState)
+        for slot in self.__slots__:
+            setattr(copy, slot, getattr(self, slot))
+        return copy
+
+    def restore(self, values):
+        for field in HEALTH_FIELDS:
+            setattr(self, field, values[field])
+        self.conditions = tuple(values["conditions"])
+
+
+class EncounterState:
+    """
+    The combat state of an encounter's participants, see encounter_state().
+
+    Reads and changes hold the encounter's lock and catch up with the journal first. Changes are
+    journaled, and flushed to the database in batches. Raises Encounter.DoesNotExist if there's no
+    encounter.
+    """
+
+    def __init__(self, encounter_id):
+        self.encounter_id = encounter_id
+        self.participants = {}
+        self.journal_path = os.path.join(settings.ENCOUNTER_JOURNAL_DIR, f"{encounter_id}.jsonl")
+        self.lock_path = os.path.join(settings.ENCOUNTER_JOURNAL_DIR, f"{encounter_id}.lock")
+        self._dirty = set()
+        self._lock = threading.RLock()
+        # the journal's generation, when it was started, and how much of it is applied
+        self._generation = _UNLOADED
+        self._started = None
+        self._position = 0
+        self._timer = None
+        self._tracker = None
+        self._tracker_version = None
+        os.makedirs(settings.ENCOUNTER_JOURNAL_DIR, exist_ok=True)
+        with self.locked():
+            pass
+
+    def load_participants(self):
+        """Load the participants from the database."""
+
+        participants = Participant.objects.filter(encounter=self.encounter_id)
+        participants = list(participants.select_related("character", "monster"))
+        if not participants and not Encounter.objects.filter(pk=self.encounter_id).exists():
+            raise Encounter.DoesNotExist
+        return participants
+
+    @contextmanager
+    def locked(self):
+        """
+        Hold the encounter's lock, with the state caught up with the journal.
+
+        The lock isn't reentrant, so the state can't be read or changed while holding it.
+        """
+
+        with self._lock:
+            lock_file = _lock(self.lock_path)
+            try:
+                try:
+                    self._sync()
+                except Encounter.DoesNotExist:
+                    # the encounter was deleted, don't leave its lock file behind
+                    os.remove(self.lock_path)
+                    raise
+                yield
+            finally:
+                lock_file.close()
+
+    def _sync(self):
+        """Apply the changes journaled since the state was last read, e.g. by other processes."""
+
+        try:
+            journal = open(self.journal_path, "rb+")
+        except FileNotFoundError:
+            if self._generation is not None:
+                self._reload(None)
+            return
+        with journal:
+            # new journals are moved in place once they're written, so the header is complete
+            header = json.loads(journal.readline())
+            if header["generation"] != self._generation:
+                self._reload(header)
+                self._position = journal.tell()
+            journal.seek(self._position)
+            for line in iter(journal.readline, b""):
+                if not line.endswith(b"\n"):
+                    # a process crashed while journaling a change, which it never applied
+                    journal.truncate(self._position)
+                    break
+                self._apply(json.loads(line))
+                self._position += len(line)
+
+    def _load(self):
+        self.participants = {p.id: ParticipantState(p) for p in self.load_participants()}
+        self._dirty.clear()
+
+    def _reload(self, header):
+        """Load the participants again, for the journal with the given header (or no journal)."""
+
+        self._load()
+        self._generation = header and header["generation"]
+        self._started = header and header["started"]
+        self._position = 0
+
+    def _apply(self, change):
+        participant_id = Participant._meta.pk.to_python(change["participant"])
+        state = self.participants.get(participant_id)
+        if state is not None:
+            changed = state.copy()
+            changed.restore(change)
+            self.participants[participant_id] = changed
+            self._dirty.add(participant_id)
+
+    def _start_journal(self):
+        """Atomically replace the journal with a new, empty one, without any changes to apply."""
+
+        header = {"generation": uuid.uuid4().hex, "started": time.time()}
+        line = (json.dumps(header) + "\n").encode()
+        path = f"{self.journal_path}.tmp"
+        with open(path, "wb") as journal:
+            journal.write(line)
+            journal.flush()
+            os.fsync(journal.fileno())
+        os.replace(path, self.journal_path)
+        self._dirty.clear()
+        self._generation = header["generation"]
+        self._started = header["started"]
+        self._position = len(line)
+
+    def _record(self, state):
+        """Journal a participant's new state, before it's applied in memory."""
+
+        if self._generation is None:
+            self._start_journal()
+        line = (json.dumps({"participant": str(state.id), **state.values()}) + "\n").encode()
+        with open(self.journal_path, "ab") as journal:
+            journal.write(line)
+            journal.flush()
+            os.fsync(journal.fileno())
+        self._position += len(line)
+
+    def _change(self, participant_id, change):
+        with self.locked():
+            changed = self.participants[participant_id].copy()
+            change(changed)
+            self._record(changed)
+            self.participants[participant_id] = changed
+            self._dirty.add(participant_id)
+            if time.time() - self._started >= settings.ENCOUNTER_FLUSH_INTERVAL:
+                self._flush()
+            else:
+                self._schedule_flush()
+            return changed
+
+    def _schedule_flush(self):
+        """Flush the journal once it's ENCOUNTER_FLUSH_INTERVAL seconds old, unless it's sooner."""
+
+        if self._timer is None:
+            delay = self._started + settings.ENCOUNTER_FLUSH_INTERVAL - time.time()
+            self._timer = threading.Timer(delay, self._flush_later)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_later(self):
+        try:
+            with self._lock:
+                self._timer = None
+            self.flush()
+        except Encounter.DoesNotExist:
+            # the encounter was deleted, which flushed its changes
+            pass
+        finally:
+            # the timer's thread has its own database connection
+            connections.close_all()
+
+    def turn_order(self, encounter):
+        """
+        Get the encounter's InitiativeTracker, kept between turns and changed in place.
+
+        It's loaded the first time it's needed, or again if it doesn't match the encounter's round,
+        turn, and participants_version, e.g. after participants joined or left, or a turn was
+        rolled back or taken by another process. Changes should be made with the encounter
+        locked, dropping the tracker if they fail.
+        """
+
+        tracker = self._tracker
+        if (
+            tracker is None
+            or self._tracker_version != encounter.participants_version
+            or tracker.round != encounter.round
+            or tracker.current != encounter.turn_id
+        ):
+            self._tracker_version = encounter.participants_version
+            tracker = self._tracker = encounter.tracker()
+        return tracker
+
+    def drop_turn_order(self):
+        self._tracker = None
+
+    def get(self, participant_id):
+        """Get a participant's state. Raises KeyError if it isn't in the encounter."""
+
+        with self.locked():
+            return self.participants[participant_id]
+
+    def all(self):
+        """Get the state of every participant."""
+
+        with self.locked():
+            return list(self.participants.values())
+
+    def adjust_health(self, participant_id, current_hp=0, max_hp=0, temporary_hp=0,
+                      add_constitution=False):
+        """Adjust a participant's HP like AbilityScoreHealthMixin.adjust_health()."""
+
+        def change(state):
+            if current_hp:
+                state.heal(current_hp)
+            if max_hp or add_constitution:
+                state.increase_max_hp(max_hp, add_constitution=add_constitution)
+            if temporary_hp:
+                state.adjust_temporary_hp(temporary_hp)
+
+        return self._change(participant_id, change)
+
+    def apply_damage(self, participant_id, damage, damage_type=None, resistances=(),
+                     vulnerabilities=(), immunities=()):
+        """Deal damage to a participant like AbilityScoreHealthMixin.apply_damage()."""
+
+        damage = damage_taken(damage, damage_type, resistances, vulnerabilities, immunities)
+        return self._change(participant_id, lambda state: state.absorb_damage(damage))
+
+    def change_conditions(self, participant_id, add=(), remove=()):
+        """Add and remove a participant's conditions."""
+
+        def change(state):
+            conditions = [c for c in state.conditions if c not in remove]
+            conditions.extend(c for c in add if c not in conditions)
+            state.conditions = tuple(conditions)
+
+        return self._change(participant_id, change)
+
+    def flush(self):
+        """Write the changed participants to the database, and start a new journal."""
+
+        with self.locked():
+            self._flush()
+
+    def _flush(self):
+        if self._dirty:
+            self._write_changes()
+            self._start_journal()
+
+    def _write_changes(self):
+        changed = [self.participants[pk] for pk in self._dirty]
+        with transaction.atomic():
+            for model in (Character, Monster):
+                creatures = [
+                    model(pk=state.creature_id, **state.health())
+                    for state in changed
+                    if state.model is model
+                ]
+                if creatures:
+                    model.objects.bulk_update(creatures, HEALTH_FIELDS)
+                    if is_tracked(model):
+                        # bulk_update() skips the signals that version the table
+                        bump_table_version(model)
+            Participant.objects.bulk_update(
+                [Participant(pk=s.id, conditions=list(s.conditions)) for s in changed],
+                ["conditions"],
+            )
+
+    def reload(self):
+        """
+        Flush the state and load the participants again, e.g. after they changed.
+
+        The state is flushed with the participants it was loaded with, persisting those removed
+        since. Starting a new journal makes the other processes load the participants again too,
+        while their turn order is loaded again for the encounter's new participants_version.
+        """
+
+        with self.locked():
+            if self._dirty:
+                self._write_changes()
+            self._start_journal()
+            self._load()
+
+    def close(self):
+        """Flush the state, and remove its journal and lock file, e.g. when it's deleted."""
+
+        with self.locked():
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._dirty:
+                self._write_changes()
+            self._generation = _UNLOADED
+            for path in (self.journal_path, self.lock_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+def _encounter_id(value):
+    return Encounter._meta.pk.to_python(value)
+
+
+def encounter_state(encounter_id):
+    """
+    Get the encounter's combat state, loading it if it isn't in memory yet.
+
+    Raises Encounter.DoesNotExist if there's no encounter.
+    """
+
+    encounter_id = _encounter_id(encounter_id)
+    with _states_lock:
+        state = _states.get(encounter_id)
+        if state is None:
+            state = _states[encounter_id] = EncounterState(encounter_id)
+        return state
+
+
+def loaded_state(encounter_id):
+    """Get the encounter's combat state if it's in memory, or None."""
+
+    return _states.get(_encounter_id(encounter_id))
+
+
+def discard_state(encounter_id):
+    """
+    Flush the encounter's combat state, remove its journal, and remove it from memory, e.g. when
+    the encounter is deleted. Other processes find the journal removed, and load the state again.
+
+    Deleting the encounter in a transaction should discard the state once it's committed, with
+    transaction.on_commit(), so a rolled back delete doesn't undo the flushed state.
+    """
+
+    with _states_lock:
+        state = _states.pop(_encounter_id(encounter_id), None)
+    if state is not None:
+        try:
+            state.close()
+        except Encounter.DoesNotExist:
+            # another process already discarded it
+            pass
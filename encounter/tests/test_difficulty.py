@@ -0,0 +1,98 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from rest_framework.status import HTTP_400_BAD_REQUEST
+
+from monster.models import MonsterType
+from ..difficulty import challenge_rating, encounter_multiplier
+
+GLOD = "8edc2380-fb63-4773-b059-1d7be818e6bd"
+STEVEY = "baf70d99-4743-4d85-96f7-4c9c9614331b"
+GEROLD = "de1ec576-8aa9-4892-bfe5-e6193166a222"
+STEGOSAURUS = "1f3e5120-d1c6-4e07-bc36-56b7dacebbf7"
+CENTAUR = "2f2ffb68-5c2a-4fb3-bf09-481629d8a58a"
+
+
+class TestDifficultyTables(SimpleTestCase):
+    def test_challenge_rating(self):
+        # 7d8+21 averages 52 hit points, the range of CR 1/2
+        stegosaurus = MonsterType(hit_die=8, hit_die_count=7, constitution=17, armor_class=13)
+        self.assertEqual(challenge_rating(stegosaurus), ("1/2", 100))
+        # 2 points of armor class above the expected 13 raise the CR a step
+        stegosaurus.armor_class = 15
+        self.assertEqual(challenge_rating(stegosaurus), ("1", 200))
+        stegosaurus.armor_class = 9
+        self.assertEqual(challenge_rating(stegosaurus), ("1/8", 25))
+        self.assertEqual(challenge_rating(MonsterType(hit_die=4, armor_class=1)), ("0", 10))
+        titan = MonsterType(hit_die=20, hit_die_count=100, constitution=30, armor_class=20)
+        self.assertEqual(challenge_rating(titan), ("30", 155000))
+
+    def test_encounter_multiplier(self):
+        self.assertEqual(encounter_multiplier(1, 4), 1)
+        self.assertEqual(encounter_multiplier(2, 4), 1.5)
+        self.assertEqual(encounter_multiplier(6, 4), 2)
+        self.assertEqual(encounter_multiplier(7, 4), 2.5)
+        self.assertEqual(encounter_multiplier(14, 4), 3)
+        self.assertEqual(encounter_multiplier(15, 4), 4)
+        # small parties use the next higher multiplier, large parties the next lower one
+        self.assertEqual(encounter_multiplier(15, 2), 5)
+        self.assertEqual(encounter_multiplier(1, 6), 0.5)
+        self.assertEqual(encounter_multiplier(3, 6), 1.5)
+
+
+class TestDifficultyView(TestCase):
+    fixtures = [
+        "campaign/fixtures/campaign.json",
+        "character/fixtures/character.json",
+        "monster/fixtures/monster.json",
+    ]
+
+    def setUp(self):
+        cache.clear()
+
+    def post(self, data):
+        return self.client.post(
+            "/api/encounter/difficulty/", data=data, content_type="application/json"
+        )
+
+    def test_difficulty(self):
+        data = {
+            "characters": [GLOD, STEVEY, GEROLD],
+            "monsters": [
+                {"monster_type": STEGOSAURUS, "count": 2},
+                {"monster_type": CENTAUR},
+            ],
+        }
+        # the monster types, then the party's thresholds
+        with self.assertNumQueries(2):
+            response = self.post(data)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data,
+            {
+                "difficulty": "HARD",
+                "thresholds": {"easy": 150, "medium": 300, "hard": 450, "deadly": 700},
+                "experience_points": 250,
+                "adjusted_experience_points": 500,
+                "experience_points_per_character": 83,
+                "characters_levelling_up": 0,
+            },
+        )
+
+        # the monster types are cached
+        data = {"characters": [GEROLD], "monsters": [{"monster_type": STEGOSAURUS, "count": 3}]}
+        with self.assertNumQueries(1):
+            response = self.post(data)
+        self.assertEqual(response.data["difficulty"], "DEADLY")
+        self.assertEqual(response.data["adjusted_experience_points"], 750)
+        # Gerold's 35 XP and the 300 earned reach level 2
+        self.assertEqual(response.data["experience_points_per_character"], 300)
+        self.assertEqual(response.data["characters_levelling_up"], 1)
+
+        data["monsters"] = []
+        self.assertEqual(self.post(data).data["difficulty"], "TRIVIAL")
+
+    def test_difficulty_not_found(self):
+        data = {"characters": [GEROLD, CENTAUR], "monsters": [{"monster_type": CENTAUR}]}
+        self.assertEqual(self.post(data).status_code, HTTP_400_BAD_REQUEST)
+        data = {"characters": [GEROLD], "monsters": [{"monster_type": GEROLD}]}
+        self.assertEqual(self.post(data).status_code, HTTP_400_BAD_REQUEST)
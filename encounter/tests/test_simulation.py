@@ -0,0 +1,129 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+
+from character.models import Character
+from common.rng import DiceRNG, use_rng
+from equipment.models import Weapon
+from monster.models import Monster, MonsterType
+from ..combatants import character_combatant, monster_combatant
+from ..simulation import MONSTERS, PARTY, Combatant, simulate
+
+KNIGHT = Combatant("Knight", PARTY, 60, 18, 0, 8, 10, 2, 4)
+RAT = Combatant("Rat", MONSTERS, 2, 10, 0, 0, 1, 1, 0)
+GOLEM = Combatant("Golem", MONSTERS, 500, 30, 0, 0, 1, 0, 0)
+
+
+class TestSimulation(SimpleTestCase):
+    def test_simulate(self):
+        result = simulate([KNIGHT], [RAT] * 3, runs=500, rng=DiceRNG(3))
+        self.assertEqual(result["runs"], 500)
+        self.assertEqual(result["party_win_rate"], 1)
+        self.assertEqual(result["monsters_win_rate"] + result["draw_rate"], 0)
+        self.assertEqual(sum(result["rounds"].values()), 500)
+        self.assertEqual(result["party_survivors"], {1: 500})
+        # the knight fells a rat a round at most
+        self.assertGreaterEqual(result["mean_rounds"], 3)
+        self.assertLess(result["mean_rounds"], 4)
+        # seeded simulations are repeatable
+        self.assertEqual(simulate([KNIGHT], [RAT] * 3, runs=500, rng=DiceRNG(3)), result)
+
+    def test_simulate_draws_new_samples(self):
+        with use_rng(7):
+            first = simulate([KNIGHT], [RAT] * 3, runs=500)
+            second = simulate([KNIGHT], [RAT] * 3, runs=500)
+        self.assertNotEqual(first["rounds"], second["rounds"])
+        with use_rng(7):
+            self.assertEqual(simulate([KNIGHT], [RAT] * 3, runs=500), first)
+
+    def test_simulate_draw(self):
+        result = simulate([KNIGHT], [GOLEM], runs=50, max_rounds=5, rng=DiceRNG(3))
+        self.assertEqual(result["draw_rate"], 1)
+        self.assertEqual(result["rounds"], {5: 50})
+
+    def test_simulate_workers(self):
+        rng = DiceRNG(5)
+        result = simulate([KNIGHT], [RAT, GOLEM], runs=101, max_rounds=3, workers=2, rng=rng)
+        self.assertEqual(result["runs"], 101)
+        self.assertEqual(sum(result["rounds"].values()), 101)
+        self.assertEqual(
+            simulate([KNIGHT], [RAT, GOLEM], runs=101, max_rounds=3, workers=2, rng=DiceRNG(5)),
+            result,
+        )
+
+    def test_combatants(self):
+        character = Character(
+            first_name="Vex", level=5, max_hp=38, armor_class=15, strength=10, dexterity=16
+        )
+        rapier = Weapon(name="Rapier", weapon_type=Weapon.MARTIAL_MELEE, damage_die=8, finesse=True)
+        club = Weapon(name="Club", weapon_type=Weapon.SIMPLE_MELEE, damage_die=4)
+        combatant = character_combatant(character, [club, rapier])
+        # dexterity for the finesse weapon, +3 proficiency at level 5
+        self.assertEqual(
+            combatant,
+            Combatant("Vex", PARTY, 38, 15, 3, 6, 8, 1, 3),
+        )
+        unarmed = character_combatant(character)
+        self.assertEqual((unarmed.attack_bonus, unarmed.damage_die_count), (3, 0))
+        self.assertEqual(unarmed.damage_modifier, 1)
+
+        toad = MonsterType(name="Giant Toad", hit_die=6, hit_die_count=3)
+        monster = Monster(
+            monster_type=toad,
+            first_name="Todd",
+            max_hp=12,
+            armor_class=11,
+            strength=15,
+            dexterity=10,
+        )
+        self.assertEqual(
+            monster_combatant(monster), Combatant("Todd", MONSTERS, 12, 11, 0, 4, 6, 1, 2)
+        )
+
+
+class TestSimulationView(TestCase):
+    fixtures = [
+        "campaign/fixtures/campaign.json",
+        "character/fixtures/character.json",
+        "equipment/fixtures/equipment.json",
+        "monster/fixtures/monster.json",
+    ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_simulate(self):
+        url = "/api/encounter/simulate/"
+        data = {
+            "characters": [
+                "8edc2380-fb63-4773-b059-1d7be818e6bd",
+                "baf70d99-4743-4d85-96f7-4c9c9614331b",
+            ],
+            "monsters": ["916e5e55-0842-45f1-b8e0-ed056139332d"],
+            "runs": 200,
+        }
+        # the characters, their equipped weapons, the monsters, and the weapon reference table
+        with self.assertNumQueries(4):
+            response = self.client.post(url, data=data, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["runs"], 200)
+        self.assertAlmostEqual(
+            response.data["party_win_rate"]
+            + response.data["monsters_win_rate"]
+            + response.data["draw_rate"],
+            1,
+        )
+        self.assertEqual(sum(response.data["rounds"].values()), 200)
+
+        response = self.client.post(
+            url, data={**data, "workers": 2}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sum(response.data["rounds"].values()), 200)
+        response = self.client.post(
+            url, data={**data, "workers": 100}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+        data["monsters"] = []
+        response = self.client.post(url, data=data, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
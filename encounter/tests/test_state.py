@@ -0,0 +1,268 @@
+import os
+import tempfile
+import threading
+import uuid
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from character.models import Character
+from monster.models import Monster
+from ..models import Encounter, Participant
+from ..state import discard_state, encounter_state, EncounterState, loaded_state
+
+GEROLD = "de1ec576-8aa9-4892-bfe5-e6193166a222"
+ALLY = "1955d244-a38d-4a1c-8891-a891eb8ee582"
+
+
+class JournalTestMixin:
+    def setUp(self):
+        super().setUp()
+        journal_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(journal_dir.cleanup)
+        settings = override_settings(
+            ENCOUNTER_JOURNAL_DIR=journal_dir.name, ENCOUNTER_FLUSH_INTERVAL=3600
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+
+class MemoryState(EncounterState):
+    """An encounter's combat state, loading the participants from memory."""
+
+    def __init__(self, encounter_id, participants):
+        self.loaded = participants
+        super().__init__(encounter_id)
+
+    def load_participants(self):
+        return self.loaded
+
+
+class TestEncounterState(JournalTestMixin, SimpleTestCase):
+    def participants(self):
+        character = Character(
+            id=uuid.uuid4(), constitution=14, max_hp=20, current_hp=12, temporary_hp=0
+        )
+        monster = Monster(id=uuid.uuid4(), constitution=8, max_hp=9, current_hp=9, temporary_hp=0)
+        return [
+            Participant(id=uuid.uuid4(), character=character, initiative=10),
+            Participant(id=uuid.uuid4(), monster=monster, initiative=5),
+        ]
+
+    def test_changes(self):
+        fighter, goblin = participants = self.participants()
+        state = MemoryState(uuid.uuid4(), participants)
+
+        changed = state.adjust_health(fighter.id, current_hp=5, temporary_hp=4)
+        self.assertEqual((changed.current_hp, changed.max_hp, changed.temporary_hp), (17, 20, 4))
+        changed = state.apply_damage(fighter.id, 10, "FIRE", resistances=["FIRE"])
+        self.assertEqual((changed.current_hp, changed.temporary_hp), (16, 0))
+        # +2 constitution modifier, current HP proportionate to the new max HP
+        changed = state.adjust_health(fighter.id, max_hp=2, add_constitution=True)
+        self.assertEqual((changed.current_hp, changed.max_hp), (20, 24))
+        self.assertIs(state.get(fighter.id), changed)
+
+        changed = state.apply_damage(goblin.id, 12, "COLD", vulnerabilities=["FIRE"])
+        self.assertEqual(changed.current_hp, 0)
+        changed = state.change_conditions(goblin.id, add=["PRONE", "UNCONSCIOUS", "PRONE"])
+        self.assertEqual(changed.conditions, ("PRONE", "UNCONSCIOUS"))
+        changed = state.change_conditions(goblin.id, add=["POISONED"], remove=["PRONE"])
+        self.assertEqual(changed.conditions, ("UNCONSCIOUS", "POISONED"))
+        self.assertEqual(len(state.all()), 2)
+
+        with self.assertRaises(KeyError):
+            state.apply_damage(uuid.uuid4(), 3)
+
+    def test_shared_journal(self):
+        """Test that processes serving the same encounter catch up with each other's changes."""
+
+        fighter, goblin = participants = self.participants()
+        encounter_id = uuid.uuid4()
+        state = MemoryState(encounter_id, participants)
+        other = MemoryState(encounter_id, participants)
+        state.apply_damage(fighter.id, 5)
+        self.assertEqual(other.get(fighter.id).current_hp, 7)
+        other.change_conditions(goblin.id, add=["PRONE"])
+        other.apply_damage(fighter.id, 2)
+        self.assertEqual(state.get(goblin.id).conditions, ("PRONE",))
+        self.assertEqual(state.get(fighter.id).current_hp, 5)
+        self.assertEqual(state._dirty, {fighter.id, goblin.id})
+
+        # another process started a new journal, e.g. after flushing or changing the participants
+        with other.locked():
+            other._start_journal()
+        state.loaded = participants[:1]
+        self.assertEqual(state.get(fighter.id).current_hp, 12)
+        self.assertEqual(len(state.all()), 1)
+        self.assertEqual(state._dirty, set())
+
+    def test_journal_replay(self):
+        fighter, goblin = participants = self.participants()
+        encounter_id = uuid.uuid4()
+        state = MemoryState(encounter_id, participants)
+        state.apply_damage(fighter.id, 5)
+        state.change_conditions(goblin.id, add=["PRONE"])
+        state.apply_damage(fighter.id, 2)
+        with open(state.journal_path) as journal:
+            # the header and the changes
+            self.assertEqual(len(journal.readlines()), 4)
+        with open(state.journal_path, "a") as journal:
+            # a process crashed while writing its change
+            journal.write('{"participant": "')
+
+        # the rows were never flushed
+        restored = MemoryState(encounter_id, participants)
+        self.assertEqual(restored.get(fighter.id).current_hp, 5)
+        self.assertEqual(restored.get(goblin.id).conditions, ("PRONE",))
+        self.assertEqual(restored.get(goblin.id).current_hp, 9)
+        self.assertEqual(restored._dirty, {fighter.id, goblin.id})
+
+        # the torn line is removed, so the next change can be read
+        restored.apply_damage(goblin.id, 4)
+        self.assertEqual(state.get(goblin.id).current_hp, 5)
+        with open(state.journal_path) as journal:
+            self.assertEqual(len(journal.readlines()), 5)
+
+    def test_lock(self):
+        encounter_id = uuid.uuid4()
+        fighter, goblin = participants = self.participants()
+        state = MemoryState(encounter_id, participants)
+        other = MemoryState(encounter_id, participants)
+        waiting = threading.Thread(target=other.apply_damage, args=(fighter.id, 3))
+        with state.locked():
+            waiting.start()
+            waiting.join(0.1)
+            self.assertTrue(waiting.is_alive())
+            self.assertEqual(state.participants[fighter.id].current_hp, 12)
+        waiting.join()
+        self.assertEqual(state.get(fighter.id).current_hp, 9)
+
+    def test_flush_timer(self):
+        """Test that changes are flushed on time, even if the encounter is idle."""
+
+        fighter, goblin = participants = self.participants()
+        state = MemoryState(uuid.uuid4(), participants)
+        flushed = threading.Event()
+        with patch.object(state, "flush", side_effect=flushed.set):
+            with override_settings(ENCOUNTER_FLUSH_INTERVAL=0.05):
+                state.apply_damage(fighter.id, 3)
+            self.assertTrue(flushed.wait(5))
+        self.assertIsNone(state._timer)
+
+
+class TestEncounterStatePersistence(JournalTestMixin, TestCase):
+    fixtures = [
+        "campaign/fixtures/campaign.json",
+        "character/fixtures/character.json",
+        "equipment/fixtures/equipment.json",
+        "monster/fixtures/monster.json",
+    ]
+
+    def setUp(self):
+        super().setUp()
+        self.encounter = Encounter.objects.create(name="Skirmish")
+        self.encounter.add_participants(
+            Character.objects.filter(pk=GEROLD), Monster.objects.filter(pk=ALLY)
+        )
+        self.gerold = self.encounter.participants.get(character=GEROLD)
+        self.ally = self.encounter.participants.get(monster=ALLY)
+        self.url = f"/api/encounter/{self.encounter.id}/"
+        self.addCleanup(discard_state, self.encounter.id)
+
+    def post(self, url, data):
+        return self.client.post(url, data=data, content_type="application/json")
+
+    def test_served_from_memory(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(f"{self.url}state/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 2)
+
+        participant_url = f"{self.url}participants/{self.gerold.id}/"
+        with self.assertNumQueries(0):
+            response = self.post(f"{participant_url}damage/", {"damage": 4})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data["current_hp"], 2)
+            response = self.post(f"{participant_url}hit-points/", {"current_hp": 1})
+            self.assertEqual(response.data["current_hp"], 3)
+            response = self.post(f"{participant_url}conditions/", {"add": ["PRONE"]})
+            self.assertEqual(response.data["conditions"], ["PRONE"])
+            response = self.post(f"{self.url}participants/{self.ally.id}/damage/", {"damage": 7})
+            self.assertEqual(response.data["current_hp"], 43)
+        # not written yet
+        self.assertEqual(Character.objects.get(pk=GEROLD).current_hp, 6)
+
+        response = self.post(f"{participant_url}conditions/", {"add": ["SLEEPY"]})
+        self.assertEqual(response.status_code, 400)
+        response = self.post(f"{self.url}participants/{uuid.uuid4()}/damage/", {"damage": 7})
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(f"/api/encounter/{uuid.uuid4()}/state/")
+        self.assertEqual(response.status_code, 404)
+
+    def test_flush(self):
+        state = encounter_state(self.encounter.id)
+        state.apply_damage(self.gerold.id, 4)
+        state.change_conditions(self.gerold.id, add=["PRONE"])
+        state.apply_damage(self.ally.id, 7)
+
+        # an UPDATE per table, in a savepoint
+        with self.assertNumQueries(5):
+            state.flush()
+        self.assertEqual(Character.objects.get(pk=GEROLD).current_hp, 2)
+        self.assertEqual(Monster.objects.get(pk=ALLY).current_hp, 43)
+        self.assertEqual(Participant.objects.get(pk=self.gerold.id).conditions, ["PRONE"])
+        with open(state.journal_path) as journal:
+            # a new journal, without any changes
+            self.assertEqual(len(journal.readlines()), 1)
+        with self.assertNumQueries(0):
+            state.flush()
+
+    def test_flush_at_end_of_round(self):
+        state = encounter_state(self.encounter.id)
+        self.post(f"{self.url}next-turn/", {})
+        state.apply_damage(self.gerold.id, 1)
+        self.post(f"{self.url}next-turn/", {})
+        self.assertEqual(Character.objects.get(pk=GEROLD).current_hp, 6)
+
+        self.post(f"{self.url}next-turn/", {})  # round 2
+        self.assertEqual(Character.objects.get(pk=GEROLD).current_hp, 5)
+
+    def test_flush_on_interval(self):
+        state = encounter_state(self.encounter.id)
+        with override_settings(ENCOUNTER_FLUSH_INTERVAL=0):
+            state.apply_damage(self.ally.id, 10)
+        self.assertEqual(Monster.objects.get(pk=ALLY).current_hp, 40)
+
+    def test_flush_when_participant_removed(self):
+        state = encounter_state(self.encounter.id)
+        state.apply_damage(self.gerold.id, 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f"{self.url}participants/{self.gerold.id}/")
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(Character.objects.get(pk=GEROLD).current_hp, 3)
+        self.assertIs(encounter_state(self.encounter.id), state)
+        self.assertEqual([p.id for p in state.all()], [self.ally.id])
+
+    def test_flush_when_encounter_deleted(self):
+        state = encounter_state(self.encounter.id)
+        state.apply_damage(self.ally.id, 10)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(self.url)
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(Monster.objects.get(pk=ALLY).current_hp, 40)
+        self.assertIsNone(loaded_state(self.encounter.id))
+        self.assertFalse(os.path.exists(state.journal_path))
+        self.assertFalse(os.path.exists(state.lock_path))
+
+    def test_kept_when_participants_change_fails(self):
+        """Test that a rolled back change to the participants keeps the unflushed state."""
+
+        state = encounter_state(self.encounter.id)
+        state.apply_damage(self.gerold.id, 3)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            response = self.post(f"{self.url}participants/", {"monsters": [ALLY]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(callbacks, [])
+        self.assertIs(loaded_state(self.encounter.id), state)
+        self.assertEqual(state.get(self.gerold.id).current_hp, 3)
+        self.assertTrue(os.path.exists(state.journal_path))
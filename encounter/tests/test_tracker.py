@@ -0,0 +1,115 @@
+import random
+
+from django.test import SimpleTestCase
+
+from ..tracker import InitiativeTracker
+
+
+class TestInitiativeTracker(SimpleTestCase):
+    def tracker(self):
+        tracker = InitiativeTracker()
+        tracker.add("goblin", 12, 2)
+        tracker.add("fighter", 18, 1)
+        tracker.add("wizard", 12, 3)
+        tracker.add("orc", 12, 2)
+        return tracker
+
+    def turns(self, tracker, count):
+        return [tracker.next() for _ in range(count)]
+
+    def test_turn_order(self):
+        tracker = self.tracker()
+        self.assertEqual(tracker.round, 0)
+        self.assertIsNone(tracker.current)
+        # ties are broken by the initiative modifier, then by who joined first
+        self.assertEqual(tracker.order(), ["fighter", "wizard", "goblin", "orc"])
+        self.assertEqual(
+            self.turns(tracker, 5), ["fighter", "wizard", "goblin", "orc", "fighter"]
+        )
+        self.assertEqual(tracker.round, 2)
+        self.assertEqual(tracker.current, "fighter")
+        self.assertFalse(tracker.acted("fighter"))
+        self.assertFalse(tracker.acted("wizard"))
+
+        tracker.next()
+        self.assertTrue(tracker.acted("fighter"))
+        self.assertEqual(tracker.order(), ["wizard", "goblin", "orc", "fighter"])
+
+    def test_add_during_round(self):
+        tracker = self.tracker()
+        self.turns(tracker, 2)  # wizard's turn
+        tracker.add("cleric", 15)  # turn passed, acts next round
+        tracker.add("rogue", 10)
+        self.assertTrue(tracker.acted("cleric"))
+        self.assertFalse(tracker.acted("rogue"))
+        self.assertEqual(
+            tracker.order(), ["wizard", "goblin", "orc", "rogue", "fighter", "cleric"]
+        )
+        self.assertEqual(
+            self.turns(tracker, 5), ["goblin", "orc", "rogue", "fighter", "cleric"]
+        )
+        self.assertEqual(tracker.round, 2)
+        with self.assertRaises(ValueError):
+            tracker.add("rogue", 3)
+
+    def test_remove(self):
+        tracker = self.tracker()
+        self.turns(tracker, 2)
+        tracker.remove("goblin")
+        tracker.remove("wizard")  # ends the current turn
+        self.assertIsNone(tracker.current)
+        self.assertNotIn("wizard", tracker)
+        self.assertEqual(len(tracker), 2)
+        self.assertEqual(self.turns(tracker, 3), ["orc", "fighter", "orc"])
+
+        tracker.remove("orc")
+        tracker.remove("fighter")
+        self.assertIsNone(tracker.next())
+        self.assertEqual(tracker.order(), [])
+
+    def test_delay(self):
+        tracker = self.tracker()
+        self.assertEqual(tracker.next(), "fighter")
+        tracker.delay("fighter", 5)  # ends the turn
+        self.assertIsNone(tracker.current)
+        self.assertEqual(tracker.order(), ["wizard", "goblin", "orc", "fighter"])
+        tracker.delay("goblin", 12, 2)  # after the orc
+        self.assertEqual(
+            self.turns(tracker, 5), ["wizard", "orc", "goblin", "fighter", "wizard"]
+        )
+        # the fighter keeps the delayed initiative
+        self.assertEqual(tracker.order(), ["wizard", "orc", "goblin", "fighter"])
+
+        with self.assertRaises(ValueError):
+            tracker.delay("orc", 20)  # earlier in the round
+        tracker.next()
+        with self.assertRaises(ValueError):
+            tracker.delay("wizard", 1)  # already acted
+
+    def test_restore(self):
+        tracker = self.tracker()
+        self.turns(tracker, 6)
+        restored = InitiativeTracker(tracker.round)
+        for key in tracker.order():
+            entry = tracker._entries[key]
+            initiative, modifier = -entry[0][0], -entry[0][1]
+            if key == tracker.current:
+                restored.add_current(key, initiative, modifier)
+            else:
+                restored.add(key, initiative, modifier, acted=tracker.acted(key))
+        self.assertEqual(restored.order(), tracker.order())
+        self.assertEqual(self.turns(restored, 6), self.turns(tracker, 6))
+
+    def test_large_battle(self):
+        rng = random.Random(7)
+        tracker = InitiativeTracker()
+        initiatives = {n: rng.randint(-1, 25) for n in range(2000)}
+        for key, initiative in initiatives.items():
+            tracker.add(key, initiative)
+        removed = set(rng.sample(range(2000), 1500))
+        for key in removed:
+            tracker.remove(key)
+        expected = sorted(set(initiatives) - removed, key=lambda k: (-initiatives[k], k))
+        self.assertEqual(self.turns(tracker, 500), expected)
+        self.assertEqual(self.turns(tracker, 500), expected)
+        self.assertEqual(tracker.round, 2)
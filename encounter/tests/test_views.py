@@ -0,0 +1,144 @@
+from django.test import TestCase
+from rest_framework.status import (
+    HTTP_200_OK,
+    HTTP_201_CREATED,
+    HTTP_204_NO_CONTENT,
+    HTTP_400_BAD_REQUEST,
+)
+
+from common.helpers import ability_modifier
+from monster.models import Monster
+from ..models import Encounter, Participant
+from ..state import discard_state
+from .test_state import JournalTestMixin
+
+GLOD = "8edc2380-fb63-4773-b059-1d7be818e6bd"
+GEROLD = "de1ec576-8aa9-4892-bfe5-e6193166a222"
+ALLY = "1955d244-a38d-4a1c-8891-a891eb8ee582"
+TODD = "916e5e55-0842-45f1-b8e0-ed056139332d"
+PHOLUS = "34dcb71f-3988-4993-875b-7f8c9ebab1ff"
+
+
+class TestEncounterViews(JournalTestMixin, TestCase):
+    fixtures = [
+        "campaign/fixtures/campaign.json",
+        "character/fixtures/character.json",
+        "equipment/fixtures/equipment.json",
+        "monster/fixtures/monster.json",
+    ]
+    base_url = "/api/encounter/"
+
+    def post(self, url, data=None, status=HTTP_200_OK):
+        response = self.client.post(
+            url, data=data or {}, content_type="application/json", HTTP_X_DICE_SEED="20"
+        )
+        self.assertEqual(response.status_code, status)
+        return response
+
+    def start_encounter(self):
+        data = {"name": "Ambush", "characters": [GLOD, GEROLD], "monsters": [ALLY, TODD]}
+        encounter = self.post(self.base_url, data, status=HTTP_201_CREATED).data
+        self.addCleanup(discard_state, encounter["id"])
+        return encounter
+
+    def assertTurnOrder(self, participants):
+        waiting = [p for p in participants if not p["acted"]]
+        acted = [p for p in participants if p["acted"]]
+        self.assertEqual(participants, waiting + acted)
+        for group in (waiting[1:], acted):
+            keys = [(p["initiative"], p["initiative_modifier"]) for p in group]
+            self.assertEqual(keys, sorted(keys, reverse=True))
+
+    def test_encounter_add(self):
+        encounter = self.start_encounter()
+        self.assertEqual(encounter["name"], "Ambush")
+        self.assertEqual(encounter["round"], 0)
+        self.assertIsNone(encounter["turn"])
+        participants = encounter["participants"]
+        self.assertEqual(len(participants), 4)
+        self.assertTurnOrder(participants)
+        for participant in Participant.objects.select_related("character", "monster"):
+            creature = participant.character or participant.monster
+            modifier = ability_modifier(creature.dexterity)
+            self.assertEqual(participant.initiative_modifier, modifier)
+            self.assertTrue(1 + modifier <= participant.initiative <= 20 + modifier)
+
+        response = self.client.get(f"{self.base_url}{encounter['id']}/")
+        self.assertEqual(response.status_code, HTTP_200_OK)
+        self.assertEqual(response.data, encounter)
+
+        data = {"name": "Ambush", "characters": ["65083c70-8adb-42d2-9024-3890cdf03841"]}
+        self.post(self.base_url, data, status=HTTP_400_BAD_REQUEST)
+
+    def test_encounter_turns(self):
+        encounter = self.start_encounter()
+        order = [p["id"] for p in encounter["participants"]]
+        url = f"{self.base_url}{encounter['id']}/"
+
+        for round_number in (1, 2):
+            for turn in order:
+                # lock the encounter, update the participant ending its turn and the encounter,
+                # then load the participants for the response. The first turn loads the combat
+                # state and its tracker, which is kept for the following turns.
+                first_turn = (round_number, turn) == (1, order[0])
+                with self.assertNumQueries(7 if first_turn else 6):
+                    response = self.post(f"{url}next-turn/")
+                self.assertEqual(response.data["round"], round_number)
+                self.assertEqual(str(response.data["turn"]), turn)
+                self.assertEqual(response.data["participants"][0]["id"], turn)
+                self.assertTurnOrder(response.data["participants"])
+
+        # Pholus acts next round if his turn has already passed
+        response = self.post(f"{url}participants/", {"monsters": [PHOLUS]})
+        current, *participants = response.data["participants"]
+        pholus = next(p for p in participants if str(p["monster"]) == PHOLUS)
+        self.assertEqual(
+            pholus["acted"],
+            (pholus["initiative"], pholus["initiative_modifier"])
+            > (current["initiative"], current["initiative_modifier"]),
+        )
+        self.assertTurnOrder(response.data["participants"])
+        self.post(f"{url}participants/", {"monsters": [TODD]}, status=HTTP_400_BAD_REQUEST)
+
+        current = str(response.data["turn"])
+        response = self.client.delete(f"{url}participants/{current}/")
+        self.assertEqual(response.status_code, HTTP_204_NO_CONTENT)
+        self.assertIsNone(Encounter.objects.get(pk=encounter["id"]).turn)
+        response = self.post(f"{url}next-turn/")
+        self.assertEqual(len(response.data["participants"]), 4)
+        self.assertNotIn(current, [p["id"] for p in response.data["participants"]])
+
+    def test_turn_order_reloaded(self):
+        """Test that a kept turn order is loaded again when another process adds participants."""
+
+        encounter = self.start_encounter()
+        url = f"{self.base_url}{encounter['id']}/"
+        self.post(f"{url}next-turn/")
+        # added by another process, which reloads its own combat state
+        Encounter.objects.get(pk=encounter["id"]).add_participants(
+            monsters=Monster.objects.filter(pk=PHOLUS)
+        )
+        pholus = Participant.objects.get(monster=PHOLUS)
+        # the rest of the first round, and the second
+        turns = [self.post(f"{url}next-turn/").data["turn"] for _ in range(8)]
+        self.assertIn(pholus.id, turns)
+
+    def test_delay_turn(self):
+        encounter = self.start_encounter()
+        url = f"{self.base_url}{encounter['id']}/"
+        response = self.post(f"{url}next-turn/")
+        first, *others = response.data["participants"]
+        last = others[-1]
+
+        data = {"initiative": last["initiative"] - 1}
+        response = self.post(f"{url}participants/{first['id']}/delay/", data)
+        self.assertIsNone(response.data["turn"])
+        participants = response.data["participants"]
+        self.assertEqual([p["id"] for p in participants], [p["id"] for p in others] + [first["id"]])
+        self.assertEqual(participants[-1]["initiative"], last["initiative"] - 1)
+
+        response = self.post(f"{url}next-turn/")
+        self.assertEqual(str(response.data["turn"]), others[0]["id"])
+        # delaying to an earlier turn isn't allowed
+        data = {"initiative": others[0]["initiative"] + 1}
+        self.post(f"{url}participants/{others[1]['id']}/delay/", data, HTTP_400_BAD_REQUEST)
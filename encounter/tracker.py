@@ -0,0 +1,159 @@
+import heapq
+from itertools import count
+
+_REMOVED = object()
+
+
+class InitiativeTracker:
+    """
+    Turn order of an encounter.
+
+    Participants take their turns in order of initiative, highest first, with ties broken by the
+    higher initiative modifier and then by who joined first. The participants that haven't acted
+    this round and those that have are kept in two heaps. A turn pops the next participant and
+    pushes it on the heap of the next round, so starting a new round just swaps the heaps rather
+    than sorting everyone again. Adding, removing, and delaying a participant, and advancing a
+    turn, all take O(log n) time.
+
+    Participants are identified by any hashable key, e.g. their id.
+    """
+
+    def __init__(self, round=0):
+        self.round = round
+        self._waiting = []  # participants yet to act this round
+        self._acted = []  # participants that acted this round, in next round's order
+        self._entries = {}
+        self._current = None
+        self._removed = 0
+        self._sequence = count()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    @property
+    def current(self):
+        """The key of the participant whose turn it is, or None."""
+        return self._current[-1] if self._current else None
+
+    def _entry(self, key, initiative, modifier):
+        # the order is unique, so the round and key are never compared
+        return [(-initiative, -modifier, next(self._sequence)), -1, key]
+
+    def add(self, key, initiative, modifier=0, acted=None):
+        """
+        Add a participant to the encounter.
+
+        A participant joining during a round acts this round if its turn hasn't passed yet, and
+        next round otherwise. Use `acted` to override this, e.g. when restoring a saved encounter.
+        """
+
+        if key in self._entries:
+            raise ValueError(f"{key} is already in the encounter.")
+        entry = self._entry(key, initiative, modifier)
+        if acted is None:
+            acted = self._current is not None and entry[0] < self._current[0]
+        if acted:
+            entry[1] = self.round
+            heapq.heappush(self._acted, entry)
+        else:
+            heapq.heappush(self._waiting, entry)
+        self._entries[key] = entry
+
+    def add_current(self, key, initiative, modifier=0):
+        """Add the participant whose turn it is, e.g. when restoring a saved encounter."""
+
+        if self._current is not None:
+            raise ValueError("It's already someone's turn.")
+        entry = self._entry(key, initiative, modifier)
+        self._entries[key] = self._current = entry
+
+    def remove(self, key):
+        """Remove a participant, ending its turn if it's the current participant."""
+
+        entry = self._entries.pop(key)
+        if entry is self._current:
+            self._current = None
+            return
+        entry[-1] = _REMOVED
+        self._removed += 1
+        if self._removed > len(self._entries):
+            self._compact()
+
+    def delay(self, key, initiative, modifier=0):
+        """
+        Delay a participant's turn until later in the round, at a lower initiative.
+
+        The participant keeps the new initiative in later rounds. Delaying the current
+        participant ends its turn.
+        """
+
+        entry = self._entries[key]
+        delayed = self._entry(key, initiative, modifier)
+        current = self._current
+        if self.acted(key):
+            raise ValueError(f"{key} has already acted this round.")
+        if delayed[0] < entry[0] or (current is not None and delayed[0] < current[0]):
+            raise ValueError("A turn can only be delayed until later in the round.")
+        self.remove(key)
+        heapq.heappush(self._waiting, delayed)
+        self._entries[key] = delayed
+
+    def next(self):
+        """
+        End the current turn and start the next one, starting a new round when everyone has acted.
+
+        Returns the key of the participant whose turn it is, or None if there are no participants.
+        """
+
+        if self._current is not None:
+            self._current[1] = self.round
+            heapq.heappush(self._acted, self._current)
+            self._current = None
+        if not self._entries:
+            return None
+        if not self.round:
+            # the encounter starts
+            self.round = 1
+        entry = self._pop()
+        if entry is None:
+            self.round += 1
+            self._waiting, self._acted = self._acted, self._waiting
+            entry = self._pop()
+        self._current = entry
+        return entry[-1]
+
+    def _pop(self):
+        while self._waiting:
+            entry = heapq.heappop(self._waiting)
+            if entry[-1] is not _REMOVED:
+                return entry
+            self._removed -= 1
+        return None
+
+    def _compact(self):
+        """Drop removed participants from the heaps."""
+
+        for heap in (self._waiting, self._acted):
+            heap[:] = [entry for entry in heap if entry[-1] is not _REMOVED]
+            heapq.heapify(heap)
+        self._removed = 0
+
+    def acted(self, key):
+        """Whether the participant has taken its turn this round."""
+
+        return self._entries[key][1] == self.round
+
+    def order(self):
+        """
+        Get the keys of the participants in turn order, starting with the current participant.
+
+        Those that have already acted this round follow those that haven't, in next round's order.
+        """
+
+        order = [self._current[-1]] if self._current else []
+        for heap in (self._waiting, self._acted):
+            order.extend(entry[-1] for entry in sorted(heap) if entry[-1] is not _REMOVED)
+        return order
@@ -0,0 +1,56 @@
+from django.urls import path
+
+from .views import (
+    DelayTurnView,
+    EncounterDifficultyView,
+    EncounterAddView,
+    EncounterParticipantsStateView,
+    EncounterParticipantsView,
+    EncounterSimulationView,
+    EncounterView,
+    NextTurnView,
+    ParticipantConditionsView,
+    ParticipantDamageView,
+    ParticipantHealthView,
+    ParticipantView,
+)
+
+
+urlpatterns = [
+    path('', EncounterAddView.as_view(), name="encounter"),
+    path('simulate/', EncounterSimulationView.as_view(), name="encounter_simulation"),
+    path('difficulty/', EncounterDifficultyView.as_view(), name="encounter_difficulty"),
+    path('<str:pk>/', EncounterView.as_view(), name="encounter_detail"),
+    path('<str:pk>/next-turn/', NextTurnView.as_view(), name="encounter_next_turn"),
+    path(
+        '<str:pk>/participants/',
+        EncounterParticipantsView.as_view(),
+        name="encounter_participants",
+    ),
+    path(
+        '<str:pk>/participants/<str:participant_pk>/',
+        ParticipantView.as_view(),
+        name="encounter_participant",
+    ),
+    path(
+        '<str:pk>/participants/<str:participant_pk>/delay/',
+        DelayTurnView.as_view(),
+        name="encounter_delay_turn",
+    ),
+    path('<str:pk>/state/', EncounterParticipantsStateView.as_view(), name="encounter_state"),
+    path(
+        '<str:pk>/participants/<str:participant_pk>/hit-points/',
+        ParticipantHealthView.as_view(),
+        name="encounter_participant_hit_points",
+    ),
+    path(
+        '<str:pk>/participants/<str:participant_pk>/damage/',
+        ParticipantDamageView.as_view(),
+        name="encounter_participant_damage",
+    ),
+    path(
+        '<str:pk>/participants/<str:participant_pk>/conditions/',
+        ParticipantConditionsView.as_view(),
+        name="encounter_participant_conditions",
+    ),
+]
@@ -0,0 +1,388 @@
+from contextlib import contextmanager
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from drf_spectacular.utils import extend_schema
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import GenericAPIView
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.status import HTTP_200_OK, HTTP_201_CREATED, HTTP_204_NO_CONTENT
+
+from .combatants import load_monsters, load_party
+from .difficulty import rate_encounter
+from .models import Encounter, Participant
+from .serializers import (
+    DelayTurnSerializer,
+    DifficultyRequestSerializer,
+    DifficultySerializer,
+    EncounterAddSerializer,
+    EncounterParticipantsSerializer,
+    EncounterSerializer,
+    ParticipantAdjustHealthSerializer,
+    ParticipantConditionsSerializer,
+    ParticipantDamageSerializer,
+    ParticipantStateSerializer,
+    SimulationRequestSerializer,
+    SimulationSerializer,
+)
+from .simulation import simulate
+from .state import discard_state, encounter_state, loaded_state
+
+
+def get_encounter_state(pk):
+    """Get the encounter's combat state, see encounter.state, raising 404 errors."""
+
+    try:
+        return encounter_state(pk)
+    except (Encounter.DoesNotExist, DjangoValidationError):
+        raise Http404("No Encounter matches the given query.")
+
+
+class EncounterBaseView(GenericAPIView):
+    """
+    Base view for an encounter and its turn order.
+
+    Changes to the turn order lock the encounter, so concurrent turns can't be lost. Turns are
+    taken on the tracker kept with the encounter's combat state, see EncounterState.turn_order().
+    """
+
+    queryset = Encounter.objects.all()
+    serializer_class = EncounterSerializer
+
+    def get_locked_object(self):
+        """Get the encounter, locking it until the end of the transaction."""
+
+        queryset = self.filter_queryset(self.get_queryset()).select_for_update()
+        return get_object_or_404(queryset, pk=self.kwargs["pk"])
+
+    @contextmanager
+    def locked_turn_order(self):
+        """
+        Lock the encounter in a transaction, and get it with its tracker to change in place.
+
+        The tracker is dropped if the change fails, so it's loaded again with the encounter.
+        """
+
+        state = get_encounter_state(self.kwargs["pk"])
+        with transaction.atomic():
+            encounter = self.get_locked_object()
+            try:
+                yield encounter, state.turn_order(encounter)
+            except BaseException:
+                state.drop_turn_order()
+                raise
+
+    def reload_state_on_commit(self, encounter):
+        """
+        Get the encounter's combat state before its participants change, and load the
+        participants again once the change is committed, in every process. A rolled back change
+        keeps the state. The change should increment the encounter's participants_version, so the
+        turn order is loaded again too.
+        """
+
+        transaction.on_commit(get_encounter_state(encounter.pk).reload)
+
+    def discard_state_on_commit(self, encounter):
+        """
+        Get the encounter's combat state before it's deleted, and flush and discard it once the
+        delete is committed. A rolled back delete keeps the state.
+        """
+
+        pk = encounter.pk
+        get_encounter_state(pk)
+        transaction.on_commit(lambda: discard_state(pk))
+
+    def encounter_response(self, encounter, tracker=None, status=HTTP_200_OK):
+        participants = encounter.participants.select_related("character", "monster")
+        if tracker is None:
+            participants = list(participants)
+            tracker = encounter.tracker(participants)
+        else:
+            # ordered by the tracker, so the database needn't sort them
+            participants = participants.order_by()
+        participants = {participant.id: participant for participant in participants}
+        # skipping any removed since the tracker was changed
+        encounter.turn_order = [
+            participants[key] for key in tracker.order() if key in participants
+        ]
+        serializer = self.get_serializer(encounter)
+        return Response(serializer.data, status=status)
+
+
+class EncounterAddView(EncounterBaseView):
+    """
+    Start an encounter, rolling initiative for its characters and monsters.
+    """
+
+    @extend_schema(request=EncounterAddSerializer)
+    def post(self, request: Request):
+        serializer = EncounterAddSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        request_data = serializer.validated_data
+        with transaction.atomic():
+            encounter = Encounter.objects.create(
+                name=request_data["name"], campaign=request_data["campaign"]
+            )
+            encounter.add_participants(request_data["characters"], request_data["monsters"])
+        return self.encounter_response(encounter, status=HTTP_201_CREATED)
+
+
+class EncounterView(EncounterBaseView):
+    """
+    Get or delete an encounter.
+    """
+
+    def get(self, request: Request, pk):
+        return self.encounter_response(self.get_object())
+
+    def delete(self, request: Request, pk):
+        with transaction.atomic():
+            encounter = self.get_locked_object()
+            self.discard_state_on_commit(encounter)
+            encounter.delete()
+        return Response(status=HTTP_204_NO_CONTENT)
+
+
+class EncounterParticipantsView(EncounterBaseView):
+    """
+    Add characters and monsters to an encounter.
+    """
+
+    @extend_schema(request=EncounterParticipantsSerializer)
+    def post(self, request: Request, pk):
+        """
+        Roll initiative for the characters and monsters and add them to the turn order.
+
+        Participants joining after their turn would have passed this round act next round.
+        """
+
+        serializer = EncounterParticipantsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        request_data = serializer.validated_data
+        with transaction.atomic():
+            encounter = self.get_locked_object()
+            self.reload_state_on_commit(encounter)
+            try:
+                encounter.add_participants(request_data["characters"], request_data["monsters"])
+            except ValueError as e:
+                raise ValidationError(str(e))
+        return self.encounter_response(encounter)
+
+
+class ParticipantView(EncounterBaseView):
+    """
+    Remove a participant from an encounter.
+    """
+
+    def delete(self, request: Request, pk, participant_pk):
+        """Remove the participant, ending its turn if it's the current participant."""
+
+        with transaction.atomic():
+            encounter = self.get_locked_object()
+            participant = get_object_or_404(encounter.participants, pk=participant_pk)
+            # the participant's combat state is persisted when the state is reloaded
+            self.reload_state_on_commit(encounter)
+            participant.delete()
+            encounter.participants_changed()
+        return Response(status=HTTP_204_NO_CONTENT)
+
+
+class DelayTurnView(EncounterBaseView):
+    """
+    Delay a participant's turn.
+    """
+
+    @extend_schema(request=DelayTurnSerializer)
+    def post(self, request: Request, pk, participant_pk):
+        """
+        Delay the participant's turn until later in the round, at the requested initiative.
+
+        Delaying the current participant's turn ends it.
+        """
+
+        serializer = DelayTurnSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        with self.locked_turn_order() as (encounter, tracker):
+            participant = get_object_or_404(encounter.participants, pk=participant_pk)
+            try:
+                encounter.delay_turn(
+                    participant, serializer.validated_data["initiative"], tracker
+                )
+            except ValueError as e:
+                raise ValidationError(str(e))
+        return self.encounter_response(encounter, tracker)
+
+
+class NextTurnView(EncounterBaseView):
+    """
+    Advance an encounter's turn.
+    """
+
+    @extend_schema(request=None)
+    def post(self, request: Request, pk):
+        """End the current turn and start the next, starting a new round after everyone acted."""
+
+        with self.locked_turn_order() as (encounter, tracker):
+            previous_round = encounter.round
+            encounter.next_turn(tracker)
+        state = loaded_state(encounter.pk)
+        if state is not None and encounter.round != previous_round:
+            # write the combat state behind at the end of each round
+            state.flush()
+        return self.encounter_response(encounter, tracker)
+
+
+class EncounterStateView(GenericAPIView):
+    """
+    Base view for the in-memory combat state of an encounter's participants, see encounter.state.
+    """
+
+    serializer_class = ParticipantStateSerializer
+
+    def get_state(self):
+        return get_encounter_state(self.kwargs["pk"])
+
+    def get_participant(self):
+        """Get the encounter's state and the id of the requested participant."""
+
+        state = self.get_state()
+        try:
+            participant_id = Participant._meta.pk.to_python(self.kwargs["participant_pk"])
+            state.get(participant_id)
+        except (KeyError, DjangoValidationError):
+            raise Http404("No Participant matches the given query.")
+        except Encounter.DoesNotExist:
+            raise Http404("No Encounter matches the given query.")
+        return state, participant_id
+
+
+class EncounterParticipantsStateView(EncounterStateView):
+    """
+    Get the HP and conditions of an encounter's participants.
+    """
+
+    @extend_schema(responses=ParticipantStateSerializer(many=True))
+    def get(self, request: Request, pk):
+        """Get the participants' combat state, served from memory."""
+
+        try:
+            participants = self.get_state().all()
+        except Encounter.DoesNotExist:
+            raise Http404("No Encounter matches the given query.")
+        serializer = self.get_serializer(participants, many=True)
+        return Response(serializer.data)
+
+
+class ParticipantHealthView(EncounterStateView):
+    """
+    Adjust a participant's HP in memory.
+    """
+
+    @extend_schema(request=ParticipantAdjustHealthSerializer)
+    def post(self, request: Request, pk, participant_pk):
+        """Adjust the participant's current, maximum, and temporary HP by the requested values."""
+
+        serializer = ParticipantAdjustHealthSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        request_data = serializer.validated_data
+        state, participant_id = self.get_participant()
+        participant = state.adjust_health(
+            participant_id,
+            current_hp=request_data["current_hp"],
+            max_hp=request_data["max_hp"],
+            temporary_hp=request_data["temporary_hp"],
+            add_constitution=request_data["add_constitution_to_max_hp"],
+        )
+        return Response(self.get_serializer(participant).data)
+
+
+class ParticipantDamageView(EncounterStateView):
+    """
+    Deal damage to a participant in memory.
+    """
+
+    @extend_schema(request=ParticipantDamageSerializer)
+    def post(self, request: Request, pk, participant_pk):
+        """
+        Deal the requested damage to the participant, consuming temporary HP before current HP.
+        """
+
+        serializer = ParticipantDamageSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        state, participant_id = self.get_participant()
+        participant = state.apply_damage(participant_id, **serializer.validated_data)
+        return Response(self.get_serializer(participant).data)
+
+
+class ParticipantConditionsView(EncounterStateView):
+    """
+    Add and remove a participant's conditions in memory.
+    """
+
+    @extend_schema(request=ParticipantConditionsSerializer)
+    def post(self, request: Request, pk, participant_pk):
+        serializer = ParticipantConditionsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        state, participant_id = self.get_participant()
+        participant = state.change_conditions(participant_id, **serializer.validated_data)
+        return Response(self.get_serializer(participant).data)
+
+
+class EncounterSimulationView(GenericAPIView):
+    """
+    Simulate an encounter between a party of characters and monsters.
+    """
+
+    serializer_class = SimulationSerializer
+
+    @extend_schema(request=SimulationRequestSerializer)
+    def post(self, request: Request):
+        """
+        Estimate the party's chance of winning, and how many rounds the encounter takes.
+
+        The encounter is simulated the requested number of times, attacking with the characters'
+        equipped weapons, split between up to SIMULATION_MAX_WORKERS processes, see
+        encounter.simulation.
+        """
+
+        serializer = SimulationRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        request_data = serializer.validated_data
+        result = simulate(
+            load_party(request_data["characters"]),
+            load_monsters(request_data["monsters"]),
+            runs=request_data["runs"],
+            max_rounds=request_data["max_rounds"],
+            workers=request_data["workers"],
+        )
+        return Response(self.get_serializer(result).data)
+
+
+class EncounterDifficultyView(GenericAPIView):
+    """
+    Rate the difficulty of an encounter between a party of characters and a horde of monsters.
+    """
+
+    serializer_class = DifficultySerializer
+
+    @extend_schema(request=DifficultyRequestSerializer)
+    def post(self, request: Request):
+        """
+        Rate the encounter as trivial, easy, medium, hard, or deadly for the party.
+
+        Monster types are looked up in the reference cache and the party's XP thresholds are
+        summed in a single query, see encounter.difficulty.
+        """
+
+        serializer = DifficultyRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        request_data = serializer.validated_data
+        monsters = [(m["monster_type"], m["count"]) for m in request_data["monsters"]]
+        try:
+            result = rate_encounter(request_data["characters"], monsters)
+        except ValueError as e:
+            raise ValidationError(str(e))
+        return Response(self.get_serializer(result).data)
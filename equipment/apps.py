@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class EquipmentConfig(AppConfig):
     name = 'equipment'
+
+    def ready(self):
+        from . import reference, signals  # noqa: F401, registers the cached tables and receivers
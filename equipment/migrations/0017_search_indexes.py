@@ -0,0 +1,19 @@
+# Generated by Django 3.2 on 2026-10-17 14:40
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0016_weapon_weight'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tool',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('name', 'description', config='english'), name='tool_search_vector'),
+        ),
+    ]
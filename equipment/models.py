@@ -1,7 +1,12 @@
 import uuid
+from decimal import Decimal, ROUND_HALF_UP
 
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Cast, Coalesce, NullIf
 
 from common.models import DamageMixin, MoneyMixin
 
@@ -154,6 +159,52 @@ class AdventuringGear(MoneyMixin):
         return self.name
 
 
+def adventuring_gear_weight(adventuring_gear, length, quantity):
+    """
+    Get the weight of the length or quantity left of a piece of adventuring gear, rounded to the
+    hundredth like CharacterAdventuringGearQuerySet.with_weight(), whose cast to numeric rounds
+    ties away from zero.
+    """
+
+    if adventuring_gear.length:
+        amount, per = length, adventuring_gear.length
+    else:
+        amount, per = quantity, adventuring_gear.quantity
+    if not adventuring_gear.weight or not amount or not per:
+        return Decimal("0.00")
+    weight = adventuring_gear.weight * amount / per
+    return weight.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+class CharacterAdventuringGearQuerySet(models.QuerySet):
+    def with_weight(self):
+        """
+        Annotate the weight of the gear left as item_weight, in SQL.
+
+        Like CharacterAdventuringGear.weight(), the gear's weight is scaled by the length left if
+        the gear is measured in length, otherwise by the quantity left.
+        """
+
+        weight_field = models.DecimalField(max_digits=8, decimal_places=2)
+        weight = Case(
+            When(
+                adventuring_gear__length__gt=0,
+                then=F("adventuring_gear__weight") * F("length") / F("adventuring_gear__length"),
+            ),
+            default=(
+                F("adventuring_gear__weight")
+                * F("quantity")
+                / NullIf(F("adventuring_gear__quantity"), 0)
+            ),
+            output_field=weight_field,
+        )
+        return self.annotate(
+            item_weight=Cast(
+                Coalesce(weight, Value(Decimal(0)), output_field=weight_field), weight_field
+            )
+        )
+
+
 class CharacterAdventuringGear(models.Model):
     """
     Many-to-many table to manage gear assigned to the character and keep track of the length or
@@ -169,6 +220,8 @@ class CharacterAdventuringGear(models.Model):
     length = models.PositiveSmallIntegerField(null=True, blank=True)
     quantity = models.PositiveSmallIntegerField(null=True, blank=True)
 
+    objects = CharacterAdventuringGearQuerySet.as_manager()
+
     class Meta:
         db_table = "character_adventuring_gear"
 
@@ -176,14 +229,8 @@ class CharacterAdventuringGear(models.Model):
         return f"{self.character} - {self.adventuring_gear.name}"
 
     def weight(self):
-        if self.adventuring_gear.weight:
-            if self.adventuring_gear.length:
-                ratio = self.length / self.adventuring_gear.length
-            else:
-                ratio = self.quantity / self.adventuring_gear.quantity
-            weight = float(self.adventuring_gear.weight) * ratio
-            return f"{weight:.2f}"
-        return "0.00"
+        weight = adventuring_gear_weight(self.adventuring_gear, self.length, self.quantity)
+        return f"{weight:.2f}"
 
 
 class EquipmentPack(models.Model):
@@ -256,6 +303,12 @@ class Tool(MoneyMixin):
     class Meta:
         db_table = "tool"
         ordering = ("name",)
+        indexes = [
+            # full-text search index, matching the ToolListView search backend's SearchVector
+            GinIndex(
+                SearchVector("name", "description", config="english"), name="tool_search_vector"
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -0,0 +1,18 @@
+from django.db.models import Prefetch
+
+from common.reference import ReferenceTable
+from .models import AdventuringGear, Armor, EquipmentPack, EquipmentPackGear, Tool, Weapon
+
+adventuring_gear = ReferenceTable(AdventuringGear.objects.all())
+armor = ReferenceTable(Armor.objects.all())
+equipment_packs = ReferenceTable(
+    EquipmentPack.objects.prefetch_related(
+        Prefetch(
+            "equipmentpackgear_set",
+            queryset=EquipmentPackGear.objects.select_related("adventuring_gear"),
+        )
+    ),
+    depends_on=(EquipmentPackGear, AdventuringGear),
+)
+tools = ReferenceTable(Tool.objects.all())
+weapons = ReferenceTable(Weapon.objects.all())
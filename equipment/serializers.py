@@ -1,5 +1,6 @@
 from rest_framework import serializers
 
+from common.serializers import ReferenceNameSerializer
 from equipment.models import (
     AdventuringGear,
     Armor,
@@ -23,7 +24,7 @@ class AdventuringGearSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
-class ArmorNameSerializer(serializers.ModelSerializer):
+class ArmorNameSerializer(ReferenceNameSerializer):
 
     class Meta:
         model = Armor
@@ -53,16 +54,15 @@ class CharacterAdventuringGearSerializer(serializers.ModelSerializer):
 
     id = serializers.CharField(source="adventuring_gear_id")
     name = serializers.CharField(source="adventuring_gear.name")
-    weight = serializers.SerializerMethodField()
+    # annotated by CharacterAdventuringGearQuerySet.with_weight()
+    weight = serializers.DecimalField(
+        source="item_weight", max_digits=8, decimal_places=2, read_only=True
+    )
 
     class Meta:
         model = CharacterAdventuringGear
         fields = ["id", "name", "length", "quantity", "weight"]
 
-    @staticmethod
-    def get_weight(obj):
-        return obj.weight()
-
 
 class CharacterArmorSerializer(serializers.ModelSerializer):
     """
@@ -125,7 +125,7 @@ class CharacterWeaponSerializer(serializers.ModelSerializer):
 
     @staticmethod
     def get_damage(obj):
-        return obj.weapon.take_damage()
+        return obj.weapon.damage()
 
     @staticmethod
     def get_damage_type(obj):
@@ -169,7 +169,7 @@ class EquipmentPackDetailSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
-class ToolNameSerializer(serializers.ModelSerializer):
+class ToolNameSerializer(ReferenceNameSerializer):
 
     class Meta:
         model = Tool
@@ -192,7 +192,7 @@ class ToolSerializer(serializers.ModelSerializer):
         return obj.get_category_display()
 
 
-class WeaponNameSerializer(serializers.ModelSerializer):
+class WeaponNameSerializer(ReferenceNameSerializer):
 
     class Meta:
         model = Weapon
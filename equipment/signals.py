@@ -0,0 +1,156 @@
+"""
+Keep Character.carried_weight and Character.equipped_weight up to date as equipment changes.
+
+Saving or deleting a character's armor, weapon, or adventuring gear adds the difference in weight
+to the character with a single UPDATE, looking up the item weights in the reference cache.
+Tools are added and removed through the Character.tools many-to-many relation.
+
+Fixtures are loaded in any order, so raw saves, and changes to the items themselves, recompute
+the affected characters' weights in SQL instead. Changes that skip signals, like
+QuerySet.update() or bulk_create(), are not tracked; the carried_weight management command finds
+and repairs the drift.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from character.models import Character
+from .models import (
+    AdventuringGear,
+    Armor,
+    CharacterAdventuringGear,
+    CharacterArmor,
+    CharacterWeapon,
+    Tool,
+    Weapon,
+    adventuring_gear_weight,
+)
+from .reference import adventuring_gear, armor, tools, weapons
+
+CHARACTER_EQUIPMENT = (CharacterAdventuringGear, CharacterArmor, CharacterWeapon)
+ZERO = Decimal(0)
+
+
+def _item(table, pk):
+    item = table.get(pk)
+    if item is None:
+        # not cached yet, e.g. while loading fixtures
+        item = table.model.objects.filter(pk=pk).first()
+    return item
+
+
+def _snapshot(instance):
+    """The fields a piece of character equipment's weight depends on."""
+
+    if isinstance(instance, CharacterAdventuringGear):
+        return (
+            instance.character_id,
+            instance.adventuring_gear_id,
+            instance.length,
+            instance.quantity,
+        )
+    if isinstance(instance, CharacterArmor):
+        return instance.character_id, instance.armor_id, instance.equipped
+    return instance.character_id, instance.weapon_id, instance.equipped
+
+
+def _weights(model, snapshot):
+    """Get the character and the carried and equipped weight of a piece of equipment."""
+
+    if model is CharacterAdventuringGear:
+        character_id, gear_id, length, quantity = snapshot
+        gear = _item(adventuring_gear, gear_id)
+        weight = adventuring_gear_weight(gear, length, quantity) if gear else ZERO
+        return character_id, weight, ZERO
+    character_id, item_id, equipped = snapshot
+    item = _item(armor if model is CharacterArmor else weapons, item_id)
+    weight = item.weight if item else ZERO
+    return character_id, weight, weight if equipped else ZERO
+
+
+def _adjust(changes):
+    """Apply the {character_id: [carried, equipped]} weight changes."""
+
+    for character_id, (carried, equipped) in changes.items():
+        if character_id is not None and (carried or equipped):
+            Character.objects.filter(pk=character_id).adjust_carried_weight(carried, equipped)
+
+
+@receiver(post_init, sender=CharacterAdventuringGear)
+@receiver(post_init, sender=CharacterArmor)
+@receiver(post_init, sender=CharacterWeapon)
+def remember_equipment(sender, instance, **kwargs):
+    instance._carried_snapshot = _snapshot(instance)
+
+
+@receiver(post_save, sender=CharacterAdventuringGear)
+@receiver(post_save, sender=CharacterArmor)
+@receiver(post_save, sender=CharacterWeapon)
+def equipment_saved(sender, instance, created, raw, **kwargs):
+    snapshot = _snapshot(instance)
+    if raw:
+        Character.objects.filter(pk=instance.character_id).update_carried_weight()
+    elif created or snapshot != instance._carried_snapshot:
+        changes = defaultdict(lambda: [ZERO, ZERO])
+        if not created:
+            character_id, carried, equipped = _weights(sender, instance._carried_snapshot)
+            changes[character_id][0] -= carried
+            changes[character_id][1] -= equipped
+        character_id, carried, equipped = _weights(sender, snapshot)
+        changes[character_id][0] += carried
+        changes[character_id][1] += equipped
+        _adjust(changes)
+    instance._carried_snapshot = snapshot
+
+
+@receiver(post_delete, sender=CharacterAdventuringGear)
+@receiver(post_delete, sender=CharacterArmor)
+@receiver(post_delete, sender=CharacterWeapon)
+def equipment_deleted(sender, instance, **kwargs):
+    character_id, carried, equipped = _weights(sender, instance._carried_snapshot)
+    _adjust({character_id: [-carried, -equipped]})
+
+
+@receiver(m2m_changed, sender=Character.tools.through)
+def tools_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ("pre_remove", "pre_clear"):
+        # remember which tools are actually removed
+        owned = sender.objects.filter(**{"tool" if reverse else "character": instance})
+        if pk_set is not None:
+            owned = owned.filter(**{"character__in" if reverse else "tool__in": pk_set})
+        instance._removed_tools = list(owned.values_list("character_id", "tool_id"))
+        return
+    if action == "post_add":
+        pairs = [(pk, instance.pk) if reverse else (instance.pk, pk) for pk in pk_set]
+        sign = 1
+    elif action in ("post_remove", "post_clear"):
+        pairs = getattr(instance, "_removed_tools", [])
+        sign = -1
+    else:
+        return
+
+    changes = defaultdict(lambda: [ZERO, ZERO])
+    for character_id, tool_id in pairs:
+        tool = _item(tools, tool_id)
+        if tool is not None:
+            changes[character_id][0] += sign * tool.weight
+    _adjust(changes)
+
+
+@receiver(post_save, sender=AdventuringGear)
+@receiver(post_save, sender=Armor)
+@receiver(post_save, sender=Tool)
+@receiver(post_save, sender=Weapon)
+def item_saved(sender, instance, **kwargs):
+    """Recompute the weight carried by characters owning an item, whose weight may have changed."""
+
+    owners = {
+        AdventuringGear: "adventuring_gear",
+        Armor: "armor",
+        Tool: "tools",
+        Weapon: "weapons",
+    }[sender]
+    Character.objects.filter(**{owners: instance}).update_carried_weight()
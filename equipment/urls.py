@@ -5,10 +5,12 @@ from .views import (
     AdventuringGearView,
     ArmorListView,
     ArmorView,
+    DamageDistributionView,
     EquipmentPackListView,
     EquipmentPackView,
     ToolListView,
     ToolView,
+    WeaponDamageView,
     WeaponListView,
     WeaponView,
 )
@@ -20,10 +22,12 @@ urlpatterns = [
     ),
     path('equipment-pack/list/', EquipmentPackListView.as_view(), name="equipment_pack_list"),
     path('equipment-pack/<str:pk>/', EquipmentPackView.as_view(), name="equipment_pack_detail"),
+    path('damage/', DamageDistributionView.as_view(), name="damage_distribution"),
     path('armor/list/', ArmorListView.as_view(), name="armor_list"),
     path('armor/<str:pk>/', ArmorView.as_view(), name="armor_detail"),
     path('tool/list/', ToolListView.as_view(), name="tool_list"),
     path('tool/<str:pk>/', ToolView.as_view(), name="tool_detail"),
     path('weapon/list/', WeaponListView.as_view(), name="weapon_list"),
     path('weapon/<str:pk>/', WeaponView.as_view(), name="weapon_detail"),
+    path('weapon/<str:pk>/damage/', WeaponDamageView.as_view(), name="weapon_damage"),
 ]
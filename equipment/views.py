@@ -1,11 +1,13 @@
-from django.db import connection
-from django.db.models import Prefetch
-from rest_framework.generics import RetrieveAPIView, get_object_or_404, GenericAPIView
+from drf_spectacular.utils import extend_schema
+from rest_framework.generics import get_object_or_404, GenericAPIView
 from rest_framework.request import Request
 from rest_framework.response import Response
 
-from common.views import ManagedListView
-from .models import Tool, Armor, Weapon, AdventuringGear, EquipmentPack, EquipmentPackGear
+from common.probability import distribution
+from common.search import FullTextSearch
+from common.serializers import DamageDiceSerializer, DistributionSerializer
+from common.views import ManagedListView, ReferenceRetrieveAPIView
+from .models import Tool, Armor, Weapon, AdventuringGear, EquipmentPack
 from .serializers import (
     AdventuringGearSerializer,
     ArmorSerializer,
@@ -45,7 +47,7 @@ class ArmorListView(ManagedListView):
         return super().post(request)
 
 
-class ArmorView(RetrieveAPIView):
+class ArmorView(ReferenceRetrieveAPIView):
     """
     Get a piece of Armor's details.
     """
@@ -66,7 +68,7 @@ class AdventuringGearListView(ManagedListView):
     serializer_class = AdventuringGearSerializer
 
 
-class AdventuringGearView(RetrieveAPIView):
+class AdventuringGearView(ReferenceRetrieveAPIView):
     """
     Get a piece of AdventuringGear's details.
     """
@@ -87,25 +89,14 @@ class EquipmentPackListView(ManagedListView):
     serializer_class = EquipmentPackSerializer
 
 
-class EquipmentPackView(GenericAPIView):
+class EquipmentPackView(ReferenceRetrieveAPIView):
     """
     Get EquipmentPack's details and list included AdventuringGear.
     """
 
-    queryset = EquipmentPack.objects.prefetch_related(
-        Prefetch(
-            "gear", queryset=EquipmentPackGear.objects.select_related("adventuring_gear")
-        )
-    )
+    queryset = EquipmentPack.objects.all()
     serializer_class = EquipmentPackDetailSerializer
 
-    def get(self, request: Request, pk):
-        # RetrieveAPIView adds additional filters that makes prefetch_related() useless.
-        # Getting object this way uses queryset cache for prefetched adventuring_gear.
-        instance = get_object_or_404(self.queryset, pk=pk)
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
-
 
 class WeaponListView(ManagedListView):
     """
@@ -135,7 +126,7 @@ class WeaponListView(ManagedListView):
         return super().post(request)
 
 
-class WeaponView(RetrieveAPIView):
+class WeaponView(ReferenceRetrieveAPIView):
     """
     Get a piece of Weapon's details.
     """
@@ -144,12 +135,49 @@ class WeaponView(RetrieveAPIView):
     serializer_class = WeaponSerializer
 
 
+class WeaponDamageView(GenericAPIView):
+    """
+    Get the exact damage distribution of a Weapon.
+    """
+
+    queryset = Weapon.objects.only("damage_die", "damage_die_count")
+    serializer_class = DistributionSerializer
+
+    def get(self, request: Request, pk):
+        weapon = get_object_or_404(self.queryset, pk=pk)
+        plan = weapon.damage_plan()
+        serializer = self.get_serializer(
+            {"expression": plan.expression, "distribution": distribution(plan)}
+        )
+        return Response(serializer.data)
+
+
+class DamageDistributionView(GenericAPIView):
+    """
+    Get the exact distribution of damage dealt by DamageMixin dice, e.g. a Weapon's damage_die and
+    damage_die_count, plus an optional flat modifier.
+    """
+
+    serializer_class = DistributionSerializer
+
+    @extend_schema(parameters=[DamageDiceSerializer])
+    def get(self, request: Request):
+        dice_serializer = DamageDiceSerializer(data=request.query_params)
+        dice_serializer.is_valid(raise_exception=True)
+        expression = dice_serializer.expression()
+        serializer = self.get_serializer(
+            {"expression": expression, "distribution": distribution(expression)}
+        )
+        return Response(serializer.data)
+
+
 class ToolListView(ManagedListView):
     """
     Paginated Tool list view with filter, search, and sorting capability.
     """
 
     search_fields = ("name", "description")
+    search_backend = FullTextSearch()
     sort_fields = ("name", "weight", "copper", "silver", "electrum", "gold", "platinum")
     ordering = ["name", "id"]
     queryset = Tool.objects.all()
@@ -161,7 +189,7 @@ class ToolListView(ManagedListView):
         return super().post(request)
 
 
-class ToolView(RetrieveAPIView):
+class ToolView(ReferenceRetrieveAPIView):
     """
     Get a Tool's details.
     """
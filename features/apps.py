@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class FeaturesConfig(AppConfig):
     name = 'features'
+
+    def ready(self):
+        from . import reference  # noqa: F401, registers the cached static tables
@@ -0,0 +1,47 @@
+from bisect import bisect_right
+
+from common.reference import table_version, track_table_versions
+from .models import CharacterClassFeature, Feat
+
+
+class ClassFeatureIndex:
+    """
+    In-process index of the features each character class gains, sorted by level.
+
+    The whole table is loaded in one query, with the feats, and kept until the version of the
+    class features or feats changes, like a ReferenceTable. Finding the features of a class up to
+    a level is then a bisect of the class' levels. Cached instances are shared between requests
+    and should be treated as read-only.
+    """
+
+    models = (CharacterClassFeature, Feat)
+
+    def __init__(self):
+        self._index = None
+        track_table_versions(*self.models)
+
+    def classes(self):
+        """Get the {class_id: (levels, features)} index, loading it if it's stale."""
+
+        version = table_version(*self.models)
+        index = self._index
+        if index is None or index[0] != version:
+            classes = {}
+            class_features = CharacterClassFeature.objects.select_related("feat")
+            for feature in class_features.order_by("character_class", "level", "feat__name"):
+                levels, features = classes.setdefault(feature.character_class_id, ([], []))
+                levels.append(feature.level)
+                features.append(feature)
+            index = (version, classes)
+            self._index = index
+        return index[1]
+
+    def features(self, character_class_id, level=None):
+        """
+        Get the features a member of a class has at a level, or at any level, in level order.
+        """
+
+        levels, features = self.classes().get(character_class_id, ([], []))
+        if level is None:
+            return list(features)
+        return features[:bisect_right(levels, level)]
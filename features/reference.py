@@ -0,0 +1,6 @@
+from common.reference import ReferenceTable
+from .index import ClassFeatureIndex
+from .models import Feat
+
+feats = ReferenceTable(Feat.objects.all())
+class_features = ClassFeatureIndex()
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 
-from .models import CharacterClassFeature
+from common.serializers import ReferenceNameSerializer
+from .models import CharacterClassFeature, CharacterFeat, Feat
 
 
 class ClassFeatureNameSerializer(serializers.ModelSerializer):
@@ -11,3 +12,18 @@ class ClassFeatureNameSerializer(serializers.ModelSerializer):
     class Meta:
         model = CharacterClassFeature
         fields = ["id", "name", "level"]
+
+
+class FeatNameSerializer(ReferenceNameSerializer):
+
+    class Meta:
+        model = Feat
+        fields = ["id", "name"]
+
+
+class CharacterFeatSerializer(serializers.ModelSerializer):
+    feat = FeatNameSerializer()
+
+    class Meta:
+        model = CharacterFeat
+        fields = ["id", "feat"]
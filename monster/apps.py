@@ -3,3 +3,11 @@ from django.apps import AppConfig
 
 class MonsterConfig(AppConfig):
     name = 'monster'
+
+    def ready(self):
+        from common.reference import track_table_versions
+        from .models import Monster, MonsterType
+        from . import reference  # noqa: F401, registers the cached monster types
+
+        # version the monster tables for the list and detail views' ETags
+        track_table_versions(Monster, MonsterType)
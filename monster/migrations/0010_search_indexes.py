@@ -0,0 +1,30 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# Django's icontains lookup compiles to UPPER("column"::text) LIKE UPPER('%search%'), so the trigram
+# indexes are built on the same expression for Postgres to use them.
+SEARCH_FIELDS = (
+    ("monster", "first_name"),
+    ("monster", "last_name"),
+    ("monster_type", "name"),
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monster', '0009_remove_money_fields'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+    ] + [
+        migrations.RunSQL(
+            sql=(
+                f'CREATE INDEX "{table}_{field}_trgm" ON "{table}" '
+                f'USING gin (UPPER("{field}"::text) gin_trgm_ops);'
+            ),
+            reverse_sql=f'DROP INDEX "{table}_{field}_trgm";',
+        )
+        for table, field in SEARCH_FIELDS
+    ]
@@ -1,8 +1,15 @@
 from django.core.validators import MaxValueValidator
 from django.db import models
+from django.db.models import IntegerField, Max
+from django.db.models.functions import Cast
 import uuid
 
+from common.dice import compile_dice
+from common.helpers import ability_modifier
 from common.models import AbilityScoreHealthMixin, CampaignManagementMixin, MoneyMixin
+from common.reference import bump_table_version
+
+ABILITY_SCORES = ("strength", "dexterity", "constitution", "intelligence", "wisdom", "charisma")
 
 
 class MonsterType(models.Model):
@@ -25,6 +32,60 @@ class MonsterType(models.Model):
     def __str__(self):
         return self.name
 
+    def hit_dice(self):
+        """Hit point dice notation, adding the constitution modifier for each hit die."""
+        modifier = ability_modifier(self.constitution) * self.hit_die_count
+        notation = f"{self.hit_die_count}d{self.hit_die}"
+        if modifier:
+            notation = f"{notation}{modifier:+d}"
+        return notation
+
+    def hit_dice_plan(self):
+        return compile_dice(self.hit_dice())
+
+    def roll_hit_points(self, rng=None):
+        return max(self.hit_dice_plan().roll(rng)["total"], 1)
+
+    def average_hit_points(self):
+        """The fixed hit points of the type, the average of its hit dice rounded down."""
+        modifier = ability_modifier(self.constitution) * self.hit_die_count
+        return max(self.hit_die_count * (self.hit_die + 1) // 2 + modifier, 1)
+
+    def spawn(self, count, campaign=None, first_name=None, average_hit_points=False, rng=None):
+        """
+        Create `count` monsters of this type with a single INSERT.
+
+        The monsters get the type's armor class and ability scores, and either rolled or average
+        hit points. They're named after the type, or `first_name`, and numbered by last name,
+        continuing after the highest number of the type's monsters in the campaign.
+        """
+
+        if average_hit_points:
+            hit_points = [self.average_hit_points()] * count
+        else:
+            hit_points = [max(hp, 1) for hp in self.hit_dice_plan().totals(count, rng)]
+        first_name = first_name or self.name
+        scores = {score: getattr(self, score) for score in ABILITY_SCORES}
+        last_number = Monster.objects.filter(
+            monster_type=self, campaign=campaign, last_name__regex=r"^[0-9]{1,9}$"
+        ).aggregate(number=Max(Cast("last_name", IntegerField())))["number"] or 0
+        monsters = Monster.objects.bulk_create(
+            Monster(
+                monster_type=self,
+                campaign=campaign,
+                first_name=first_name,
+                last_name=str(number),
+                max_hp=hp,
+                current_hp=hp,
+                armor_class=self.armor_class,
+                **scores,
+            )
+            for number, hp in enumerate(hit_points, start=last_number + 1)
+        )
+        # bulk_create() skips the signals that version the table
+        bump_table_version(Monster)
+        return monsters
+
 
 class Monster(AbilityScoreHealthMixin, CampaignManagementMixin):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4)
@@ -0,0 +1,4 @@
+from common.reference import ReferenceTable
+from .models import MonsterType
+
+monster_types = ReferenceTable(MonsterType.objects.all())
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 
+from campaign.models import Campaign
 from .models import Monster, MonsterType
 
 
@@ -43,3 +44,47 @@ class MonsterSerializer(MonsterListEntrySerializer):
     class Meta:
         model = Monster
         fields = "__all__"
+
+
+class MonsterSpawnSerializer(serializers.Serializer):
+    """
+    Validate a request to spawn monsters of a type.
+    """
+
+    count = serializers.IntegerField(min_value=1, max_value=1000)
+    campaign = serializers.PrimaryKeyRelatedField(
+        queryset=Campaign.objects.all(), required=False, allow_null=True, default=None
+    )
+    first_name = serializers.CharField(max_length=30, required=False)
+    average_hit_points = serializers.BooleanField(default=False)
+
+
+class MonsterAbilityStatsSerializer(serializers.Serializer):
+    score = serializers.IntegerField()
+    modifier = serializers.IntegerField()
+
+
+class MonsterAbilitiesStatsSerializer(serializers.Serializer):
+    strength = MonsterAbilityStatsSerializer()
+    dexterity = MonsterAbilityStatsSerializer()
+    constitution = MonsterAbilityStatsSerializer()
+    intelligence = MonsterAbilityStatsSerializer()
+    wisdom = MonsterAbilityStatsSerializer()
+    charisma = MonsterAbilityStatsSerializer()
+
+
+class MonsterStatBlockSerializer(serializers.Serializer):
+    """
+    Serialize a monster's derived stat block, see monster.stats.
+    """
+
+    id = serializers.UUIDField()
+    name = serializers.CharField()
+    monster_type = serializers.CharField(allow_null=True)
+    abilities = MonsterAbilitiesStatsSerializer()
+    armor_class = serializers.IntegerField()
+    initiative = serializers.IntegerField()
+    passive_perception = serializers.IntegerField()
+    current_hp = serializers.IntegerField()
+    max_hp = serializers.IntegerField()
+    temporary_hp = serializers.IntegerField()
@@ -0,0 +1,50 @@
+"""
+Derived monster stats, the monster counterpart of character.stats.
+
+Monsters have no race, class, or armor, so a stat block only derives their ability modifiers,
+initiative, and passive perception from their own values.
+"""
+
+from common.helpers import ability_modifier
+from common.models import HEALTH_FIELDS
+from common.streaming import STREAM_CHUNK_SIZE
+from .models import ABILITY_SCORES
+from .reference import monster_types
+
+
+def compute_stat_block(monster, monster_type):
+    """Compute a monster's stat block from a dictionary of its values and its type."""
+
+    scores = {
+        field: {"score": monster[field], "modifier": ability_modifier(monster[field])}
+        for field in ABILITY_SCORES
+    }
+    return {
+        "id": monster["id"],
+        "name": f"{monster['first_name']} {monster['last_name']}".strip(),
+        "monster_type": monster_type.name if monster_type else None,
+        "abilities": scores,
+        "armor_class": monster["armor_class"],
+        "initiative": scores["dexterity"]["modifier"],
+        "passive_perception": 10 + scores["wisdom"]["modifier"],
+        **{field: monster[field] for field in HEALTH_FIELDS},
+    }
+
+
+def stat_blocks(queryset, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Compute the stat blocks of every monster in the queryset, from a single query iterated with
+    a server-side cursor, looking up the monster types in the reference cache.
+    """
+
+    rows = queryset.values(
+        "id",
+        "first_name",
+        "last_name",
+        "monster_type_id",
+        "armor_class",
+        *HEALTH_FIELDS,
+        *ABILITY_SCORES,
+    )
+    for monster in rows.iterator(chunk_size=chunk_size):
+        yield compute_stat_block(monster, monster_types.get(monster["monster_type_id"]))
@@ -1,3 +1,197 @@
+import json
+from unittest import mock
+
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from .models import Monster, MonsterType
+from .views import MonsterListView
+
+
+class TestMonsterViews(TestCase):
+    fixtures = [
+        "campaign/fixtures/campaign.json",
+        "monster/fixtures/monster.json",
+    ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_monster_list_pagination(self):
+        """
+        Test that only the requested page of monsters is fetched and serialized.
+
+        Expect a row estimate that is too small to trust, an exact COUNT, a LIMIT/OFFSET query
+        for the page, and the monster type prefetch. The count is cached for the next page.
+        """
+
+        url = "/api/monster/list/"
+        with self.assertNumQueries(4):
+            response = self.client.post(f"{url}?page_size=2")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 4)
+        self.assertEqual([r["first_name"] for r in response.data["results"]], ["Allan", "Ally"])
+        self.assertEqual(response.data["results"][0]["monster_type"]["name"], "Stegosaurus")
+        self.assertIsNone(response.data.get("previous"))
+        next_link = response.data["next"]
+
+        with self.assertNumQueries(2):
+            response = self.client.post(f"{url}{next_link}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [r["first_name"] for r in response.data["results"]], ["Pholus", "Todd"]
+        )
+        self.assertIsNone(response.data.get("next"))
+        self.assertEqual(response.data["previous"], "?page=1&page_size=2")
+
+    def test_monster_list_keyset_pagination(self):
+        """
+        Test paging through monsters with cursors.
+
+        Keyset pages skip the COUNT, so expect only the page query and the monster type prefetch.
+        """
+
+        url = "/api/monster/list/"
+        with self.assertNumQueries(2):
+            response = self.client.post(f"{url}?cursor=&page_size=2")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("count", response.data)
+        self.assertEqual([r["first_name"] for r in response.data["results"]], ["Allan", "Ally"])
+        self.assertIsNone(response.data.get("previous"))
+
+        with self.assertNumQueries(2):
+            response = self.client.post(f"{url}{response.data['next']}")
+        self.assertEqual(
+            [r["first_name"] for r in response.data["results"]], ["Pholus", "Todd"]
+        )
+        self.assertIsNone(response.data.get("next"))
+
+        response = self.client.post(f"{url}{response.data['previous']}")
+        self.assertEqual([r["first_name"] for r in response.data["results"]], ["Allan", "Ally"])
+        self.assertIsNone(response.data.get("previous"))
+        self.assertIsNotNone(response.data.get("next"))
+
+        response = self.client.post(f"{url}?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, 404)
+
+    def test_monster_list_not_modified(self):
+        """
+        Test that a list request matching the ETag gets a 304 response without any queries.
+        """
+
+        url = "/api/monster/list/?page_size=2"
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.post(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response.content, b"")
+
+        response = self.client.post(f"{url}&page=2", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post(url, {"search": "Todd"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        Monster.objects.get(first_name="Allan").save()
+        response = self.client.post(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_monster_list_export(self):
+        """
+        Test streaming every matching monster, unpaginated.
+
+        Expect a single query for the rows, skipping the COUNT, and a monster type prefetch per
+        chunk of rows.
+        """
+
+        url = "/api/monster/list/"
+        with mock.patch.object(MonsterListView, "export_chunk_size", 2):
+            with self.assertNumQueries(3):
+                response = self.client.post(f"{url}?export=ndjson&page_size=1")
+                content = b"".join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        monsters = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual(
+            [m["first_name"] for m in monsters], ["Allan", "Ally", "Pholus", "Todd"]
+        )
+        self.assertEqual(monsters[0]["monster_type"]["name"], "Stegosaurus")
+
+        data = {"search": "Todd"}
+        response = self.client.post(
+            f"{url}?export=json", data=data, content_type="application/json"
+        )
+        self.assertEqual(response["Content-Type"], "application/json")
+        monsters = json.loads(b"".join(response.streaming_content))
+        self.assertEqual([m["first_name"] for m in monsters], ["Todd"])
+
+        response = self.client.post(f"{url}?export=csv")
+        self.assertEqual(response.status_code, 400)
+
+    def test_monster_spawn(self):
+        """
+        Test spawning monsters of a type with a single INSERT.
+
+        Expect the campaign and monster type lookups, the highest number of the type's monsters in
+        the campaign, and the INSERT. Spawning again continues the numbering.
+        """
+
+        stegosaurus = MonsterType.objects.get(name="Stegosaurus")
+        campaign = "5c0257f1-e8a2-4121-8d7d-0e6ad5654d66"
+        url = f"/api/monster/type/{stegosaurus.id}/spawn/"
+        list_url = "/api/monster/list/"
+        etag = self.client.post(list_url)["ETag"]
+
+        data = {"count": 3, "campaign": campaign, "average_hit_points": True}
+        with self.assertNumQueries(4):
+            response = self.client.post(url, data=data, content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data), 3)
+        for number, monster in enumerate(response.data, start=1):
+            self.assertEqual(monster["first_name"], "Stegosaurus")
+            self.assertEqual(monster["last_name"], str(number))
+            self.assertEqual(monster["monster_type"]["id"], str(stegosaurus.id))
+            self.assertEqual(str(monster["campaign"]), campaign)
+            # 7d8 averages 31, plus a +3 constitution modifier per hit die
+            self.assertEqual(monster["max_hp"], 52)
+            self.assertEqual(monster["current_hp"], 52)
+            self.assertEqual(monster["armor_class"], 13)
+            self.assertEqual(monster["strength"], 18)
+        spawned = Monster.objects.filter(campaign=campaign, first_name="Stegosaurus")
+        self.assertEqual(spawned.count(), 3)
+        self.assertEqual(self.client.post(list_url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        data = {"count": 2, "campaign": campaign}
+        response = self.client.post(url, data=data, content_type="application/json")
+        self.assertEqual([monster["last_name"] for monster in response.data], ["4", "5"])
+        data = {"count": 1, "campaign": "d4d3bfa0-2922-46d9-827c-c55a9c1600b1"}
+        response = self.client.post(url, data=data, content_type="application/json")
+        self.assertEqual(response.data[0]["last_name"], "1")
+
+        data = {"count": 500, "first_name": "Grunt"}
+        response = self.client.post(
+            url, data=data, content_type="application/json", HTTP_X_DICE_SEED="42"
+        )
+        self.assertEqual(response.status_code, 201)
+        hit_points = [monster["max_hp"] for monster in response.data]
+        self.assertTrue(all(28 <= hp <= 77 for hp in hit_points))
+        self.assertGreater(len(set(hit_points)), 1)
+        self.assertEqual(Monster.objects.filter(first_name="Grunt").count(), 500)
+
+        response = self.client.post(
+            url, data=data, content_type="application/json", HTTP_X_DICE_SEED="42"
+        )
+        self.assertEqual([monster["max_hp"] for monster in response.data], hit_points)
+
+        response = self.client.post(url, data={"count": 0}, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(
+            "/api/monster/type/65083c70-8adb-42d2-9024-3890cdf03841/spawn/",
+            data={"count": 1},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 404)
@@ -1,11 +1,18 @@
 from django.urls import path
 
-from .views import MonsterTypeListView, MonsterTypeView, MonsterListView, MonsterView
+from .views import (
+    MonsterTypeListView,
+    MonsterTypeView,
+    MonsterSpawnView,
+    MonsterListView,
+    MonsterView,
+)
 
 
 urlpatterns = [
     path('type/list/', MonsterTypeListView.as_view(), name="monster_type_list"),
     path('type/<str:pk>/', MonsterTypeView.as_view(), name="monster_type_detail"),
+    path('type/<str:pk>/spawn/', MonsterSpawnView.as_view(), name="monster_spawn"),
     path('list/', MonsterListView.as_view(), name="monster_list"),
     path('<str:pk>/', MonsterView.as_view(), name="monster_detail"),
 ]
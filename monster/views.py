@@ -1,7 +1,18 @@
-from rest_framework.generics import RetrieveAPIView
+from drf_spectacular.utils import extend_schema
+from rest_framework.generics import GenericAPIView, RetrieveAPIView
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.status import HTTP_201_CREATED
 
 from .models import MonsterType, Monster
-from .serializers import MonsterTypeSerializer, MonsterListEntrySerializer, MonsterSerializer
+from .serializers import (
+    MonsterTypeSerializer,
+    MonsterListEntrySerializer,
+    MonsterSerializer,
+    MonsterSpawnSerializer,
+)
+from common.conditional import ConditionalMixin
+from common.counting import CachedCount, EstimatedCount
 from common.views import ManagedListView
 
 
@@ -17,7 +28,7 @@ class MonsterTypeListView(ManagedListView):
     serializer_class = MonsterTypeSerializer
 
 
-class MonsterTypeView(RetrieveAPIView):
+class MonsterTypeView(ConditionalMixin, RetrieveAPIView):
     """
     Get a monster type's details.
     """
@@ -26,6 +37,34 @@ class MonsterTypeView(RetrieveAPIView):
     serializer_class = MonsterTypeSerializer
 
 
+class MonsterSpawnView(GenericAPIView):
+    """
+    Spawn monsters of a monster type.
+    """
+
+    queryset = MonsterType.objects.all()
+    serializer_class = MonsterSerializer
+
+    @extend_schema(request=MonsterSpawnSerializer, responses=MonsterSerializer(many=True))
+    def post(self, request: Request, pk):
+        """
+        Create the requested number of monsters of the type, with rolled or average hit points.
+        """
+
+        serializer = MonsterSpawnSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        request_data = serializer.validated_data
+        monster_type = self.get_object()
+        monsters = monster_type.spawn(
+            request_data["count"],
+            campaign=request_data["campaign"],
+            first_name=request_data.get("first_name"),
+            average_hit_points=request_data["average_hit_points"],
+        )
+        serializer = self.get_serializer(monsters, many=True)
+        return Response(serializer.data, status=HTTP_201_CREATED)
+
+
 class MonsterListView(ManagedListView):
     """
     Paginated monster type list view with filter, search, and sorting capability.
@@ -35,6 +74,8 @@ class MonsterListView(ManagedListView):
     sort_fields = ("first_name", "last_name", "armor_class", "max_hp", "monster_type")
     field_map = {"monster_type": "monster_type__name"}
     ordering = ["first_name", "last_name", "id"]
+    count_strategy = CachedCount(EstimatedCount())
+    etag_tables = (Monster, MonsterType)
     queryset = Monster.objects.all().prefetch_related("monster_type")
     serializer_class = MonsterListEntrySerializer
 
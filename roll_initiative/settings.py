@@ -33,6 +33,7 @@ ALLOWED_HOSTS = []
 INSTALLED_APPS = [
     'campaign.apps.CampaignConfig',
     'character.apps.CharacterConfig',
+    'common.apps.CommonConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -42,6 +43,7 @@ INSTALLED_APPS = [
     'django_filters',
     'django_spaghetti',
     'drf_spectacular',
+    'encounter.apps.EncounterConfig',
     'equipment.apps.EquipmentConfig',
     'features.apps.FeaturesConfig',
     'monster.apps.MonsterConfig',
@@ -57,6 +59,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'common.middleware.DiceRNGMiddleware',
 ]
 
 ROOT_URLCONF = 'roll_initiative.urls'
@@ -95,6 +98,19 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.0/topics/cache/
+# Table and character versions are kept in the cache, so it has to be shared by every worker
+# process, see common.reference.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+        'LOCATION': os.environ.get('MEMCACHED_LOCATION', '127.0.0.1:11211'),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
 
@@ -148,6 +164,10 @@ SPECTACULAR_SETTINGS = {
     'TITLE': 'Roll Initiative API',
     'DESCRIPTION': 'Manage your D&D shit here!',
     'VERSION': '1.0.0',
+    'ENUM_NAME_OVERRIDES': {
+        'ConditionEnum': 'encounter.models.Participant.CONDITION_CHOICES',
+        'DamageTypeEnum': 'common.models.DamageMixin.DAMAGE_TYPE_CHOICES',
+    },
 }
 
 
@@ -155,7 +175,17 @@ SPECTACULAR_SETTINGS = {
 # Model schema graph view
 
 SPAGHETTI_SAUCE = {
-    'apps': ['campaign', 'character', 'equipment', 'features', 'monster'],
+    'apps': ['campaign', 'character', 'encounter', 'equipment', 'features', 'monster'],
     'show_fields': False,
     'exclude': {},
 }
+
+
+# Encounters
+# In-memory combat state, see encounter.state
+
+ENCOUNTER_JOURNAL_DIR = os.path.join(BASE_DIR, 'journal')
+# seconds between flushes of changed combat state to the database
+ENCOUNTER_FLUSH_INTERVAL = 30
+# most processes a single encounter simulation request may fan out to, see encounter.simulation
+SIMULATION_MAX_WORKERS = 4
@@ -5,7 +5,9 @@ from schema_graph.views import Schema
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/campaign/', include('campaign.urls'), name="campaign"),
     path('api/character/', include('character.urls'), name="character"),
+    path('api/encounter/', include('encounter.urls'), name="encounter"),
     path('api/equipment/', include('equipment.urls'), name="equipment"),
     path('api/monster/', include('monster.urls'), name="monster"),
     path('schema/', SpectacularAPIView.as_view(), name='schema'),